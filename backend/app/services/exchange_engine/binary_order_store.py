@@ -0,0 +1,290 @@
+import mmap
+import struct
+import sys
+from operator import attrgetter, itemgetter
+from typing import List
+
+from utils.file_io import *
+from engine.order import Order
+from engine.order_store import OrderStore
+
+
+# magic, version, flags, string count, order count,
+# journal_seq, last_order_seq, last_trade_seq, sequencer prefix
+HEADER = struct.Struct("<8sHHIQQQQH14x")
+# order_id, price, quantity, remaining_quantity, timestamp,
+# client_id / user / symbol string indexes, side, order_type, status
+RECORD = struct.Struct("<QqqqqIIIBBB9x")
+STRING_LENGTH = struct.Struct("<H")
+
+MAGIC = b"EXSNAP\x00\x00"
+VERSION = 1
+
+HAS_SEQUENCER = 0x1
+HAS_JOURNAL_SEQ = 0x2
+
+# string index standing for None
+NO_STRING = 0xFFFFFFFF
+
+# fields of one record, in RECORD order
+FIELDS = (
+    "order_id", "price", "quantity", "remaining_quantity", "timestamp",
+    "client_id", "user", "symbol", "side", "order_type", "status"
+)
+
+SIDES = ("BUY", "SELL")
+ORDER_TYPES = ("LIMIT", "MARKET")
+STATUSES = ("NEW", "PARTIALLY_FILLED")
+
+
+class BinaryOrderStore(OrderStore):
+    """
+    OrderStore writing snapshots in a compact binary format.
+
+    Layout (little endian):
+        header        : HEADER (64 bytes): counts, journal position and
+                        ID sequencer high-water marks
+        string table  : client IDs, users and symbols, each stored once
+                        as a 2-byte length + UTF-8 bytes
+        records       : one fixed-width RECORD (64 bytes) per order,
+                        strings replaced by their string table index
+
+    Records are written in price-time priority, level by level, so the
+    book can be rebuilt by appending them in file order (no sort).
+    The file is memory-mapped on load and the records are decoded in
+    one pass with struct.iter_unpack.
+
+    Order IDs must fit in 64 bits (IdSequencer IDs do).
+    Identifiers (client_id, user, symbol) are stored as strings.
+
+    If the binary snapshot does not exist yet, load() falls back to the
+    JSON snapshot at legacy_json_path, so switching formats keeps the
+    resting orders.
+    """
+
+    # records come back in price-time priority
+    preserves_priority = True
+
+    def __init__(
+        self,
+        filepath: str = "storage/orders_snapshot.snap",
+        legacy_json_path: str = None
+    ):
+        """
+        Initialize the store.
+
+        Parameters:
+            filepath (str): Path of the binary snapshot.
+            legacy_json_path (str | None): JSON snapshot read when no
+                binary snapshot exists yet.
+        """
+        super().__init__(filepath=filepath)
+        self.legacy_json_path = legacy_json_path
+
+    def save(self, orders: List[Order], sequencer_state: dict = None, journal_seq: int = None):
+        """
+        Persist active orders, packing them straight from the Order
+        objects (no intermediate dicts).
+        """
+        active_orders = [
+            order for order in orders
+            if order.status in ("NEW", "PARTIALLY_FILLED")
+        ]
+        self._write_rows(map(attrgetter(*FIELDS), active_orders), sequencer_state, journal_seq)
+
+    def write_snapshot(self, records: List[dict], sequencer_state: dict = None, journal_seq: int = None):
+        """
+        Write serialized orders as the new binary snapshot.
+        """
+        self._write_rows(map(itemgetter(*FIELDS), records), sequencer_state, journal_seq)
+
+    def _write_rows(self, rows, sequencer_state: dict = None, journal_seq: int = None):
+        """
+        Pack rows of FIELDS values and replace the existing snapshot
+        atomically (temp file, fsync, rename).
+
+        Raises:
+            ValueError: if an order does not fit the record layout (the
+                existing snapshot is then left as it was)
+        """
+        strings = {}
+        string_table = []
+
+        def string_index(value):
+            if value is None:
+                return NO_STRING
+            value = str(value)
+            index = strings.get(value)
+            if index is None:
+                index = strings[value] = len(string_table)
+                string_table.append(value)
+            return index
+
+        side_codes = {side: code for code, side in enumerate(SIDES)}
+        order_type_codes = {order_type: code for code, order_type in enumerate(ORDER_TYPES)}
+        status_codes = {status: code for code, status in enumerate(STATUSES)}
+
+        pack = RECORD.pack
+        try:
+            body = [
+                pack(
+                    order_id,
+                    price,
+                    quantity,
+                    remaining_quantity,
+                    timestamp,
+                    string_index(client_id),
+                    string_index(user),
+                    string_index(symbol),
+                    side_codes[side],
+                    order_type_codes[order_type],
+                    status_codes[status]
+                )
+                for (
+                    order_id, price, quantity, remaining_quantity, timestamp,
+                    client_id, user, symbol, side, order_type, status
+                ) in rows
+            ]
+        except (struct.error, KeyError, TypeError) as e:
+            raise ValueError(
+                f"Order does not fit the binary snapshot format ({e!r}); "
+                f"{self.filepath} left unchanged"
+            ) from e
+
+        flags = 0
+        sequencer_state = sequencer_state or {}
+        if sequencer_state:
+            flags |= HAS_SEQUENCER
+        if journal_seq is not None:
+            flags |= HAS_JOURNAL_SEQ
+
+        header = HEADER.pack(
+            MAGIC,
+            VERSION,
+            flags,
+            len(string_table),
+            len(body),
+            journal_seq or 0,
+            sequencer_state.get("last_order_seq", 0),
+            sequencer_state.get("last_trade_seq", 0),
+            sequencer_state.get("prefix", 0)
+        )
+
+        table = []
+        for value in string_table:
+            try:
+                encoded = value.encode("utf-8")
+                table.append(STRING_LENGTH.pack(len(encoded)))
+            except (UnicodeEncodeError, struct.error) as e:
+                raise ValueError(
+                    f"String {value[:32]!r} does not fit the binary snapshot format ({e}); "
+                    f"{self.filepath} left unchanged"
+                ) from e
+            table.append(encoded)
+
+        directory = os.path.dirname(self.filepath)
+        if directory:
+            ensure_dir(directory)
+
+        tmp_path = self.filepath + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(header)
+                f.write(b"".join(table))
+                f.write(b"".join(body))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.filepath)
+        except BaseException:
+            # never leave a partial temp file behind
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load(self) -> List[Order]:
+        """
+        Load persisted orders, in price-time priority.
+
+        Sets sequencer_state and journal_seq like OrderStore.load().
+
+        Raises:
+            ValueError: if the file is not a snapshot of this format
+        """
+        self.sequencer_state = None
+        self.journal_seq = 0
+
+        if not os.path.exists(self.filepath):
+            return self._load_legacy_json()
+
+        with open(self.filepath, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return self._decode(mapped)
+
+    def _decode(self, mapped) -> List[Order]:
+        (
+            magic, version, flags, string_count, order_count,
+            journal_seq, last_order_seq, last_trade_seq, prefix
+        ) = HEADER.unpack_from(mapped, 0)
+
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.filepath} is not a version {VERSION} binary snapshot")
+
+        if flags & HAS_SEQUENCER:
+            self.sequencer_state = {
+                "prefix": prefix,
+                "last_order_seq": last_order_seq,
+                "last_trade_seq": last_trade_seq
+            }
+        if flags & HAS_JOURNAL_SEQ:
+            self.journal_seq = journal_seq
+
+        offset = HEADER.size
+        strings = []
+        for _ in range(string_count):
+            (length,) = STRING_LENGTH.unpack_from(mapped, offset)
+            offset += STRING_LENGTH.size
+            strings.append(sys.intern(mapped[offset:offset + length].decode("utf-8")))
+            offset += length
+
+        string_at = dict(enumerate(strings))
+        string_at[NO_STRING] = None
+
+        end = offset + order_count * RECORD.size
+        if end > len(mapped):
+            raise ValueError(f"{self.filepath} is truncated")
+
+        from_record = Order.from_record
+        orders = []
+        append = orders.append
+        for (
+            order_id, price, quantity, remaining_quantity, timestamp,
+            client_index, user_index, symbol_index, side, order_type, status
+        ) in RECORD.iter_unpack(mapped[offset:end]):
+            append(from_record(
+                order_id,
+                string_at[client_index],
+                string_at[user_index],
+                SIDES[side],
+                price,
+                quantity,
+                remaining_quantity,
+                timestamp,
+                ORDER_TYPES[order_type],
+                string_at[symbol_index],
+                STATUSES[status]
+            ))
+        return orders
+
+    def _load_legacy_json(self) -> List[Order]:
+        if not self.legacy_json_path or not os.path.exists(self.legacy_json_path):
+            return []
+
+        legacy_store = OrderStore(filepath=self.legacy_json_path)
+        orders = legacy_store.load()
+        self.sequencer_state = legacy_store.sequencer_state
+        self.journal_seq = legacy_store.journal_seq
+        # JSON snapshots may predate price-time ordered saves
+        orders.sort(key=lambda order: order.timestamp)
+        return orders
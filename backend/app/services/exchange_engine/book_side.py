@@ -0,0 +1,164 @@
+import bisect
+from itertools import groupby
+from operator import attrgetter
+
+from engine.price_level import PriceLevel
+
+
+class BookSide:
+    """
+    One side (BUY or SELL) of the order book, stored as a price ladder.
+
+    Each distinct price maps to a PriceLevel holding a FIFO queue of
+    orders. A sorted index of the active prices is kept alongside the
+    levels and is arranged so that the best price is always the last
+    element:
+        - BUY  : ascending  (highest bid last)
+        - SELL : descending (lowest ask last)
+
+    This makes reading and removing the best level O(1), while adding a
+    new price level costs O(log L) to locate plus a shift over L levels,
+    where L is the number of price levels (not the number of orders).
+    """
+
+    def __init__(self, side: str):
+        """
+        Initialize an empty book side.
+
+        Parameters:
+            side (str): "BUY" or "SELL"
+        """
+        if side not in ("BUY", "SELL"):
+            raise ValueError("Invalid side")
+
+        self.side = side
+        self.levels = {}
+        self._prices = []
+        self._sort_key = (lambda price: price) if side == "BUY" else (lambda price: -price)
+
+    def add(self, order) -> None:
+        """
+        Append an order to the back of its price level.
+        Creates the price level if it does not exist yet.
+        """
+        level = self.levels.get(order.price)
+
+        if level is None:
+            level = PriceLevel(order.price)
+            self.levels[order.price] = level
+            bisect.insort(self._prices, order.price, key=self._sort_key)
+
+        level.append(order)
+
+    def bulk_load(self, orders) -> None:
+        """
+        Build the ladder from many orders at once (snapshot restore).
+
+        Orders must come in time priority order. Runs of orders at the
+        same price (a whole level, for snapshots written level by level)
+        are appended to their level in one step, and the price index is
+        sorted once at the end instead of one insort per new level.
+        """
+        levels = self.levels
+        for price, run in groupby(orders, key=attrgetter("price")):
+            level = levels.get(price)
+            if level is None:
+                level = levels[price] = PriceLevel(price)
+            level.extend(run)
+
+        self._prices = sorted(levels, key=self._sort_key)
+
+    def best_level(self):
+        """
+        Return the PriceLevel with the best price, or None if empty.
+        """
+        if not self._prices:
+            return None
+        return self.levels[self._prices[-1]]
+
+    def best_price(self):
+        """
+        Return the best price on this side, or None if empty.
+        """
+        if not self._prices:
+            return None
+        return self._prices[-1]
+
+    def pop_best_level(self):
+        """
+        Remove and return the best price level.
+        """
+        price = self._prices.pop()
+        return self.levels.pop(price)
+
+    def remove_level(self, price) -> None:
+        """
+        Remove the level at the given price, wherever it sits in the ladder.
+        """
+        if price == self.best_price():
+            self.pop_best_level()
+            return
+
+        key = self._sort_key(price)
+        index = bisect.bisect_left(self._prices, key, key=self._sort_key)
+        del self._prices[index]
+        del self.levels[price]
+
+    def depth(self, levels: int) -> list:
+        """
+        Aggregated view of the best `levels` price levels.
+
+        Uses the running totals kept by each PriceLevel, so the cost is
+        O(levels) regardless of how many orders rest in the book.
+
+        Returns:
+            list[dict]: [{"price", "quantity", "orders"}, ...] best first
+        """
+        if levels <= 0:
+            return []
+
+        result = []
+        for price in reversed(self._prices[-levels:]):
+            level = self.levels[price]
+            result.append({
+                "price": price,
+                "quantity": level.total_quantity,
+                "orders": len(level)
+            })
+        return result
+
+    def iter_levels(self):
+        """
+        Iterate over price levels from best to worst price.
+        """
+        for price in reversed(self._prices):
+            yield self.levels[price]
+
+    def iter_orders(self):
+        """
+        Iterate over resting orders in price-time priority.
+        """
+        for level in self.iter_levels():
+            yield from level
+
+    def clear(self) -> None:
+        """
+        Drop every price level.
+        """
+        self.levels.clear()
+        self._prices.clear()
+
+    def is_empty(self) -> bool:
+        """
+        Check whether this side has no resting orders.
+        """
+        return not self._prices
+
+    def __len__(self) -> int:
+        """
+        Number of active price levels.
+        """
+        return len(self._prices)
+
+    def __repr__(self) -> str:
+        return f"BookSide(side={self.side!r}, levels={len(self._prices)})"
@@ -1,13 +1,35 @@
-import time
+import os
 from typing import Dict, List, Optional, Tuple
-import uuid
 import traceback
-from utils.time_utils import generate_timestamp
+from contextlib import contextmanager
+from utils.clock import SystemClock
 from engine.trade import Trade
 from engine.order import Order
-from utils.id_generators import generate_order_id
-from utils.logger import log_trade_server
+from utils.id_generators import IdSequencer
+from utils.logger import log_trades_server
 from engine.order_store import OrderStore
+from engine.binary_order_store import BinaryOrderStore
+from engine.orderbook import OrderBook
+from engine.instrument import Instrument, DEFAULT_SYMBOL, is_valid_symbol
+
+
+class _RecordedTradeIds:
+    """
+    Trade ID source of a book while a journal event is replayed: hands
+    out the IDs the event's trades got the first time, then falls back
+    to the shared sequencer if the replay produces more trades.
+    """
+
+    def __init__(self, trade_ids, id_sequencer):
+        self._trade_ids = iter(trade_ids)
+        self._id_sequencer = id_sequencer
+
+    def next_trade_id(self) -> int:
+        trade_id = next(self._trade_ids, None)
+        if trade_id is None:
+            return self._id_sequencer.next_trade_id()
+        return trade_id
+
 
 class ExchangeEngine:
     """
@@ -16,31 +38,119 @@ class ExchangeEngine:
     Responsibilities:
     - Validate incoming orders
     - Assign unique order IDs
-    - Route orders to the order book
+    - Route orders to the order book of their symbol
     - Generate trades
     - Produce client-facing responses
     - Emit execution events for logging / persistence
 
+    Symbols:
+    - Every order names a symbol (DEFAULT_SYMBOL if omitted).
+    - The engine keeps a registry of one OrderBook per symbol.
+      Books are created lazily on the first order for a symbol,
+      each with its own OrderStore snapshot file; the TradeWriter
+      partitions the ledger by the symbol of each trade.
+    - Books for different symbols share no mutable state, so callers
+      may serialize access per symbol instead of globally.
+
+    Recovery:
+    - With an OrderJournal, every accepted NEW order, CANCEL and AMEND
+      is journalled with its engine-assigned id and timestamp.
+    - start() restores the snapshots and replays the journal events
+      recorded after them through the matcher; stop() saves the
+      snapshots and checkpoints the journal, so the next recovery only
+      replays what happened since this snapshot.
+
     This class contains *business logic only*.
     No networking, no threading, no printing.
     """
 
-    def __init__(self, order_book=None, logger=None, trade_writer=None):
+    def __init__(
+        self,
+        order_book=None,
+        logger=None,
+        trade_writer=None,
+        instrument=None,
+        instruments=None,
+        snapshot_dir: str = "storage/snapshots",
+        id_sequencer=None,
+        clock=None,
+        journal=None,
+        snapshot_format: str = "json",
+        storage=None
+    ):
         """
         Initialize the exchange engine.
 
         Parameters:
             order_book:
                 Component responsible for storing and matching orders.
-                Must expose matching APIs (to be defined later).
+                Registered as the book of its own symbol
+                (DEFAULT_SYMBOL unless configured otherwise).
 
             logger:
                 Optional logger for audit trail and persistence.
+
+            instrument:
+                Reference data (tick size) for the default instrument.
+                All prices handled by the engine are integer ticks.
+                Symbols without their own Instrument inherit its tick size.
+
+            instruments:
+                Optional list of Instrument objects for other symbols.
+
+            snapshot_dir:
+                Directory holding the snapshot file of every lazily
+                created order book.
+
+            id_sequencer:
+                Source of order and trade IDs shared by every book.
+                Its high-water marks are saved with each book snapshot.
+
+            clock:
+                Source of integer-nanosecond timestamps shared by every
+                book. Defaults to wall-clock time; replays and backtests
+                pass a SimulatedClock.
+
+            journal:
+                Optional started OrderJournal used to recover the books
+                after a crash.
+
+            snapshot_format:
+                "json" or "binary": format of the snapshots of lazily
+                created books (see BinaryOrderStore).
+
+            storage:
+                Optional StorageBackend. Lazily created books then keep
+                their snapshot in it (a file snapshot in snapshot_dir,
+                in snapshot_format, is still read once if the backend
+                has none yet).
         """
-        self.order_book = order_book
+        if snapshot_format not in ("json", "binary"):
+            raise ValueError("snapshot_format must be 'json' or 'binary'")
+
         self.logger = logger
         self.trade_writer = trade_writer
-        self._order_id_counter = 0
+        self.instrument = instrument or Instrument()
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_format = snapshot_format
+        self.id_sequencer = id_sequencer or IdSequencer()
+        self.clock = clock or SystemClock()
+        self.journal = journal
+        self.storage = storage
+
+        # symbol -> Instrument
+        self.instruments = {self.instrument.symbol: self.instrument}
+        for item in instruments or []:
+            self.instruments[item.symbol] = item
+
+        # symbol -> OrderBook
+        self.order_books = {}
+        self.order_book = order_book
+        if order_book is not None:
+            order_book.id_sequencer = self.id_sequencer
+            order_book.clock = self.clock
+            self.order_books[order_book.symbol] = order_book
+
         self._running = False
 
     def start(self) -> None:
@@ -51,8 +161,15 @@ class ExchangeEngine:
         Useful for:
         - Loading persisted state
         - Initializing metrics
+
+        Only books registered up front are restored here; other
+        books restore their own snapshot on first use (an order,
+        or a cancel / amend / depth request, see find_order_book).
+        The journal tail is then replayed on top of the snapshots.
         """
-        self.order_book.restore()
+        for order_book in self.order_books.values():
+            order_book.restore()
+        self._replay_journal()
         self._running = True
 
     def stop(self) -> None:
@@ -62,9 +179,121 @@ class ExchangeEngine:
         Useful for:
         - Persisting order book state
         - Flushing logs
+
+        Once every book is saved the journal is checkpointed,
+        dropping the events the snapshots now cover.
+
+        A book that fails to save does not stop the others; the journal
+        is then left as it is (replay covers the unsaved book) and the
+        first error is raised.
         """
-        self.order_book.save()
         self._running = False
+        journal_seq = self.journal.last_seq if self.journal else None
+        errors = []
+        for order_book in self.order_books.values():
+            try:
+                order_book.save(journal_seq=journal_seq)
+            except Exception as e:
+                print(f"[ENGINE] Failed to save the {order_book.symbol} book: {e}")
+                errors.append(e)
+        if errors:
+            raise errors[0]
+        if self.journal:
+            self.journal.checkpoint(journal_seq)
+
+    def capture_snapshot(self, symbol: str = DEFAULT_SYMBOL):
+        """
+        Capture the book of a symbol for a background snapshot.
+
+        Must be called while holding the symbol's lock; the capture
+        records the journal position the snapshot will cover.
+        Write it with order_book.write_snapshot() outside the lock.
+
+        Returns:
+            dict | None: see OrderBook.capture_snapshot; None if the
+            symbol has no book or a capture is already in progress
+        """
+        order_book = self.order_books.get(symbol)
+        if order_book is None:
+            return None
+        journal_seq = self.journal.last_seq if self.journal else None
+        return order_book.capture_snapshot(journal_seq=journal_seq)
+
+    def get_order_book(self, symbol: str = DEFAULT_SYMBOL) -> OrderBook:
+        """
+        Return the order book of a symbol, creating it on first use.
+
+        A new book gets its own OrderStore snapshot file inside
+        snapshot_dir (or its own snapshot in the storage backend)
+        and is restored from it immediately, so resting
+        orders of symbols untouched since the last restart are loaded
+        only when the symbol trades again.
+        """
+        order_book = self.order_books.get(symbol)
+        if order_book is None:
+            order_book = self._load_order_book(symbol)
+            self.order_books[symbol] = order_book
+        return order_book
+
+    def find_order_book(self, symbol: str = DEFAULT_SYMBOL) -> Optional[OrderBook]:
+        """
+        Return the order book of a symbol for requests on resting
+        orders (cancel, amend, depth), or None if it has none.
+
+        A book not registered yet is restored from its snapshot like
+        in get_order_book(), but only registered if orders rest in it:
+        looking up an unknown symbol creates no book (and no snapshot).
+        """
+        order_book = self.order_books.get(symbol)
+        if order_book is not None:
+            return order_book
+
+        if not is_valid_symbol(symbol):
+            return None
+
+        order_book = self._load_order_book(symbol)
+        if not order_book.order_index:
+            return None
+        self.order_books[symbol] = order_book
+        return order_book
+
+    def _load_order_book(self, symbol: str) -> OrderBook:
+        """
+        Create the book of a symbol and restore it from its snapshot.
+        """
+        json_path = os.path.join(self.snapshot_dir, f"orders_{symbol}.json")
+        if self.snapshot_format == "binary":
+            order_store = BinaryOrderStore(
+                filepath=os.path.join(self.snapshot_dir, f"orders_{symbol}.snap"),
+                legacy_json_path=json_path
+            )
+        else:
+            order_store = OrderStore(filepath=json_path)
+        if self.storage is not None:
+            order_store = self.storage.order_store(symbol, legacy_store=order_store)
+        order_book = OrderBook(
+            order_store=order_store,
+            symbol=symbol,
+            id_sequencer=self.id_sequencer,
+            clock=self.clock
+        )
+        order_book.restore()
+        return order_book
+
+    def instrument_for(self, symbol: str = DEFAULT_SYMBOL) -> Instrument:
+        """
+        Return the instrument of a symbol.
+
+        Unknown symbols get an Instrument with the default tick size;
+        it is only kept once the symbol has an order book, so lookups
+        of symbols that never trade leave nothing behind.
+        """
+        instrument = self.instruments.get(symbol)
+        if instrument is None:
+            instrument = Instrument(symbol=symbol, tick_size=self.instrument.tick_size)
+            if symbol in self.order_books:
+                self.instruments[symbol] = instrument
+        return instrument
         
 
     def place_order(self, incoming_order: Dict) -> Dict:
@@ -90,7 +319,7 @@ class ExchangeEngine:
                     "order_id": int | None,
                     "trades": list,
                     "remaining_quantity": int,
-                    "timestamp": float,
+                    "timestamp": int,
                     "message": str
                 }
         """
@@ -103,22 +332,19 @@ class ExchangeEngine:
             self._validate_order(incoming_order)
 
             # 2. Assign order ID and timestamp
-            order_id = generate_order_id()
+            order_id = self._generate_order_id()
             # print(f"this is the actual assigned: {order_id}")
-            timestamp = time.time()
+            timestamp = self.clock.now_ns()
 
             # Copy order to avoid mutating client input
-            order = dict(incoming_order)
-            order["order_id"] = order_id
-            order["timestamp"] = timestamp
-            order["remaining_quantity"] = order["quantity"]
+            order = self._prepare_order(incoming_order, order_id, timestamp)
 
             # 3. Process order via order book
             trades, remaining_quantity = self._process_order(order)
+            self._journal_new_orders([order], [trades])
             
             # 4. Log the trades in the system.
-            for trade in trades:
-                log_trade_server(trade)
+            log_trades_server(trades)
 
             # 5. Emit execution / audit event
             self._emit_order_event(order, trades, remaining_quantity)
@@ -133,7 +359,406 @@ class ExchangeEngine:
             traceback.print_exc()
             raise
 
-    
+    def place_orders(self, incoming_orders: List[Dict]) -> List[Dict]:
+        """
+        Batch entry point: place many client orders in one call.
+
+        Per-order work is done once per batch instead:
+            1. Validate every order up front
+            2. Reserve one block of order IDs for the valid orders
+            3. Use a single timestamp for the whole batch
+               (arrival order inside the batch is preserved by
+               processing the orders in list order)
+            4. Match the orders one after another
+            5. Hand all trades of the batch to the TradeWriter at once
+
+        Invalid orders do not abort the batch; they get an error
+        response (accepted = False) in their slot.
+
+        Parameters:
+            incoming_orders (list[dict]): Raw orders from clients.
+
+        Returns:
+            list[dict]: One response per order, in the same order.
+        """
+        self._assert_engine_running()
+
+        responses: List[Optional[Dict]] = [None] * len(incoming_orders)
+        valid_indexes = []
+
+        # 1. Validate all orders
+        for index, incoming_order in enumerate(incoming_orders):
+            try:
+                self._validate_order(incoming_order)
+                valid_indexes.append(index)
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                error_order = incoming_order if isinstance(incoming_order, dict) else {}
+                responses[index] = self._build_error_response(error_order, str(e))
+
+        # 2. + 3. One block of IDs and one timestamp
+        order_ids = self.id_sequencer.next_order_ids(len(valid_indexes))
+        timestamp = self.clock.now_ns()
+
+        orders = [
+            self._prepare_order(incoming_orders[index], order_id, timestamp)
+            for index, order_id in zip(valid_indexes, order_ids)
+        ]
+
+        batch_trades = []
+        matched_orders = []
+        matched_trades = []
+
+        # 4. Match in arrival order
+        for index, order in zip(valid_indexes, orders):
+            order_id = order["order_id"]
+
+            try:
+                trades, remaining_quantity = self._process_order(order)
+            except Exception as e:
+                responses[index] = self._build_error_response(order, str(e))
+                continue
+
+            batch_trades.extend(trades)
+            matched_orders.append(order)
+            matched_trades.append(trades)
+            responses[index] = self._build_success_response(
+                order_id=order_id,
+                trades=trades,
+                remaining_quantity=remaining_quantity,
+                timestamp=timestamp
+            )
+
+        self._journal_new_orders(matched_orders, matched_trades)
+        log_trades_server(batch_trades)
+
+        # 5. Single hand-off to the trade writer
+        if self.trade_writer and batch_trades:
+            self.trade_writer.enqueue_trades(batch_trades)
+
+        return responses
+
+    def cancel_order(self, order_id, symbol: str = DEFAULT_SYMBOL) -> Dict:
+        """
+        Cancel a resting order.
+
+        Parameters:
+            order_id (int): Engine-assigned id of the order to cancel.
+            symbol (str): Symbol the order rests on.
+
+        Raises:
+            ValueError: if no resting order has this id
+
+        Returns:
+            dict:
+                {
+                    "accepted": bool,
+                    "order_id": int,
+                    "trades": list,
+                    "remaining_quantity": int,
+                    "cancelled_quantity": int,
+                    "status": "CANCELLED",
+                    "timestamp": int,
+                    "message": str
+                }
+        """
+        self._assert_engine_running()
+
+        order_book = self.find_order_book(symbol)
+        order = order_book.cancel_order(order_id) if order_book else None
+        if order is None:
+            raise ValueError(f"No resting order with id {order_id}")
+
+        if self.journal:
+            self.journal.record({"type": "CANCEL", "symbol": symbol, "order_id": order_id})
+
+        return {
+            "accepted": True,
+            "order_id": order_id,
+            "trades": [],
+            "remaining_quantity": 0,
+            "cancelled_quantity": order.remaining_quantity,
+            "status": order.status,
+            "timestamp": self.clock.now_ns(),
+            "message": "Order cancelled"
+        }
+
+    def amend_order(
+        self,
+        order_id,
+        new_quantity: Optional[int] = None,
+        new_price=None,
+        symbol: str = DEFAULT_SYMBOL
+    ) -> Dict:
+        """
+        Amend the quantity and/or price of a resting order.
+
+        A quantity reduction keeps the order's time priority.
+        A price change or quantity increase re-queues the order
+        and may execute immediately if the new price crosses the book.
+
+        Parameters:
+            order_id (int): Engine-assigned id of the order to amend.
+            new_quantity (int | None): New total quantity of the order.
+            new_price (int | None): New limit price in ticks.
+            symbol (str): Symbol the order rests on.
+
+        Raises:
+            ValueError: if the amendment is invalid or the order is unknown
+
+        Returns:
+            dict: Same shape as the place_order response.
+        """
+        self._assert_engine_running()
+
+        if new_quantity is None and new_price is None:
+            raise ValueError("Amend requires a new quantity or a new price")
+
+        if new_quantity is not None and not self._is_positive_int(new_quantity):
+            raise ValueError("Quantity must be a positive integer")
+
+        if new_price is not None and not self._is_positive_int(new_price):
+            raise ValueError("Price must be a positive number of ticks")
+
+        order_book = self.find_order_book(symbol)
+        if order_book is None:
+            raise ValueError(f"No resting order with id {order_id}")
+
+        timestamp = self.clock.now_ns()
+        order, trades = order_book.amend_order(
+            order_id,
+            new_quantity=new_quantity,
+            new_price=new_price,
+            timestamp=timestamp
+        )
+        if order is None:
+            raise ValueError(f"No resting order with id {order_id}")
+
+        if self.journal:
+            self.journal.record({
+                "type": "AMEND",
+                "symbol": symbol,
+                "order_id": order_id,
+                "new_quantity": new_quantity,
+                "new_price": new_price,
+                "timestamp": timestamp,
+                "trade_ids": [trade.trade_id for trade in trades]
+            })
+
+        log_trades_server(trades)
+
+        self._emit_order_event(order.to_dict(), trades, order.remaining_quantity)
+
+        response = self._build_success_response(
+            order_id=order_id,
+            trades=trades,
+            remaining_quantity=order.remaining_quantity
+        )
+        if not trades:
+            response["message"] = "Order amended"
+        return response
+
+    def get_depth(self, symbol: str = DEFAULT_SYMBOL, levels: int = 5) -> Dict:
+        """
+        Top of book and aggregated depth for a symbol.
+
+        Prices are in ticks. Symbols with no resting orders report an
+        empty book instead of creating one.
+
+        Returns:
+            dict:
+                {
+                    "symbol": str,
+                    "best_bid": int | None,
+                    "best_ask": int | None,
+                    "spread": int | None,
+                    "bids": [{"price", "quantity", "orders"}, ...],
+                    "asks": [{"price", "quantity", "orders"}, ...]
+                }
+        """
+        order_book = self.find_order_book(symbol)
+        if order_book is None:
+            return {
+                "symbol": symbol,
+                "best_bid": None,
+                "best_ask": None,
+                "spread": None,
+                "bids": [],
+                "asks": []
+            }
+
+        depth = order_book.depth(levels)
+        depth["best_bid"] = order_book.best_bid()
+        depth["best_ask"] = order_book.best_ask()
+        depth["spread"] = order_book.spread()
+        return depth
+
+    def _prepare_order(self, incoming_order: Dict, order_id, timestamp) -> Dict:
+        """
+        Copy a validated client order and stamp engine-assigned fields.
+        The client input is never mutated.
+
+        order_id, timestamp, remaining_quantity and status are always
+        the engine's: a client-supplied status (e.g. "CANCELLED") would
+        otherwise rest as a tombstone the price level never counted.
+        """
+        order = dict(incoming_order)
+        order["order_id"] = order_id
+        order["timestamp"] = timestamp
+        order["remaining_quantity"] = order["quantity"]
+        order["status"] = "NEW"
+        order["symbol"] = incoming_order.get("symbol", DEFAULT_SYMBOL)
+        if order["order_type"] == "MARKET":
+            # market orders never rest, so they carry no price
+            order["price"] = None
+        return order
+
+    def _journal_new_orders(self, orders: List[Dict], trades: List[List[Trade]]) -> None:
+        """
+        Journal matched orders, before their trades go to the TradeWriter.
+
+        Each event carries the IDs of the trades its order produced, so
+        a replay gives them back the same IDs (the sequencer is shared
+        by every book, so they cannot be derived from the order).
+
+        Parameters:
+            orders (list[dict]): Prepared orders, in matching order.
+            trades (list[list[Trade]]): Trades of each order.
+        """
+        if not self.journal or not orders:
+            return
+        self.journal.record_many([
+            {
+                "type": "NEW",
+                "symbol": order["symbol"],
+                "order": order,
+                "trade_ids": [trade.trade_id for trade in order_trades]
+            }
+            for order, order_trades in zip(orders, trades)
+        ])
+
+    def _replay_journal(self) -> None:
+        """
+        Re-apply journalled events newer than the snapshot of their book.
+
+        Events go straight to the order books, in seq order, so nothing
+        is journalled or logged again. Replayed orders keep their
+        journalled order IDs and their trades the journalled trade IDs.
+
+        Trades the ledger does not have yet (the process stopped after
+        journalling an order but before its trades were committed) are
+        sent to the TradeWriter again, see _persist_replayed_trades().
+
+        An event that fails to apply is reported and skipped.
+        """
+        if not self.journal:
+            return
+
+        replayed = 0
+        replayed_trades = []
+        for event in self.journal.replay():
+            order_book = self.get_order_book(event["symbol"])
+            if event["seq"] <= order_book.journal_seq:
+                continue
+
+            try:
+                replayed_trades.extend(self._apply_journal_event(order_book, event))
+            except (ValueError, KeyError) as e:
+                print(f"[ENGINE] Skipped journal event {event['seq']}: {e}")
+            order_book.journal_seq = event["seq"]
+            replayed += 1
+
+        if replayed:
+            print(f"[ENGINE] Replayed {replayed} journal events")
+
+        self._persist_replayed_trades(replayed_trades)
+
+    def _apply_journal_event(self, order_book: OrderBook, event: Dict) -> List[Trade]:
+        """
+        Apply one journal event to its book.
+
+        Returns:
+            list[Trade]: trades produced with their journalled IDs (empty
+            for events journalled without trade IDs)
+        """
+        event_type = event["type"]
+
+        if event_type == "NEW":
+            order = event["order"]
+            self.id_sequencer.restore({
+                "last_order_seq": order["order_id"] & IdSequencer.MAX_SEQUENCE
+            })
+            with self._recorded_trade_ids(order_book, event):
+                trades, _ = self._process_order(order)
+
+        elif event_type == "CANCEL":
+            order_book.cancel_order(event["order_id"])
+            trades = []
+
+        elif event_type == "AMEND":
+            with self._recorded_trade_ids(order_book, event):
+                _, trades = order_book.amend_order(
+                    event["order_id"],
+                    new_quantity=event["new_quantity"],
+                    new_price=event["new_price"],
+                    timestamp=event["timestamp"]
+                )
+
+        else:
+            raise ValueError(f"Unknown journal event type {event_type}")
+
+        return trades if "trade_ids" in event else []
+
+    @contextmanager
+    def _recorded_trade_ids(self, order_book: OrderBook, event: Dict):
+        """
+        Let a book re-match a journal event with the trade IDs it got
+        the first time, then move the sequencer past them.
+        """
+        trade_ids = event.get("trade_ids")
+        if trade_ids is None:
+            # journalled by an older version: fresh IDs
+            yield
+            return
+
+        order_book.id_sequencer = _RecordedTradeIds(trade_ids, self.id_sequencer)
+        try:
+            yield
+        finally:
+            order_book.id_sequencer = self.id_sequencer
+
+        if trade_ids:
+            self.id_sequencer.restore({
+                "last_trade_seq": max(trade_ids) & IdSequencer.MAX_SEQUENCE
+            })
+
+    def _persist_replayed_trades(self, trades: List[Trade]) -> None:
+        """
+        Send replayed trades above the last committed one to the TradeWriter.
+
+        Trades of a symbol are committed in order, so the ledger holds a
+        prefix of them: walking back from the newest replayed trade, the
+        first one found in the ledger is the last committed one.
+        """
+        if not self.trade_writer or not trades:
+            return
+
+        trades_by_symbol = {}
+        for trade in trades:
+            trades_by_symbol.setdefault(trade.symbol, []).append(trade)
+
+        missing = []
+        for symbol, symbol_trades in trades_by_symbol.items():
+            reader = self.trade_writer.reader(symbol)
+            committed = len(symbol_trades)
+            while committed and reader.get_trade(symbol_trades[committed - 1].trade_id) is None:
+                committed -= 1
+            missing.extend(symbol_trades[committed:])
+
+        if missing:
+            missing.sort(key=lambda trade: trade.trade_id)
+            self.trade_writer.enqueue_trades(missing)
+            print(f"[ENGINE] Re-persisted {len(missing)} replayed trades missing from the ledger")
+
     def _pre_process_order(self, incoming_order: Dict) -> Order:
         return Order.from_dict(incoming_order)
         
@@ -154,11 +779,12 @@ class ExchangeEngine:
         
         # Create Order ONCE
         order = self._pre_process_order(incoming_order)
+        order_book = self.get_order_book(order.symbol)
 
         if incoming_order["order_type"] == "LIMIT":
-            trades = self.order_book.process_limit_orders(order)
+            trades = order_book.process_limit_orders(order)
         else:
-            trades = self.order_book.process_market_orders(order)
+            trades = order_book.process_market_orders(order)
 
         # IMPORTANT: read from Order object
         remaining_quantity = order.remaining_quantity
@@ -180,14 +806,28 @@ class ExchangeEngine:
         if missing:
             raise ValueError(f"Missing fields: {missing}")
 
+        symbol = order.get("symbol", DEFAULT_SYMBOL)
+        if not is_valid_symbol(symbol):
+            raise ValueError("Invalid symbol")
+
         if order["side"] not in ("BUY", "SELL"):
             raise ValueError("Invalid side")
 
-        if order["quantity"] <= 0:
-            raise ValueError("Quantity must be positive")
+        # snapshots and the binary protocol store quantities as integers
+        if not self._is_positive_int(order["quantity"]):
+            raise ValueError("Quantity must be a positive integer")
+
+        if order["order_type"] == "LIMIT":
+            if "price" not in order:
+                raise ValueError("LIMIT order requires price")
+
+            if not self._is_positive_int(order["price"]):
+                raise ValueError("LIMIT price must be a positive number of ticks")
 
-        if order["order_type"] == "LIMIT" and "price" not in order:
-            raise ValueError("LIMIT order requires price")
+    @staticmethod
+    def _is_positive_int(value) -> bool:
+        # bool is an int subclass, but True is not a quantity
+        return isinstance(value, int) and not isinstance(value, bool) and value > 0
 
 
     def _assert_engine_running(self) -> None:
@@ -199,19 +839,20 @@ class ExchangeEngine:
 
     def _generate_order_id(self) -> int:
         """
-        Generate a unique order ID.
+        Generate a unique order ID from the engine's sequencer.
 
         Returns:
             int
         """
-        return uuid.uuid4().int
+        return self.id_sequencer.next_order_id()
         
 
     def _build_success_response(
         self,
         order_id,
         trades: List[Dict],
-        remaining_quantity: int
+        remaining_quantity: int,
+        timestamp: Optional[int] = None
     ) -> Dict:
         """
         Build a success response for client.
@@ -221,7 +862,7 @@ class ExchangeEngine:
             "order_id": order_id,
             "trades": [t.to_dict() for t in trades],
             "remaining_quantity": remaining_quantity,
-            "timestamp": time.time(),
+            "timestamp": timestamp if timestamp is not None else self.clock.now_ns(),
             "message": self._execution_message(trades, remaining_quantity)
         }
 
@@ -234,7 +875,7 @@ class ExchangeEngine:
             "order_id": None,
             "trades": [],
             "remaining_quantity": incoming_order.get("quantity", 0),
-            "timestamp": time.time(),
+            "timestamp": self.clock.now_ns(),
             "message": error
         }
 
@@ -270,20 +911,3 @@ class ExchangeEngine:
         for trade in trades:
             
             self.trade_writer.enqueue_trade(trade)
-
-
-    def snapshot_state(self) -> Dict:
-        """
-        Return serializable snapshot of engine state.
-        """
-        return {
-            "order_book": self.order_book.snapshot()
-        }
-
-
-
-    def restore_state(self, snapshot: Dict) -> None:
-        """
-        Restore engine state from snapshot.
-        """
-        self.order_book.restore(snapshot["order_book"])
\ No newline at end of file
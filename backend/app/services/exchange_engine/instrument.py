@@ -0,0 +1,81 @@
+import re
+from decimal import Decimal, InvalidOperation
+
+# Symbol used for orders that do not name an instrument.
+DEFAULT_SYMBOL = "DEFAULT"
+
+# Symbols name snapshot and ledger files, so keep them filesystem-safe.
+SYMBOL_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,32}")
+
+
+def is_valid_symbol(symbol) -> bool:
+    """
+    Return True if symbol is a string matching SYMBOL_PATTERN.
+    """
+    return isinstance(symbol, str) and SYMBOL_PATTERN.fullmatch(symbol) is not None
+
+
+class Instrument:
+    """
+    Static reference data for a tradable instrument.
+
+    Inside the engine every price is an integer number of ticks.
+    Orders, trades and the order book never see decimal prices;
+    conversion happens only at the networking boundary using
+    to_ticks() and to_price().
+
+    The default tick size of 1 keeps the existing behaviour where
+    clients submit whole-number prices (ticks == price).
+    """
+
+    def __init__(self, symbol: str = DEFAULT_SYMBOL, tick_size=1):
+        """
+        Initialize the instrument.
+
+        Parameters:
+            symbol (str): Ticker the instrument trades under.
+            tick_size (int | float | str): Smallest allowed price increment.
+        """
+        tick = Decimal(str(tick_size))
+        if tick <= 0:
+            raise ValueError("Tick size must be positive")
+
+        self.symbol = symbol
+        self.tick_size = tick_size
+        self._tick = tick
+        self._integral_tick = tick == tick.to_integral_value()
+        # number of decimal places needed to print a price exactly
+        self._decimals = max(0, -tick.normalize().as_tuple().exponent)
+
+    def to_ticks(self, price) -> int:
+        """
+        Convert a client price into an integer number of ticks.
+
+        Raises:
+            ValueError: if the price is not a finite number or not a
+                multiple of the tick size
+        """
+        if isinstance(price, bool) or not isinstance(price, (int, float, str, Decimal)):
+            raise ValueError(f"Invalid price {price!r}")
+        try:
+            value = Decimal(str(price))
+            if not value.is_finite():
+                raise InvalidOperation
+            ticks, rest = divmod(value, self._tick)
+        except InvalidOperation:
+            # non-numeric strings, NaN, infinities, absurd exponents
+            raise ValueError(f"Invalid price {price!r}") from None
+        if rest:
+            raise ValueError(f"Price {price} is not a multiple of tick size {self.tick_size}")
+        return int(ticks)
+
+    def to_price(self, ticks: int):
+        """
+        Convert an integer number of ticks back into a client price.
+        """
+        if self._integral_tick:
+            return ticks * int(self._tick)
+        return round(ticks * float(self._tick), self._decimals)
+
+    def __repr__(self) -> str:
+        return f"Instrument(symbol={self.symbol!r}, tick_size={self.tick_size})"
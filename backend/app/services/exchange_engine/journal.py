@@ -0,0 +1,331 @@
+import os
+import queue
+import re
+import threading
+import time
+
+from utils.file_io import *
+from utils.serialization import *
+
+
+# journal_<first seq, zero padded>.jsonl
+SEGMENT_PATTERN = re.compile(r"journal_(\d{20})\.jsonl")
+
+
+class OrderJournal:
+    """
+    Write-ahead journal of the events that change order book state.
+
+    Every accepted NEW order, CANCEL and AMEND is recorded as one
+    sequenced event in the same critical section as its effect on the
+    book, before its trades are handed to the TradeWriter. After a
+    crash the engine loads the last snapshot and replays the journal
+    tail through the matcher, which rebuilds exactly the same books.
+
+    Events:
+    - JSON dicts with "seq" (1, 2, 3, ...), "type" and "symbol" plus the
+      fields needed to repeat the operation, including the engine
+      assigned order_id and timestamp (and, for NEW and AMEND, the
+      trade_ids of the trades it produced).
+    - Sequence numbers are assigned and queued under one lock, so the
+      queue (and the file) is always in seq order.
+
+    Storage:
+    - Newline-delimited JSON split into segments named after the seq of
+      their first event (journal_00000000000000000001.jsonl).
+    - A new segment is started on every start() and every checkpoint(),
+      so a torn last line after a crash is never appended to.
+    - checkpoint(seq) drops the segments fully covered by a snapshot;
+      recovery reads only the tail written since the last snapshot.
+      The highest seq ever written is kept in checkpoint.json, so
+      numbering continues after every segment has been dropped.
+
+    Writing is done by a background thread which drains what is queued
+    (up to max_batch_size events), writes it with one call and applies fsync_policy
+    ("never", "batch" or "interval", as for the TradeWriter).
+    """
+
+    FSYNC_POLICIES = ("never", "batch", "interval")
+
+    def __init__(
+        self,
+        journal_dir: str = "storage/journal",
+        fsync_policy: str = "batch",
+        fsync_interval_ms: float = 50.0,
+        max_batch_size: int = 1000
+    ):
+        """
+        Initialize the journal.
+
+        Parameters:
+            journal_dir (str): Directory holding the journal segments.
+            fsync_policy (str): "never", "batch" or "interval".
+            fsync_interval_ms (float): fsync period for the "interval" policy.
+            max_batch_size (int): Most events written per call; bounds
+                the time a single write holds the interpreter.
+        """
+        if fsync_policy not in self.FSYNC_POLICIES:
+            raise ValueError(f"fsync_policy must be one of {self.FSYNC_POLICIES}")
+
+        self.journal_dir = journal_dir
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval_ms / 1000
+        self.max_batch_size = max_batch_size
+
+        # seq of the last recorded event
+        self.last_seq = 0
+        # [first_seq, last_seq, path] of every segment on disk, oldest first
+        self._segments = []
+        # segment being appended to, owned by the writer thread
+        self._segment_file = None
+        self._unsynced = False
+        self._last_fsync = time.monotonic()
+
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """
+        Scan existing segments and start the background writer.
+
+        Must be called before the engine replays or records events.
+        """
+        if self._running:
+            return
+
+        ensure_dir(self.journal_dir)
+        checkpoint = load_json(self._checkpoint_path())
+        if isinstance(checkpoint, dict):
+            self.last_seq = max(self.last_seq, checkpoint.get("last_seq", 0))
+
+        self._segments = self._scan_segments()
+        if self._segments:
+            self.last_seq = max(self.last_seq, self._segments[-1][1])
+
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._writer_loop,
+            name="OrderJournalThread",
+            daemon=True
+        )
+        self._thread.start()
+
+    def record(self, event: dict) -> int:
+        """
+        Assign the next sequence number to an event and queue it.
+
+        This method MUST be non-blocking.
+
+        Returns:
+            int: seq of the event
+        """
+        if not self._running:
+            raise RuntimeError("OrderJournal Thread is not running")
+
+        with self._lock:
+            self.last_seq += 1
+            event["seq"] = self.last_seq
+            self._queue.put(event)
+        return event["seq"]
+
+    def record_many(self, events: list) -> None:
+        """
+        Record a batch of events with consecutive sequence numbers,
+        as a single queue item.
+        """
+        if not self._running:
+            raise RuntimeError("OrderJournal Thread is not running")
+        if not events:
+            return
+
+        with self._lock:
+            for event in events:
+                self.last_seq += 1
+                event["seq"] = self.last_seq
+            self._queue.put(list(events))
+
+    def checkpoint(self, seq: int) -> None:
+        """
+        Declare every event up to seq covered by a durable snapshot.
+
+        The writer closes the current segment and deletes the segments
+        whose events are all <= seq. Events after seq are kept.
+        """
+        if not self._running:
+            return
+        self._queue.put(("CHECKPOINT", seq))
+
+    def replay(self, after_seq: int = 0):
+        """
+        Iterate over journalled events with seq > after_seq, in order.
+
+        Reads the segments found by start(); call before recording
+        new events.
+        """
+        for first_seq, last_seq, path in list(self._segments):
+            if last_seq <= after_seq:
+                continue
+            for event in iter_jsonl(path):
+                if event.get("seq", 0) > after_seq:
+                    yield event
+
+    def _scan_segments(self) -> list:
+        segments = []
+        for name in sorted(os.listdir(self.journal_dir)):
+            match = SEGMENT_PATTERN.fullmatch(name)
+            if not match:
+                continue
+
+            path = os.path.join(self.journal_dir, name)
+            first_seq = int(match.group(1))
+            last_seq = first_seq - 1
+            for event in iter_jsonl(path):
+                last_seq = max(last_seq, event.get("seq", 0))
+
+            if last_seq < first_seq:
+                # nothing readable in it
+                os.remove(path)
+                continue
+            segments.append([first_seq, last_seq, path])
+        return segments
+
+    def _writer_loop(self):
+        """
+        Background worker loop: one write (and fsync, per policy) for
+        everything queued since the last pass.
+        """
+        while self._running or not self._queue.empty():
+
+            try:
+                item = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                self._maybe_fsync()
+                continue
+
+            items = [item]
+            event_count = self._item_size(item)
+            while event_count < self.max_batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                items.append(item)
+                event_count += self._item_size(item)
+
+            try:
+                self._commit(items)
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+        self._fsync()
+        self._close_segment()
+
+    @staticmethod
+    def _item_size(item) -> int:
+        return len(item) if isinstance(item, list) else 1
+
+    def _commit(self, items: list) -> None:
+        lines = []
+
+        for item in items:
+            if isinstance(item, tuple):
+                # a checkpoint splits the batch: write what came before it
+                self._write_lines(lines)
+                lines = []
+                self._apply_checkpoint(item[1])
+                continue
+
+            events = item if isinstance(item, list) else [item]
+            for event in events:
+                if self._segment_file is None and not lines:
+                    self._open_segment(event["seq"])
+                lines.append(encode_jsonl(event))
+                self._segments[-1][1] = event["seq"]
+
+        self._write_lines(lines)
+
+    def _write_lines(self, lines: list) -> None:
+        if not lines:
+            return
+
+        self._segment_file.write("".join(lines))
+        self._segment_file.flush()
+        self._unsynced = True
+
+        if self.fsync_policy == "batch":
+            self._fsync()
+        else:
+            self._maybe_fsync()
+
+    def _open_segment(self, first_seq: int) -> None:
+        path = os.path.join(self.journal_dir, f"journal_{first_seq:020d}.jsonl")
+        self._segment_file = open(path, "a")
+        self._segments.append([first_seq, first_seq - 1, path])
+
+    def _close_segment(self) -> None:
+        if self._segment_file is not None:
+            self._segment_file.close()
+            self._segment_file = None
+
+    def _checkpoint_path(self) -> str:
+        return os.path.join(self.journal_dir, "checkpoint.json")
+
+    def _apply_checkpoint(self, seq: int) -> None:
+        self._fsync()
+        self._close_segment()
+
+        last_seq = max([seq] + [segment[1] for segment in self._segments])
+        tmp_path = self._checkpoint_path() + ".tmp"
+        save_json(tmp_path, {"checkpoint_seq": seq, "last_seq": last_seq})
+        os.replace(tmp_path, self._checkpoint_path())
+
+        kept = []
+        for segment in self._segments:
+            if segment[1] <= seq:
+                os.remove(segment[2])
+            else:
+                kept.append(segment)
+        self._segments = kept
+
+    def _maybe_fsync(self) -> None:
+        if self.fsync_policy != "interval" or not self._unsynced:
+            return
+        if time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self._fsync()
+
+    def _fsync(self) -> None:
+        if not self._unsynced or self._segment_file is None:
+            return
+        if self.fsync_policy != "never":
+            os.fsync(self._segment_file.fileno())
+            self._last_fsync = time.monotonic()
+        self._unsynced = False
+
+    def flush(self):
+        """
+        Block until every recorded event has been written.
+        """
+        self._queue.join()
+
+    def stop(self):
+        """
+        Stop the background writer gracefully.
+        """
+        if not self._running:
+            return
+
+        self._running = False
+        self.flush()
+
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def is_running(self) -> bool:
+        """
+        Check whether the journal is currently active.
+        """
+        return self._running
@@ -0,0 +1,496 @@
+import bisect
+import json
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+
+from engine.segmented_ledger import COMPRESS_BLOCK_BYTES, SegmentedLedger
+from utils.time_utils import to_timestamp_ns
+
+
+# record positions are (segment << SEGMENT_SHIFT) | offset in segment
+SEGMENT_SHIFT = 40
+OFFSET_MASK = (1 << SEGMENT_SHIFT) - 1
+
+
+class LedgerReader:
+    """
+    Indexed, read-only view of one trade ledger partition
+    (newline-delimited JSON written by the TradeWriter), across all of
+    its segments (see SegmentedLedger).
+
+    The active segment is memory-mapped; sealed segments are read in
+    blocks of COMPRESS_BLOCK_BYTES (one gzip member each once compressed,
+    see SegmentedLedger.read_block) and the last BLOCK_CACHE blocks kept,
+    so a lookup in an old segment decompresses a block, not the segment.
+    Every segment is indexed once; afterwards only the records a
+    query returns are parsed. Index entries are positions
+    (segment << SEGMENT_SHIFT | offset), which stay valid when a
+    segment is sealed or compressed.
+
+    Indexes (built incrementally, so new trades cost only their own
+    bytes to index):
+    - sparse trade_id index: (trade_id, position) of every INDEX_STRIDE-th
+      record; a lookup bisects it and scans at most INDEX_STRIDE lines
+    - sparse timestamp index: same, by trade timestamp
+    - client index: positions of every trade of each client (buy or sell
+      side), oldest first
+
+    The sparse indexes rely on the ledger being in trade_id and
+    timestamp order, which holds for one partition: trades of a symbol
+    are produced under its lock and written in queue order. Ledgers
+    migrated from the old JSON-array format break it (random trade IDs,
+    possibly unordered timestamps), so:
+    - only records whose trade_id exceeds every earlier one enter the
+      sparse trade_id index; the others are indexed exactly by id
+    - while any timestamp is below an earlier one, time scans read the
+      whole ledger instead of seeking
+    - the scan cursor resumes after the cursor trade's position
+
+    Every query first picks up trades appended since the last query
+    (refresh()), so the reader can stay open while the writer runs.
+    Query cost depends on the size of the answer, not of the ledger.
+
+    Thread-safe.
+    """
+
+    INDEX_STRIDE = 64
+    BLOCK_CACHE = 64
+
+    def __init__(self, ledger_path: str):
+        """
+        Initialize the reader.
+
+        Parameters:
+            ledger_path (str): Ledger partition file (.jsonl).
+        """
+        self.ledger_path = ledger_path
+        self._ledger = SegmentedLedger(ledger_path)
+
+        # segment being indexed (the active one once caught up)
+        self._segment = 1
+        # handle / map of that segment, kept across its rotation
+        self._file = None
+        self._map = None
+        # end of the last complete line indexed in self._segment
+        self._indexed_end = 0
+        # sealed segment -> manifest entry / indexed length
+        self._entries = {}
+        self._ends = {}
+        # (sealed segment, block) -> content, least recently used first
+        self._sealed_blocks = OrderedDict()
+        # last manifest read and the (inode, mtime, size) it was read at
+        self._manifest = None
+        self._manifest_stat = None
+        self._count = 0
+
+        self._id_keys = []
+        self._id_offsets = array("q")
+        self._time_keys = []
+        self._time_offsets = array("q")
+        # trade_ids in increasing order so far / highest trade_id
+        self._ordered_ids = 0
+        self._max_id = None
+        # trade_id -> position of records below an earlier trade_id
+        self._unordered_ids = {}
+        # highest timestamp / records below an earlier timestamp
+        self._max_time = None
+        self._late_times = 0
+        # client_id -> array of positions
+        self._client_offsets = {}
+
+        self._lock = threading.Lock()
+
+    def refresh(self) -> int:
+        """
+        Map and index trades appended since the last call.
+
+        Returns:
+            int: number of newly indexed trades
+        """
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self) -> int:
+        manifest = self._read_manifest()
+        new_trades = 0
+
+        # finish the segments sealed since the last refresh
+        if manifest["next_segment"] > self._segment:
+            for entry in manifest["segments"]:
+                self._entries[entry["segment"]] = entry
+
+            while self._segment < manifest["next_segment"]:
+                entry = self._entries.get(self._segment)
+                if entry is not None:
+                    data = _SealedSegment(self, self._segment)
+                    new_trades += self._index_range(data, entry["bytes"])
+                    self._ends[self._segment] = self._indexed_end
+
+                self._close_map()
+                self._segment += 1
+                self._indexed_end = 0
+
+        # then the active segment
+        if self._file is None:
+            # the previous segment must have been renamed away from the
+            # active path (older versions wrote the manifest first)
+            segments = manifest["segments"]
+            if segments and not self._ledger.segment_exists(segments[-1]["segment"]):
+                return new_trades
+            try:
+                self._file = open(self.ledger_path, "rb")
+            except FileNotFoundError:
+                return new_trades
+            # the file must still be self._segment, not a newer one
+            if self._read_manifest()["next_segment"] != self._segment:
+                self._close_map()
+                return new_trades
+
+        # size of the handle we hold, even if it has since been rotated
+        size = os.fstat(self._file.fileno()).st_size
+        if size <= self._indexed_end:
+            return new_trades
+
+        if self._map is None or len(self._map) < size:
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return new_trades + self._index_range(self._map, size)
+
+    def _read_manifest(self) -> dict:
+        """
+        The partition manifest, parsed again only when the file changed
+        (it grows with every sealed segment; queries must not).
+        """
+        try:
+            stat = os.stat(self._ledger.manifest_path)
+            key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            key = None
+        if key is None or key != self._manifest_stat:
+            self._manifest = self._ledger.read_manifest()
+            self._manifest_stat = key
+        return self._manifest
+
+    def _index_range(self, data, size: int) -> int:
+        """
+        Index the complete lines of self._segment between the indexed
+        end and size.
+        """
+        base = self._segment << SEGMENT_SHIFT
+        offset = self._indexed_end
+        new_trades = 0
+
+        while True:
+            end = data.find(b"\n", offset, size)
+            if end == -1:
+                # partial last line: index it once it is complete
+                break
+
+            line = data[offset:end]
+            if line.strip():
+                try:
+                    trade = json.loads(line)
+                except json.JSONDecodeError:
+                    trade = None
+                if trade is not None:
+                    self._index(trade, base | offset)
+                    new_trades += 1
+
+            offset = end + 1
+
+        self._indexed_end = offset
+        return new_trades
+
+    def _segment_data(self, segment: int):
+        """
+        Content of a segment: the map of the segment being indexed or
+        a block-wise view of a sealed one.
+        """
+        if segment == self._segment:
+            return self._map
+        return _SealedSegment(self, segment)
+
+    def _sealed_block(self, segment: int, block: int) -> bytes:
+        key = (segment, block)
+        data = self._sealed_blocks.get(key)
+        if data is None:
+            data = self._ledger.read_block(self._entries[segment], block)
+            self._sealed_blocks[key] = data
+            if len(self._sealed_blocks) > self.BLOCK_CACHE:
+                self._sealed_blocks.popitem(last=False)
+        else:
+            self._sealed_blocks.move_to_end(key)
+        return data
+
+    def _segment_end(self, segment: int) -> int:
+        if segment == self._segment:
+            return self._indexed_end
+        return self._ends.get(segment, 0)
+
+    @staticmethod
+    def _timestamp(trade: dict) -> int:
+        timestamp = trade["timestamp"]
+        return timestamp if isinstance(timestamp, int) else to_timestamp_ns(timestamp)
+
+    def _index(self, trade: dict, position: int) -> None:
+        trade_id = trade["trade_id"]
+        if self._max_id is None or trade_id > self._max_id:
+            if self._ordered_ids % self.INDEX_STRIDE == 0:
+                self._id_keys.append(trade_id)
+                self._id_offsets.append(position)
+            self._ordered_ids += 1
+            self._max_id = trade_id
+        else:
+            self._unordered_ids.setdefault(trade_id, position)
+
+        timestamp = self._timestamp(trade)
+        if self._count % self.INDEX_STRIDE == 0:
+            self._time_keys.append(timestamp)
+            self._time_offsets.append(position)
+        if self._max_time is None or timestamp >= self._max_time:
+            self._max_time = timestamp
+        else:
+            self._late_times += 1
+        self._count += 1
+
+        client_offsets = self._client_offsets
+        for client_id in {trade.get("buy_client_id"), trade.get("sell_client_id")}:
+            offsets = client_offsets.get(client_id)
+            if offsets is None:
+                offsets = client_offsets[client_id] = array("q")
+            offsets.append(position)
+
+    def _read_at(self, position: int) -> dict:
+        """
+        Parse the record at a position.
+        """
+        segment, offset = position >> SEGMENT_SHIFT, position & OFFSET_MASK
+        data = self._segment_data(segment)
+        end = data.find(b"\n", offset, self._segment_end(segment))
+        return json.loads(data[offset:end])
+
+    def _iter_from(self, position: int):
+        """
+        Parse records from a position on, across segment boundaries.
+
+        Yields:
+            tuple: (position, record)
+        """
+        segment, offset = position >> SEGMENT_SHIFT, position & OFFSET_MASK
+        while segment <= self._segment:
+            end = self._segment_end(segment)
+            data = self._segment_data(segment) if offset < end else None
+            base = segment << SEGMENT_SHIFT
+            while offset < end:
+                line_end = data.find(b"\n", offset, end)
+                line = data[offset:line_end]
+                line_start, offset = offset, line_end + 1
+                if line.strip():
+                    try:
+                        yield base | line_start, json.loads(line)
+                    except json.JSONDecodeError:
+                        pass
+            segment += 1
+            offset = 0
+
+    @staticmethod
+    def _seek(keys: list, offsets: array, key) -> int:
+        """
+        Position of the last sparse index entry whose key is below `key`;
+        every record with a key >= `key` is at or after it.
+        """
+        index = bisect.bisect_left(keys, key) - 1
+        return offsets[index] if index >= 0 else 1 << SEGMENT_SHIFT
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self._count
+
+    def get_trade(self, trade_id):
+        """
+        Return the trade with this id, or None.
+        """
+        with self._lock:
+            self._refresh()
+            position = self._find(trade_id)
+            return self._read_at(position) if position is not None else None
+
+    def _find(self, trade_id):
+        """
+        Position of the trade with this id, or None.
+        """
+        if not self._count:
+            return None
+
+        position = self._unordered_ids.get(trade_id)
+        if position is not None:
+            return position
+
+        index = bisect.bisect_left(self._id_keys, trade_id) - 1
+        if index >= 0:
+            start, highest = self._id_offsets[index], self._id_keys[index]
+        else:
+            start, highest = 1 << SEGMENT_SHIFT, None
+
+        # walk the records in trade_id order, skipping unordered ones
+        for position, trade in self._iter_from(start):
+            current = trade["trade_id"]
+            if highest is not None and current <= highest:
+                continue
+            if current == trade_id:
+                return position
+            if current > trade_id:
+                return None
+            highest = current
+        return None
+
+    def scan(self, start_ns=None, end_ns=None, after_trade_id=None, limit: int = 100) -> dict:
+        """
+        Range scan in ledger (time) order with cursor pagination.
+
+        Parameters:
+            start_ns (int | None): Earliest trade timestamp (inclusive).
+            end_ns (int | None): Latest trade timestamp (exclusive).
+            after_trade_id (int | None): Cursor: only trades after the
+                trade with this id (by id if no trade has it).
+            limit (int): Page size.
+
+        Returns:
+            dict:
+                {
+                    "trades": list[dict],
+                    "next_cursor": int | None  (pass as after_trade_id)
+                }
+        """
+        with self._lock:
+            self._refresh()
+            if not self._count or limit <= 0:
+                return {"trades": [], "next_cursor": None}
+
+            # unordered timestamps: read everything, filter, never stop early
+            time_ordered = not self._late_times
+
+            start = 1 << SEGMENT_SHIFT
+            after_position = None
+            if after_trade_id is not None:
+                after_position = self._find(after_trade_id)
+                if after_position is not None:
+                    start = max(start, after_position)
+                else:
+                    start = max(start, self._seek(self._id_keys, self._id_offsets, after_trade_id + 1))
+            if start_ns is not None and time_ordered:
+                start = max(start, self._seek(self._time_keys, self._time_offsets, start_ns))
+
+            trades = []
+            has_more = False
+            for position, trade in self._iter_from(start):
+                if after_position is not None:
+                    if position <= after_position:
+                        continue
+                elif after_trade_id is not None and trade["trade_id"] <= after_trade_id:
+                    continue
+                if start_ns is not None or end_ns is not None:
+                    timestamp = self._timestamp(trade)
+                    if start_ns is not None and timestamp < start_ns:
+                        continue
+                    if end_ns is not None and timestamp >= end_ns:
+                        if time_ordered:
+                            break
+                        continue
+                if len(trades) == limit:
+                    has_more = True
+                    break
+                trades.append(trade)
+
+            next_cursor = trades[-1]["trade_id"] if has_more else None
+            return {"trades": trades, "next_cursor": next_cursor}
+
+    def client_trades(self, client_id, limit: int = 50, cursor: int = None) -> dict:
+        """
+        Most recent trades of a client (as buyer or seller), newest first.
+
+        Only the returned records are read: the client index holds the
+        position of every trade of the client.
+
+        Parameters:
+            client_id: Client to look up.
+            limit (int): Page size ("last N trades").
+            cursor (int | None): next_cursor of the previous page.
+
+        Returns:
+            dict:
+                {
+                    "trades": list[dict],
+                    "next_cursor": int | None
+                }
+        """
+        with self._lock:
+            self._refresh()
+            offsets = self._client_offsets.get(client_id)
+            if not offsets or limit <= 0:
+                return {"trades": [], "next_cursor": None}
+
+            stop = len(offsets) if cursor is None else min(cursor, len(offsets))
+            start = max(0, stop - limit)
+
+            trades = [self._read_at(offsets[i]) for i in range(stop - 1, start - 1, -1)]
+            return {"trades": trades, "next_cursor": start if start > 0 else None}
+
+    def _close_map(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self) -> None:
+        """
+        Release the memory map and the cached segments.
+        """
+        with self._lock:
+            self._close_map()
+            self._sealed_blocks.clear()
+
+
+class _SealedSegment:
+    """
+    The parts of the bytes / mmap interface LedgerReader uses (find of
+    a single byte and slicing), over a sealed segment read block by
+    block through the reader's block cache.
+    """
+
+    def __init__(self, reader: LedgerReader, segment: int):
+        self._reader = reader
+        self._segment = segment
+
+    def find(self, byte: bytes, start: int, end: int) -> int:
+        while start < end:
+            block, skip = divmod(start, COMPRESS_BLOCK_BYTES)
+            data = self._reader._sealed_block(self._segment, block)
+            base = start - skip
+            found = data.find(byte, skip, end - base)
+            if found != -1:
+                return base + found
+            if len(data) < COMPRESS_BLOCK_BYTES:
+                break
+            start = base + COMPRESS_BLOCK_BYTES
+        return -1
+
+    def __getitem__(self, key: slice) -> bytes:
+        start, stop = key.start, key.stop
+        parts = []
+        while start < stop:
+            block, skip = divmod(start, COMPRESS_BLOCK_BYTES)
+            data = self._reader._sealed_block(self._segment, block)
+            parts.append(data[skip:stop - start + skip])
+            if len(data) < COMPRESS_BLOCK_BYTES:
+                break
+            start += COMPRESS_BLOCK_BYTES - skip
+        return b"".join(parts)
@@ -0,0 +1,149 @@
+import asyncio
+
+from networking.tcp_server import TCPServer
+from networking.framing import FrameBuffer
+from networking.connection import StreamConnection
+from networking.market_data_feed import MarketDataFeed
+
+
+class AsyncTCPServer(TCPServer):
+    """
+    Single-threaded TCPServer built on asyncio.
+
+    All connections are served by one event loop instead of one OS
+    thread each, so thousands of mostly idle connections cost a small
+    buffer apiece rather than a thread stack and its context switches.
+
+    The protocols are the same as TCPServer's (newline-delimited JSON,
+    or binary frames after the binary handshake), and every message is
+    handled by the same code (handle_message / handle_binary_message).
+
+    Sequencing:
+    - Matching runs on the event loop thread, one message at a time,
+      in arrival order: the loop is the single matching sequencer and
+      no two engine calls ever run at once.
+    - The symbol locks are still taken (now always uncontended), so
+      components on other threads, like the Snapshotter, keep seeing
+      consistent books.
+    - All complete messages found in one read are handled back to back
+      and their responses sent with one write.
+    - Feed events are written to the connections' transports from the
+      loop as they are published, so a client may see the execution
+      report of an order before its response.
+    """
+
+    READ_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 9000,
+        engine=None,
+        backlog: int = 1024,
+        feed: MarketDataFeed = None
+    ):
+        """
+        Initialize the server.
+
+        Parameters:
+            host (str): Interface to listen on.
+            port (int): TCP port.
+            engine: ExchangeEngine receiving the orders.
+            backlog (int): Pending connections queued by the OS.
+            feed (MarketDataFeed | None): Feed pushed to the clients.
+        """
+        super().__init__(host=host, port=port, engine=engine, feed=feed)
+        self.backlog = backlog
+        # writers of the open connections
+        self.connections = set()
+
+        self._loop = None
+        self._stopped = None
+
+    def start_server(self):
+        """
+        Run the event loop until stop_server() is called.
+        """
+        try:
+            asyncio.run(self._serve())
+        except Exception as e:
+            print(f"Error starting server: {e}")
+        finally:
+            self.stop_server()
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+
+        server = await asyncio.start_server(
+            self._handle_connection,
+            self.host,
+            self.port,
+            backlog=self.backlog,
+            reuse_address=True
+        )
+        self.running = True
+
+        print(f"Server started on {self.host}:{self.port} (asyncio)")
+        print("Waiting for client connections...")
+
+        async with server:
+            await self._stopped.wait()
+
+        for writer in list(self.connections):
+            writer.close()
+
+    async def _handle_connection(self, reader, writer):
+        """
+        Serve one connection: read, split into messages, respond.
+        """
+        client_address = writer.get_extra_info("peername")
+        connection = StreamConnection(writer, client_address)
+        self.connections.add(writer)
+        print(f"New connection from {client_address}")
+
+        frames = FrameBuffer()
+        protocol = None
+        try:
+            while True:
+                data = await reader.read(self.READ_SIZE)
+                if not data:
+                    print(f"Client {client_address} disconnected")
+                    break
+
+                frames.feed(data)
+                if protocol is None:
+                    protocol = connection.protocol = self.read_protocol(frames)
+
+                # all complete messages; a partial one waits for the next read
+                responses = self.handle_frames(client_address, protocol, frames, connection)
+                if responses:
+                    writer.write(responses)
+                    await writer.drain()
+
+        except (ConnectionError, OSError, ValueError) as e:
+            print(f"Error handling client {client_address}: {e}")
+        finally:
+            self.feed.remove(connection)
+            self.connections.discard(writer)
+            connection.close()
+            print(f"Connection with {client_address} closed")
+
+    def stop_server(self):
+        """
+        Stop the event loop (from any thread) and close all connections.
+        """
+        if not self.running:
+            return
+
+        print("Stopping server...")
+        self.running = False
+
+        if self._loop is not None and not self._loop.is_closed():
+            try:
+                self._loop.call_soon_threadsafe(self._stopped.set)
+            except RuntimeError:
+                # the loop has already finished
+                pass
+
+        print("Server stopped")
@@ -0,0 +1,182 @@
+import asyncio
+import socket
+import threading
+from collections import deque
+
+from networking.protocol import JSON
+
+
+class Connection:
+    """
+    A client connection, as seen by the MarketDataFeed.
+
+    send() queues data for the client and never blocks the caller: it
+    is called by the publisher (a matching thread, or the event loop),
+    which must not wait for a slow client. A client whose queued data
+    exceeds max_pending_bytes is not reading and is disconnected
+    (slow consumer) instead of buffering without bound.
+    """
+
+    def __init__(self, address, protocol: str = JSON, max_pending_bytes: int = 8 * 1024 * 1024):
+        """
+        Initialize the connection.
+
+        Parameters:
+            address: Client address tuple.
+            protocol (str): JSON or BINARY (set after the handshake).
+            max_pending_bytes (int): Most bytes queued for the client.
+        """
+        self.address = address
+        self.protocol = protocol
+        self.max_pending_bytes = max_pending_bytes
+        self.closed = False
+
+        # managed by the MarketDataFeed; client_id is bound by the
+        # connection's first accepted order
+        self.client_id = None
+        self.symbols = set()
+
+    def send(self, data: bytes) -> None:
+        """
+        Queue data for the client without blocking.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        raise NotImplementedError
+
+
+class SocketConnection(Connection):
+    """
+    Connection of the threaded TCPServer.
+
+    Responses are sent by the connection's handler thread (send_now).
+    Pushed data (send) is queued and written by a writer thread started
+    on the first push. Both take the send lock, so a response and a
+    push are never interleaved.
+    """
+
+    def __init__(self, sock, address, protocol: str = JSON, max_pending_bytes: int = 8 * 1024 * 1024):
+        super().__init__(address, protocol=protocol, max_pending_bytes=max_pending_bytes)
+        self.sock = sock
+        # a push right after a response must not wait for the client's ACK
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            pass
+
+        self._send_lock = threading.Lock()
+        self._condition = threading.Condition()
+        self._pending = deque()
+        self._pending_bytes = 0
+        self._writer = None
+
+    def send_now(self, data: bytes) -> None:
+        """
+        Send data from the calling thread (blocking).
+        """
+        with self._send_lock:
+            self.sock.sendall(data)
+
+    def send(self, data: bytes) -> None:
+        with self._condition:
+            if self.closed:
+                return
+
+            self._pending.append(data)
+            self._pending_bytes += len(data)
+            if self._pending_bytes > self.max_pending_bytes:
+                print(f"Disconnecting slow consumer {self.address}")
+                self._close_locked()
+                return
+
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_loop,
+                    name="ConnectionWriterThread",
+                    daemon=True
+                )
+                self._writer.start()
+            self._condition.notify()
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._condition:
+                while not self._pending and not self.closed:
+                    self._condition.wait()
+                if self.closed:
+                    return
+
+                data = b''.join(self._pending)
+                self._pending.clear()
+                self._pending_bytes = 0
+
+            try:
+                self.send_now(data)
+            except OSError:
+                self.close()
+                return
+
+    def close(self) -> None:
+        with self._condition:
+            self._close_locked()
+
+    def _close_locked(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self._pending.clear()
+        self._condition.notify_all()
+        try:
+            # also wakes the handler and writer threads
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class StreamConnection(Connection):
+    """
+    Connection of the AsyncTCPServer.
+
+    send() writes to the stream's transport, which buffers the data and
+    sends it from the event loop. Calls from other threads are handed
+    to the loop.
+    """
+
+    def __init__(self, writer, address, protocol: str = JSON, max_pending_bytes: int = 8 * 1024 * 1024):
+        super().__init__(address, protocol=protocol, max_pending_bytes=max_pending_bytes)
+        self.writer = writer
+
+        # must be created on the event loop thread
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+
+    def send(self, data: bytes) -> None:
+        if threading.get_ident() != self._loop_thread:
+            self._call_on_loop(self.send, data)
+            return
+
+        if self.closed or self.writer.is_closing():
+            return
+
+        self.writer.write(data)
+        if self.writer.transport.get_write_buffer_size() > self.max_pending_bytes:
+            print(f"Disconnecting slow consumer {self.address}")
+            # close() would wait for the buffer to be flushed
+            self.closed = True
+            self.writer.transport.abort()
+
+    def close(self) -> None:
+        if threading.get_ident() != self._loop_thread:
+            self._call_on_loop(self.close)
+            return
+
+        self.closed = True
+        self.writer.close()
+
+    def _call_on_loop(self, callback, *args) -> None:
+        try:
+            self._loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # the event loop has finished: the connection is gone
+            self.closed = True
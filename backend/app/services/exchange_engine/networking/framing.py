@@ -0,0 +1,177 @@
+from typing import Iterator, Optional
+
+from networking.protocol import FRAME_HEADER, MAX_FRAME_SIZE
+
+
+# framings of a FrameBuffer
+NEWLINE = "newline"
+LENGTH_PREFIXED = "length_prefixed"
+
+# longest JSON line accepted (a line can be a whole batch of orders)
+MAX_LINE_SIZE = 16 * 1024 * 1024
+
+
+class FrameBuffer:
+    """
+    Receive buffer splitting a byte stream into frames without copying.
+
+    Data is received straight into one bytearray (socket.recv_into);
+    a read cursor marks the start of the first unconsumed byte and a
+    write cursor the end of the received data. Complete frames are
+    returned as memoryview slices of the buffer and the read cursor
+    moves past them: nothing is copied per frame, and a read holding
+    hundreds of frames costs one pass over it.
+
+    Framings:
+    - NEWLINE: frames end with b"\\n" (the newline is not part of the
+      frame). The search resumes where the previous one stopped, so a
+      long partial line is scanned only once.
+    - LENGTH_PREFIXED: frames are FRAME_HEADER (u32 length) + body;
+      the body is returned.
+
+    Space:
+    - Before a receive, the unconsumed tail (a partial frame at most)
+      is moved to the front if the free space at the end is short; the
+      buffer only grows (into a new bytearray) for frames larger than
+      it.
+
+    Frames are only valid until the next recv_into() or feed(): the
+    bytes under them may be moved or overwritten. Handle (or copy)
+    each frame before receiving again.
+
+    Raises ValueError for frames larger than the framing allows.
+    """
+
+    def __init__(self, framing: str = NEWLINE, capacity: int = 64 * 1024, min_read: int = 4096):
+        """
+        Initialize the buffer.
+
+        Parameters:
+            framing (str): NEWLINE or LENGTH_PREFIXED.
+            capacity (int): Initial size of the buffer in bytes.
+            min_read (int): Fewest free bytes offered to each receive.
+        """
+        self.framing = framing
+        self.min_read = min_read
+
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        # unconsumed data is self._buffer[self._start:self._end]
+        self._start = 0
+        self._end = 0
+        # NEWLINE: no newline in self._buffer[self._start:self._scan]
+        self._scan = 0
+        # LENGTH_PREFIXED: bytes still missing from a partial frame
+        self._missing = 0
+
+    def __len__(self) -> int:
+        """Number of received bytes not consumed yet."""
+        return self._end - self._start
+
+    def set_framing(self, framing: str) -> None:
+        self.framing = framing
+        self._scan = self._start
+
+    def recv_into(self, sock) -> int:
+        """
+        Receive from a socket straight into the buffer.
+
+        Returns:
+            int: Bytes received (0 when the peer closed the connection)
+        """
+        self._reserve(max(self.min_read, self._missing))
+        received = sock.recv_into(self._view[self._end:])
+        self._end += received
+        return received
+
+    def feed(self, data: bytes) -> None:
+        """
+        Append data received elsewhere (e.g. from an asyncio stream).
+        """
+        self._reserve(len(data))
+        self._view[self._end:self._end + len(data)] = data
+        self._end += len(data)
+
+    def peek(self, size: int) -> bytes:
+        """The next size unconsumed bytes (fewer if not received yet)."""
+        return bytes(self._view[self._start:min(self._start + size, self._end)])
+
+    def skip(self, size: int) -> None:
+        """Consume size bytes."""
+        self._start = min(self._start + size, self._end)
+        self._scan = max(self._scan, self._start)
+
+    def next_frame(self) -> Optional[memoryview]:
+        """
+        Consume and return the next complete frame, or None.
+        """
+        if self.framing == LENGTH_PREFIXED:
+            return self._next_length_prefixed()
+        return self._next_line()
+
+    def frames(self) -> Iterator[memoryview]:
+        """
+        Consume and yield every complete frame received so far.
+        """
+        frame = self.next_frame()
+        while frame is not None:
+            yield frame
+            frame = self.next_frame()
+
+    def _next_line(self) -> Optional[memoryview]:
+        newline = self._buffer.find(b"\n", max(self._scan, self._start), self._end)
+        if newline < 0:
+            self._scan = self._end
+            if self._end - self._start > MAX_LINE_SIZE:
+                raise ValueError(f"Line exceeds {MAX_LINE_SIZE} bytes")
+            return None
+
+        frame = self._view[self._start:newline]
+        self._start = self._scan = newline + 1
+        return frame
+
+    def _next_length_prefixed(self) -> Optional[memoryview]:
+        available = self._end - self._start
+        if available < FRAME_HEADER.size:
+            return None
+
+        (length,) = FRAME_HEADER.unpack_from(self._buffer, self._start)
+        if length > MAX_FRAME_SIZE:
+            raise ValueError(f"Frame of {length} bytes exceeds {MAX_FRAME_SIZE}")
+
+        if available - FRAME_HEADER.size < length:
+            # the next receive makes room for the whole frame
+            self._missing = FRAME_HEADER.size + length - available
+            return None
+
+        start = self._start + FRAME_HEADER.size
+        self._start = start + length
+        return self._view[start:self._start]
+
+    def _reserve(self, size: int) -> None:
+        """
+        Make room for size more bytes after the write cursor.
+        """
+        self._missing = 0
+        if len(self._buffer) - self._end >= size:
+            return
+
+        pending = self._end - self._start
+        scanned = self._scan - self._start
+
+        if pending + size <= len(self._buffer):
+            # move the unconsumed tail to the front (same size, in place)
+            self._buffer[:pending] = self._buffer[self._start:self._end]
+        else:
+            # frames handed out still point into the old buffer
+            capacity = len(self._buffer)
+            while capacity < pending + size:
+                capacity *= 2
+            buffer = bytearray(capacity)
+            buffer[:pending] = self._view[self._start:self._end]
+            self._buffer = buffer
+            self._view = memoryview(buffer)
+
+        self._start = 0
+        self._end = pending
+        self._scan = scanned
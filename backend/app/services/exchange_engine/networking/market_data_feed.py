@@ -0,0 +1,174 @@
+import json
+import threading
+from typing import Dict, List, Tuple
+
+from networking.protocol import BINARY, encode_event
+
+
+class MarketDataFeed:
+    """
+    Publish/subscribe feed pushed by the server to its connections.
+
+    Events (JSON shapes; binary frames carry the same fields):
+    - EXECUTION: one per trade side, sent to every connection bound to
+      the trade's client_id (both counterparties, so the owner of a
+      resting order learns about its fills); remaining_quantity is what
+      the order has left after that fill:
+        {"type": "EXECUTION", "seq", "symbol", "client_id", "order_id",
+         "side", "remaining_quantity", "trade"}
+    - TRADE: every trade of a symbol, sent to its subscribers:
+        {"type": "TRADE", "seq", "symbol", "trade"}
+    - BOOK: new aggregate of a price level that changed (quantity 0:
+      the level is gone), sent to the symbol's subscribers:
+        {"type": "BOOK", "seq", "symbol", "side", "price", "quantity",
+         "orders"}
+
+    Sequence numbers:
+    - TRADE and BOOK events share one sequence per symbol, EXECUTION
+      events have one per client_id. Both start at 1 and have no gaps,
+      so a gap on the client side means lost data. subscribe() returns
+      the last sequence number of the symbol.
+    - Sequences only advance while someone listens.
+
+    Fan-out:
+    - Each event is encoded once per protocol in use (a JSON line or a
+      binary frame) and the same bytes are queued on every target
+      connection (Connection.send, which never blocks).
+    - Events are numbered and queued under one lock, so every
+      connection receives them in sequence order.
+
+    Prices are client prices, as in responses.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # symbol -> connections subscribed to its trades and book
+        self._subscribers = {}
+        # client_id -> connections receiving its execution reports
+        self._clients = {}
+        self._symbol_seq = {}
+        self._client_seq = {}
+
+    def active(self) -> bool:
+        """
+        Whether any connection listens at all (publishers can skip
+        building events otherwise).
+        """
+        return bool(self._subscribers or self._clients)
+
+    def register_client(self, connection, client_id) -> None:
+        """
+        Send the execution reports of client_id to this connection.
+        Called for every accepted order, so a repeated call is cheap.
+
+        A connection is bound to the first client_id registered for it;
+        later calls (for any client_id) leave it unchanged.
+        """
+        if client_id is None or connection.client_id is not None:
+            return
+        with self._lock:
+            if connection.client_id is None:
+                connection.client_id = client_id
+                self._clients.setdefault(client_id, set()).add(connection)
+
+    def subscribe(self, connection, symbol: str) -> int:
+        """
+        Subscribe a connection to the trades and book deltas of a symbol.
+
+        Returns:
+            int: Last sequence number of the symbol (events sent to
+                 this connection continue from it)
+        """
+        with self._lock:
+            connection.symbols.add(symbol)
+            self._subscribers.setdefault(symbol, set()).add(connection)
+            return self._symbol_seq.get(symbol, 0)
+
+    def unsubscribe(self, connection, symbol: str) -> int:
+        with self._lock:
+            connection.symbols.discard(symbol)
+            self._discard(self._subscribers, symbol, connection)
+            return self._symbol_seq.get(symbol, 0)
+
+    def remove(self, connection) -> None:
+        """
+        Forget a connection (on disconnect).
+        """
+        with self._lock:
+            for symbol in connection.symbols:
+                self._discard(self._subscribers, symbol, connection)
+            if connection.client_id is not None:
+                self._discard(self._clients, connection.client_id, connection)
+            connection.symbols.clear()
+            connection.client_id = None
+
+    @staticmethod
+    def _discard(registry: dict, key, connection) -> None:
+        connections = registry.get(key)
+        if connections is None:
+            return
+        connections.discard(connection)
+        if not connections:
+            del registry[key]
+
+    def publish(
+        self,
+        symbol: str,
+        executions: List[Tuple],
+        trades: List[Dict],
+        levels: List[Dict]
+    ) -> None:
+        """
+        Publish the outcome of one engine call.
+
+        Parameters:
+            symbol (str): Symbol of the call.
+            executions (list[tuple]): (client_id, order_id, side,
+                remaining_quantity, trade) per trade side.
+            trades (list[dict]): Trades, in execution order.
+            levels (list[dict]): Changed levels as
+                {"side", "price", "quantity", "orders"}.
+        """
+        with self._lock:
+            for client_id, order_id, side, remaining_quantity, trade in executions:
+                targets = self._clients.get(client_id)
+                if not targets:
+                    continue
+                seq = self._client_seq[client_id] = self._client_seq.get(client_id, 0) + 1
+                self._fan_out({
+                    "type": "EXECUTION",
+                    "seq": seq,
+                    "symbol": symbol,
+                    "client_id": client_id,
+                    "order_id": order_id,
+                    "side": side,
+                    "remaining_quantity": remaining_quantity,
+                    "trade": trade
+                }, targets)
+
+            targets = self._subscribers.get(symbol)
+            if not targets:
+                return
+
+            seq = self._symbol_seq.get(symbol, 0)
+            for trade in trades:
+                seq += 1
+                self._fan_out({"type": "TRADE", "seq": seq, "symbol": symbol, "trade": trade}, targets)
+            for level in levels:
+                seq += 1
+                self._fan_out({"type": "BOOK", "seq": seq, "symbol": symbol, **level}, targets)
+            self._symbol_seq[symbol] = seq
+
+    @staticmethod
+    def _fan_out(event: dict, targets) -> None:
+        # encode once per protocol, not once per connection
+        encoded = {}
+        for connection in tuple(targets):
+            data = encoded.get(connection.protocol)
+            if data is None:
+                if connection.protocol == BINARY:
+                    data = encode_event(event)
+                else:
+                    data = json.dumps(event, default=str).encode('utf-8') + b'\n'
+                encoded[connection.protocol] = data
+            connection.send(data)
@@ -0,0 +1,452 @@
+"""
+protocol.py
+
+Compact binary wire protocol, offered next to newline-delimited JSON.
+
+Handshake:
+- The first byte a client sends selects the protocol of the whole
+  connection: HANDSHAKE_BINARY (b"B") or HANDSHAKE_JSON (b"J").
+- A connection starting with anything else is JSON, so existing
+  clients (which send "{" or "[" first) keep working unchanged.
+
+Frames (little endian, split by networking.framing.FrameBuffer):
+    length        : FRAME_HEADER, u32 byte count of the body
+    body          : message type (u8) + fixed layout of that type
+
+Messages:
+    client -> server
+        NEW_ORDER    : NEW_ORDER_BODY, then symbol, client_id and user
+                       as short strings (u8 length + UTF-8 bytes)
+        CANCEL       : CANCEL_BODY, then symbol as a short string
+        SUBSCRIBE    : SUBSCRIBE_BODY, then symbol
+        UNSUBSCRIBE  : SUBSCRIBE_BODY, then symbol
+    server -> client (responses)
+        ACK          : ACK_BODY, then one FILL_RECORD per trade
+        REJECT       : REJECT_BODY, then the reason (UTF-8, u16 length)
+        SUBSCRIPTION : SUBSCRIPTION_BODY, then symbol
+    server -> client (feed events, see networking.market_data_feed)
+        EXECUTION    : EXECUTION_BODY, then symbol and client_id
+        TRADE        : TRADE_BODY, then symbol
+        BOOK         : BOOK_BODY, then symbol
+
+Every request carries a client_order_id chosen by the client; the
+response to it (ACK, REJECT or SUBSCRIPTION) echoes it. Feed events
+answer no request: decoded, they are dicts with a "type".
+
+Prices are float64 in client units (0 = no price, market orders),
+converted to ticks by the server exactly like JSON prices. Order,
+trade IDs and timestamps are 64-bit integers. Trades carry no client
+IDs or symbol: the symbol is the one of the order.
+"""
+import struct
+from typing import List, Tuple
+
+
+HANDSHAKE_JSON = b"J"
+HANDSHAKE_BINARY = b"B"
+
+# protocols of a connection
+JSON = "json"
+BINARY = "binary"
+
+FRAME_HEADER = struct.Struct("<I")
+# larger frames are refused (the connection is closed)
+MAX_FRAME_SIZE = 1 << 20
+
+# message types
+NEW_ORDER = 1
+CANCEL = 2
+ACK = 3
+# 4 is not used: an order's fills travel in its ACK, later fills of a
+# resting order as EXECUTION events
+REJECT = 5
+SUBSCRIBE = 6
+UNSUBSCRIBE = 7
+SUBSCRIPTION = 8
+EXECUTION = 9
+TRADE = 10
+BOOK = 11
+
+# type, client_order_id, price, quantity, side, order_type
+NEW_ORDER_BODY = struct.Struct("<BQdqBB")
+# type, client_order_id, order_id
+CANCEL_BODY = struct.Struct("<BQQ")
+# type, client_order_id, order_id, remaining_quantity,
+# cancelled_quantity, timestamp, status, trade count
+ACK_BODY = struct.Struct("<BQQqqqBH")
+# trade_id, buy_order_id, sell_order_id, price, quantity, timestamp
+FILL_RECORD = struct.Struct("<QQQdqq")
+# type, client_order_id, reason length
+REJECT_BODY = struct.Struct("<BQH")
+# type, client_order_id
+SUBSCRIBE_BODY = struct.Struct("<BQ")
+# type, client_order_id, last sequence number of the symbol, subscribed
+SUBSCRIPTION_BODY = struct.Struct("<BQQB")
+# type, seq, order_id, side, remaining_quantity, then the trade
+EXECUTION_BODY = struct.Struct("<BQQBq" + FILL_RECORD.format[1:])
+# type, seq, then the trade
+TRADE_BODY = struct.Struct("<BQ" + FILL_RECORD.format[1:])
+# type, seq, side, price, quantity, orders
+BOOK_BODY = struct.Struct("<BQBdqI")
+STRING_LENGTH = struct.Struct("<B")
+
+SIDES = ("BUY", "SELL")
+ORDER_TYPES = ("LIMIT", "MARKET")
+STATUSES = ("NEW", "PARTIALLY_FILLED", "FILLED", "CANCELLED")
+
+# fields of a trade, in FILL_RECORD order
+TRADE_FIELDS = ("trade_id", "buy_order_id", "sell_order_id", "price", "quantity", "timestamp")
+
+# client-side messages, as the engine words them
+STATUS_MESSAGES = {
+    "NEW": "Order accepted and placed in order book",
+    "PARTIALLY_FILLED": "Order partially executed",
+    "FILLED": "Order fully executed",
+    "CANCELLED": "Order cancelled"
+}
+
+
+def read_handshake(first: bytes) -> Tuple[str, int]:
+    """
+    Select the protocol of a connection from its first byte.
+
+    Parameters:
+        first (bytes): First byte received.
+
+    Returns:
+        tuple: (JSON | BINARY, number of handshake bytes to consume)
+    """
+    if first == HANDSHAKE_BINARY:
+        return BINARY, 1
+    if first == HANDSHAKE_JSON:
+        return JSON, 1
+    # no handshake: a JSON client from before the binary protocol
+    return JSON, 0
+
+
+def encode_frame(body: bytes) -> bytes:
+    return FRAME_HEADER.pack(len(body)) + body
+
+
+def _pack_string(value) -> bytes:
+    data = str(value).encode("utf-8")
+    if len(data) > 255:
+        raise ValueError(f"String too long for the binary protocol: {value!r}")
+    return STRING_LENGTH.pack(len(data)) + data
+
+
+def _unpack_strings(body: bytes, position: int, count: int) -> List[str]:
+    strings = []
+    for _ in range(count):
+        (length,) = STRING_LENGTH.unpack_from(body, position)
+        position += STRING_LENGTH.size
+        if position + length > len(body):
+            raise ValueError("Truncated string")
+        strings.append(str(body[position:position + length], "utf-8"))
+        position += length
+    return strings
+
+
+def encode_request(client_order_id: int, order: dict) -> bytes:
+    """
+    Encode a client order (JSON message shape) as one frame.
+
+    Supported actions are "NEW" (default) and "CANCEL".
+
+    Raises:
+        ValueError: for other actions or fields the layout cannot hold
+    """
+    action = order.get("action", "NEW")
+    symbol = order.get("symbol", "")
+
+    if action == "CANCEL":
+        body = CANCEL_BODY.pack(CANCEL, client_order_id, order["order_id"])
+        return encode_frame(body + _pack_string(symbol))
+
+    if action in ("SUBSCRIBE", "UNSUBSCRIBE"):
+        message_type = SUBSCRIBE if action == "SUBSCRIBE" else UNSUBSCRIBE
+        body = SUBSCRIBE_BODY.pack(message_type, client_order_id)
+        return encode_frame(body + _pack_string(symbol))
+
+    if action != "NEW":
+        raise ValueError(f"Action {action!r} is not supported by the binary protocol")
+
+    try:
+        body = NEW_ORDER_BODY.pack(
+            NEW_ORDER,
+            client_order_id,
+            float(order.get("price") or 0),
+            order["quantity"],
+            SIDES.index(order["side"]),
+            ORDER_TYPES.index(order["order_type"])
+        )
+    except struct.error as e:
+        raise ValueError(f"Order does not fit the binary layout: {e}")
+
+    return encode_frame(
+        body
+        + _pack_string(symbol)
+        + _pack_string(order["client_id"])
+        + _pack_string(order["user"])
+    )
+
+
+def decode_request(body) -> Tuple[int, dict]:
+    """
+    Decode a request frame (bytes or memoryview) into the JSON message
+    it stands for.
+
+    Returns:
+        tuple: (client_order_id, order dict as process_order expects it)
+
+    Raises:
+        ValueError: on unknown or malformed messages
+    """
+    try:
+        message_type = body[0]
+
+        if message_type == NEW_ORDER:
+            _, client_order_id, price, quantity, side, order_type = NEW_ORDER_BODY.unpack_from(body)
+            symbol, client_id, user = _unpack_strings(body, NEW_ORDER_BODY.size, 3)
+            order = {
+                "user": user,
+                "client_id": client_id,
+                "side": SIDES[side],
+                "order_type": ORDER_TYPES[order_type],
+                "quantity": quantity,
+                "price": _price(price),
+                "status": "NEW"
+            }
+
+        elif message_type == CANCEL:
+            _, client_order_id, order_id = CANCEL_BODY.unpack_from(body)
+            (symbol,) = _unpack_strings(body, CANCEL_BODY.size, 1)
+            order = {"action": "CANCEL", "order_id": order_id}
+
+        elif message_type in (SUBSCRIBE, UNSUBSCRIBE):
+            _, client_order_id = SUBSCRIBE_BODY.unpack_from(body)
+            (symbol,) = _unpack_strings(body, SUBSCRIBE_BODY.size, 1)
+            order = {"action": "SUBSCRIBE" if message_type == SUBSCRIBE else "UNSUBSCRIBE"}
+
+        else:
+            raise ValueError(f"Unknown message type {message_type}")
+
+    except (IndexError, struct.error) as e:
+        raise ValueError(f"Malformed message: {e}")
+
+    if symbol:
+        order["symbol"] = symbol
+    return client_order_id, order
+
+
+def _price(value: float):
+    # integral prices come back as ints, as in JSON
+    return int(value) if value.is_integer() else value
+
+
+def _status(response: dict) -> str:
+    status = response.get("status")
+    if status in STATUSES:
+        return status
+    if response.get("remaining_quantity") == 0:
+        return "FILLED"
+    if response.get("trades"):
+        return "PARTIALLY_FILLED"
+    return "NEW"
+
+
+def encode_response(client_order_id: int, response: dict) -> bytes:
+    """
+    Encode an engine response (process_order result) as one frame:
+    an ACK with its trades, a REJECT, or for (un)subscriptions a
+    SUBSCRIPTION.
+    """
+    if "error" in response or not response.get("accepted"):
+        reason = response.get("error") or response.get("message") or "Rejected"
+        return encode_reject(client_order_id, reason)
+
+    if "subscribed" in response:
+        body = SUBSCRIPTION_BODY.pack(
+            SUBSCRIPTION,
+            client_order_id,
+            response["seq"],
+            response["subscribed"]
+        )
+        return encode_frame(body + _pack_string(response["symbol"]))
+
+    trades = response.get("trades") or []
+    try:
+        body = [ACK_BODY.pack(
+            ACK,
+            client_order_id,
+            response["order_id"],
+            response.get("remaining_quantity") or 0,
+            response.get("cancelled_quantity") or 0,
+            response.get("timestamp") or 0,
+            STATUSES.index(_status(response)),
+            len(trades)
+        )]
+        for trade in trades:
+            body.append(FILL_RECORD.pack(*(trade[field] for field in TRADE_FIELDS)))
+    except (KeyError, struct.error) as e:
+        return encode_reject(client_order_id, f"Response does not fit the binary layout: {e}")
+
+    return encode_frame(b"".join(body))
+
+
+def encode_event(event: dict) -> bytes:
+    """
+    Encode a feed event (EXECUTION, TRADE or BOOK dict, as built by
+    MarketDataFeed) as one frame.
+    """
+    event_type = event["type"]
+    symbol = _pack_string(event["symbol"])
+
+    if event_type == "EXECUTION":
+        trade = event["trade"]
+        body = EXECUTION_BODY.pack(
+            EXECUTION,
+            event["seq"],
+            event["order_id"],
+            SIDES.index(event["side"]),
+            event["remaining_quantity"],
+            *(trade[field] for field in TRADE_FIELDS)
+        )
+        return encode_frame(body + symbol + _pack_string(event["client_id"]))
+
+    if event_type == "TRADE":
+        trade = event["trade"]
+        body = TRADE_BODY.pack(TRADE, event["seq"], *(trade[field] for field in TRADE_FIELDS))
+        return encode_frame(body + symbol)
+
+    if event_type == "BOOK":
+        body = BOOK_BODY.pack(
+            BOOK,
+            event["seq"],
+            SIDES.index(event["side"]),
+            event["price"],
+            event["quantity"],
+            event["orders"]
+        )
+        return encode_frame(body + symbol)
+
+    raise ValueError(f"Unknown event type {event_type!r}")
+
+
+def encode_reject(client_order_id: int, reason: str) -> bytes:
+    data = reason.encode("utf-8")[:0xFFFF]
+    return encode_frame(REJECT_BODY.pack(REJECT, client_order_id, len(data)) + data)
+
+
+def _decode_trade(values) -> dict:
+    trade = dict(zip(TRADE_FIELDS, values))
+    trade["price"] = _price(trade["price"])
+    return trade
+
+
+def decode_response(body) -> dict:
+    """
+    Decode a response or feed event frame (bytes or memoryview) into
+    its JSON shape.
+
+    ACK becomes an accepted response (with "status" and
+    "client_order_id"), REJECT an error response.
+
+    Raises:
+        ValueError: on unknown or malformed messages
+    """
+    try:
+        message_type = body[0]
+
+        if message_type == ACK:
+            (
+                _, client_order_id, order_id, remaining_quantity,
+                cancelled_quantity, timestamp, status, count
+            ) = ACK_BODY.unpack_from(body)
+            status = STATUSES[status]
+
+            end = ACK_BODY.size + count * FILL_RECORD.size
+            if len(body) < end:
+                raise ValueError("Truncated trades")
+
+            response = {
+                "accepted": True,
+                "client_order_id": client_order_id,
+                "order_id": order_id,
+                "trades": [
+                    _decode_trade(values)
+                    for values in FILL_RECORD.iter_unpack(body[ACK_BODY.size:end])
+                ],
+                "remaining_quantity": remaining_quantity,
+                "status": status,
+                "timestamp": timestamp,
+                "message": STATUS_MESSAGES[status]
+            }
+            if status == "CANCELLED":
+                response["cancelled_quantity"] = cancelled_quantity
+            return response
+
+        if message_type == SUBSCRIPTION:
+            _, client_order_id, seq, subscribed = SUBSCRIPTION_BODY.unpack_from(body)
+            (symbol,) = _unpack_strings(body, SUBSCRIPTION_BODY.size, 1)
+            return {
+                "accepted": True,
+                "client_order_id": client_order_id,
+                "symbol": symbol,
+                "subscribed": bool(subscribed),
+                "seq": seq
+            }
+
+        if message_type == EXECUTION:
+            values = EXECUTION_BODY.unpack_from(body)
+            symbol, client_id = _unpack_strings(body, EXECUTION_BODY.size, 2)
+            return {
+                "type": "EXECUTION",
+                "seq": values[1],
+                "symbol": symbol,
+                "client_id": client_id,
+                "order_id": values[2],
+                "side": SIDES[values[3]],
+                "remaining_quantity": values[4],
+                "trade": _decode_trade(values[5:])
+            }
+
+        if message_type == TRADE:
+            values = TRADE_BODY.unpack_from(body)
+            (symbol,) = _unpack_strings(body, TRADE_BODY.size, 1)
+            return {
+                "type": "TRADE",
+                "seq": values[1],
+                "symbol": symbol,
+                "trade": _decode_trade(values[2:])
+            }
+
+        if message_type == BOOK:
+            _, seq, side, price, quantity, orders = BOOK_BODY.unpack_from(body)
+            (symbol,) = _unpack_strings(body, BOOK_BODY.size, 1)
+            return {
+                "type": "BOOK",
+                "seq": seq,
+                "symbol": symbol,
+                "side": SIDES[side],
+                "price": _price(price),
+                "quantity": quantity,
+                "orders": orders
+            }
+
+        if message_type == REJECT:
+            _, client_order_id, length = REJECT_BODY.unpack_from(body)
+            reason = str(body[REJECT_BODY.size:REJECT_BODY.size + length], "utf-8", "replace")
+            return {
+                "accepted": False,
+                "client_order_id": client_order_id,
+                "order_id": None,
+                "trades": [],
+                "timestamp": None,
+                "error": reason
+            }
+
+        raise ValueError(f"Unknown message type {message_type}")
+
+    except (IndexError, struct.error) as e:
+        raise ValueError(f"Malformed message: {e}")
@@ -1,19 +1,98 @@
 import socket
 import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, wait
+from typing import Callable, List, Optional
+
+from networking.protocol import (
+    JSON, BINARY, HANDSHAKE_BINARY,
+    encode_request, decode_response
+)
+from networking.framing import FrameBuffer, NEWLINE, LENGTH_PREFIXED
 
 class TCPClient:
     """
     TCP client to send orders to the Exchange Engine and receive responses.
     Each client represents a single user session.
+
+    Two modes:
+    - Stop-and-wait (default): submit_order() sends one order and
+      reads its response. One order per round trip.
+    - Pipelined (after start_pipeline(), or the first
+      submit_order_async()): many orders are in flight at once. Each
+      carries a client_order_id, which the server echoes, and a reader
+      thread resolves the Future of each response as it arrives.
+
+    Pipelining:
+    - At most max_in_flight orders are unanswered; submitting more
+      blocks until responses come back (backpressure).
+    - Orders submitted together (submit_orders_async) are sent with
+      one send per window.
+    - The server answers a connection's requests in order, so a
+      response without a client_order_id (e.g. an invalid JSON error)
+      answers the oldest request in flight.
+    - Server messages answering no request (those with a "type", or
+      a client_order_id that is not in flight) go to on_update.
+
+    Feed:
+    - The server pushes execution reports for the client_id of this
+      connection's first accepted order (orders for another client_id
+      are rejected on this connection), and trades and book deltas of
+      the symbols it subscribe()s to; they all go to on_update.
+    - In stop-and-wait mode pushes are only read (and passed to
+      on_update) while waiting for a response; start_pipeline()
+      delivers them as they arrive.
+    - Callbacks and on_update run on the reader thread: they must not
+      block on other responses.
+    - Closing the connection fails the Futures still in flight with
+      ConnectionError. Once the connection is lost (the reader thread
+      has stopped), new submissions fail right away with
+      ConnectionError until close_connection() and connect().
     """
 
-    def __init__(self, host: str = "localhost", port: int = 9000):
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 9000,
+        protocol: str = JSON,
+        max_in_flight: int = 1024
+    ):
         """
         Initialize TCP client with host and port.
+
+        Parameters:
+            protocol (str): "json" (newline-delimited JSON) or "binary"
+                (length-prefixed frames, see networking.protocol).
+            max_in_flight (int): Most unanswered orders in pipelined mode.
         """
+        if protocol not in (JSON, BINARY):
+            raise ValueError(f"Unknown protocol {protocol!r}")
+        if max_in_flight <= 0:
+            raise ValueError("max_in_flight must be positive")
+
         self.host = host
         self.port = port
+        self.protocol = protocol
+        self.max_in_flight = max_in_flight
         self.sock = None
+        # responses received but not read yet
+        self._frames = None
+        # client_order_id of the next request without one
+        self._next_client_order_id = 1
+
+        # pipelined mode
+        # called with every server message answering no request
+        self.on_update: Optional[Callable[[dict], None]] = None
+        # client_order_id -> (Future, order), in send order
+        self._in_flight = OrderedDict()
+        self._in_flight_lock = threading.Lock()
+        # keeps registration order == send order across threads
+        self._send_lock = threading.Lock()
+        self._window = None
+        self._reader_thread = None
+        # set (under _in_flight_lock) once the reader thread has stopped
+        self._connection_error: Optional[ConnectionError] = None
 
     def connect(self):
         """
@@ -26,6 +105,13 @@ class TCPClient:
         try:
             self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.sock.connect((self.host, self.port))
+            # orders are small: send them right away
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            if self.protocol == BINARY:
+                self.sock.sendall(HANDSHAKE_BINARY)
+                self._frames = FrameBuffer(LENGTH_PREFIXED)
+            else:
+                self._frames = FrameBuffer(NEWLINE)
             print(f"Connected to server at {self.host}:{self.port}")
             return True
         except ConnectionRefusedError:
@@ -65,27 +151,25 @@ class TCPClient:
                 "error": "Not connected to server. Call connect() first."
             }
         
+        if self._reader_thread is not None:
+            # the reader thread owns the socket: wait for the Future
+            try:
+                return self.submit_order_async(order).result()
+            except Exception as e:
+                return self._error_response(order, f"Error submitting order: {e}")
+
+        if self.protocol == BINARY:
+            return self._submit_binary(order)
+
         try:
-            # Serialize order to JSON and send
+            # Serialize order to JSON and send, newline delimiter included
+            # (a separate send of the newline waits for a delayed ACK)
             message = json.dumps(order)
-            self.sock.sendall(message.encode('utf-8'))
-            self.sock.sendall(b'\n')  # Delimiter to mark end of message
+            self.sock.sendall(message.encode('utf-8') + b'\n')
             
-            # Receive response from server
-            response_data = b''
-            while True:
-                chunk = self.sock.recv(4096)
-                if not chunk:
-                    break
-                response_data += chunk
-                # Check if we received the complete message (ends with newline)
-                if b'\n' in response_data:
-                    break
-            
-            # Decode and parse JSON response
-            response_str = response_data.decode('utf-8').strip()
-            if response_str:
-                response = json.loads(response_str)
+            # Receive response from server (bytes after it are kept)
+            response = self._read_response()
+            if response is not None:
                 return response
             else:
                 return {
@@ -116,6 +200,338 @@ class TCPClient:
                 "error": f"Error submitting order: {e}"
             }
 
+    def _submit_binary(self, order: dict) -> dict:
+        """
+        submit_order() over the binary protocol: one frame out, one in.
+        The response has the JSON response shape.
+        """
+        client_order_id = self._next_client_order_id
+        self._next_client_order_id += 1
+
+        try:
+            self.sock.sendall(encode_request(client_order_id, order))
+
+            response = self._read_response()
+            if response is None:
+                raise ConnectionError("Server closed connection")
+            response.setdefault("remaining_quantity", order.get("quantity", 0))
+            return response
+
+        except Exception as e:
+            return self._error_response(order, f"Error submitting order: {e}")
+
+    def _read_response(self):
+        """
+        Read up to the response of the request just sent (stop-and-wait
+        mode). Pushed messages read on the way go to on_update.
+
+        Returns:
+            dict | list | None: Decoded response, None if the connection
+                was closed (or sent an empty line)
+
+        Raises:
+            json.JSONDecodeError: if a JSON message is invalid
+        """
+        while True:
+            frame = self._read_frame()
+            if frame is None:
+                return None
+
+            if self.protocol == BINARY:
+                message = decode_response(frame)
+            else:
+                text = str(frame, 'utf-8').strip()
+                if not text:
+                    return None
+                message = json.loads(text)
+
+            if not (isinstance(message, dict) and "type" in message):
+                return message
+            if self.on_update is not None:
+                self.on_update(message)
+
+    def subscribe(self, symbol: str, on_update: Optional[Callable[[dict], None]] = None) -> dict:
+        """
+        Subscribe to the trades and book deltas of a symbol.
+
+        Parameters:
+            symbol (str): Symbol to follow.
+            on_update (callable | None): Receives the pushed events
+                (replaces the current on_update).
+
+        Returns:
+            dict: {"accepted", "symbol", "subscribed", "seq", "message"};
+                the symbol's events continue from seq + 1.
+        """
+        if on_update is not None:
+            self.on_update = on_update
+        return self.submit_order({"action": "SUBSCRIBE", "symbol": symbol})
+
+    def unsubscribe(self, symbol: str) -> dict:
+        """
+        Stop the trades and book deltas of a symbol.
+        """
+        return self.submit_order({"action": "UNSUBSCRIBE", "symbol": symbol})
+
+    def start_pipeline(self, on_update: Optional[Callable[[dict], None]] = None) -> None:
+        """
+        Switch to pipelined mode: start the reader thread.
+
+        Parameters:
+            on_update (callable | None): Receives server messages
+                answering no request.
+
+        Raises:
+            ConnectionError: if not connected
+        """
+        if not self.sock:
+            raise ConnectionError("Not connected to server. Call connect() first.")
+
+        if on_update is not None:
+            self.on_update = on_update
+        if self._reader_thread is not None:
+            return
+
+        self._window = threading.BoundedSemaphore(self.max_in_flight)
+        self._reader_thread = threading.Thread(
+            target=self._read_loop,
+            name="TCPClientReader",
+            daemon=True
+        )
+        self._reader_thread.start()
+
+    def submit_order_async(self, order: dict, callback: Optional[Callable[[dict], None]] = None) -> Future:
+        """
+        Send an order without waiting for its response.
+
+        Parameters:
+            order (dict): Order details, as for submit_order(). An
+                existing client_order_id is used as is, otherwise one
+                is assigned.
+            callback (callable | None): Called with the response.
+
+        Returns:
+            Future: Resolves to the response dict.
+
+        Blocks while max_in_flight orders are unanswered.
+        """
+        return self.submit_orders_async([order], callback)[0]
+
+    def submit_orders_async(
+        self,
+        orders: List[dict],
+        callback: Optional[Callable[[dict], None]] = None
+    ) -> List[Future]:
+        """
+        Send many orders back to back, without waiting for responses.
+
+        Orders are sent with one send per window of max_in_flight
+        orders; see submit_order_async().
+
+        Returns:
+            list[Future]: One per order, in the same order.
+
+        Raises:
+            ConnectionError: if the connection is lost (orders already
+                sent keep their Futures, the others are not sent)
+        """
+        if self._reader_thread is None:
+            self.start_pipeline()
+        if self._connection_error is not None:
+            raise self._connection_error
+
+        futures = []
+        with self._send_lock:
+            pending = []
+            for order in orders:
+                if not self._window.acquire(blocking=False):
+                    # window full: send what we have, then wait
+                    self._send(pending)
+                    pending = []
+                    self._window.acquire()
+
+                try:
+                    future, message = self._register(order)
+                except Exception:
+                    self._window.release()
+                    self._send(pending)
+                    raise
+
+                if callback is not None:
+                    future.add_done_callback(self._callback_for(callback))
+                futures.append(future)
+                pending.append(message)
+
+            self._send(pending)
+        return futures
+
+    @staticmethod
+    def _callback_for(callback: Callable[[dict], None]):
+        def on_done(future: Future) -> None:
+            # failed orders raise from future.result() instead
+            if future.exception() is None:
+                callback(future.result())
+        return on_done
+
+    def wait_all(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every order sent so far has its response.
+
+        Returns:
+            bool: False if the timeout expired first
+        """
+        with self._in_flight_lock:
+            futures = [future for future, _ in self._in_flight.values()]
+        _, not_done = wait(futures, timeout=timeout)
+        return not not_done
+
+    def _register(self, order: dict):
+        """
+        Assign the client_order_id of an order, encode it and add its
+        Future to the in-flight table.
+
+        Returns:
+            tuple: (Future, (client_order_id, encoded message))
+
+        Raises:
+            ConnectionError: if the connection is lost
+        """
+        client_order_id = order.get("client_order_id")
+        if client_order_id is None:
+            client_order_id = self._next_client_order_id
+            self._next_client_order_id += 1
+
+        if self.protocol == BINARY:
+            message = encode_request(client_order_id, order)
+        else:
+            message = json.dumps(dict(order, client_order_id=client_order_id)).encode('utf-8') + b'\n'
+
+        future = Future()
+        with self._in_flight_lock:
+            if self._connection_error is not None:
+                raise self._connection_error
+            if client_order_id in self._in_flight:
+                raise ValueError(f"Order {client_order_id!r} is already in flight")
+            self._in_flight[client_order_id] = (future, order)
+        return future, (client_order_id, message)
+
+    def _send(self, pending: List[tuple]) -> None:
+        """
+        Send registered (client_order_id, message) pairs in one send.
+
+        If the send fails their orders leave the in-flight table, free
+        their window slots and their Futures fail.
+
+        Raises:
+            ConnectionError: if the send fails
+        """
+        if not pending:
+            return
+        try:
+            self.sock.sendall(b''.join(message for _, message in pending))
+        except (OSError, AttributeError) as e:
+            error = ConnectionError(f"Error sending orders: {e}")
+            with self._in_flight_lock:
+                entries = [self._in_flight.pop(client_order_id, None) for client_order_id, _ in pending]
+            for entry in entries:
+                # None: already failed by the reader thread
+                if entry is not None:
+                    self._window.release()
+                    entry[0].set_exception(error)
+            raise error from e
+
+    def _read_loop(self) -> None:
+        """
+        Reader thread: resolve the Future of every response.
+        """
+        error = None
+        try:
+            while True:
+                frame = self._read_frame()
+                if frame is None:
+                    break
+
+                if self.protocol == BINARY:
+                    message = decode_response(frame)
+                else:
+                    message = json.loads(str(frame, 'utf-8'))
+                self._dispatch(message)
+
+        except Exception as e:
+            error = e
+        finally:
+            self._fail_in_flight(error)
+
+    def _dispatch(self, message) -> None:
+        """
+        Resolve the Future a response answers.
+
+        A response is matched by its client_order_id. Only a response
+        without one (e.g. an error for a message the server could not
+        decode; binary rejects carry id 0) answers the oldest order in
+        flight. Anything else goes to on_update, or is reported.
+        """
+        entry = None
+        if not (isinstance(message, dict) and "type" in message):
+            client_order_id = message.get("client_order_id") if isinstance(message, dict) else None
+            anonymous = client_order_id is None or (self.protocol == BINARY and client_order_id == 0)
+            with self._in_flight_lock:
+                if client_order_id in self._in_flight:
+                    entry = self._in_flight.pop(client_order_id)
+                elif anonymous and self._in_flight:
+                    # responses come in request order
+                    _, entry = self._in_flight.popitem(last=False)
+
+        if entry is None:
+            if self.on_update is not None:
+                self.on_update(message)
+            else:
+                print(f"Unmatched message from server: {message}")
+            return
+
+        future, order = entry
+        if isinstance(message, dict):
+            message.setdefault("remaining_quantity", order.get("quantity", 0))
+        self._window.release()
+        future.set_result(message)
+
+    def _fail_in_flight(self, error: Optional[Exception]) -> None:
+        """
+        Called as the reader thread stops: mark the connection lost and
+        fail every order still in flight.
+        """
+        connection_error = ConnectionError(f"Connection closed: {error}" if error else "Connection closed")
+        with self._in_flight_lock:
+            self._connection_error = connection_error
+            futures = [future for future, _ in self._in_flight.values()]
+            self._in_flight.clear()
+
+        for future in futures:
+            self._window.release()
+            future.set_exception(connection_error)
+
+    def _error_response(self, order: dict, error: str) -> dict:
+        return {
+            "accepted": False,
+            "order_id": None,
+            "trades": [],
+            "remaining_quantity": order.get("quantity", 0),
+            "timestamp": None,
+            "error": error
+        }
+
+    def _read_frame(self):
+        """
+        Return the next message from the server (a memoryview valid
+        until the next read), or None if the connection was closed.
+        """
+        frame = self._frames.next_frame()
+        while frame is None:
+            if not self._frames.recv_into(self.sock):
+                return None
+            frame = self._frames.next_frame()
+        return frame
+
     def listen_updates(self):
         """
         Optional: Continuously listen for asynchronous updates
@@ -124,17 +540,25 @@ class TCPClient:
         if not self.sock:
             print("Not connected to server. Call connect() first.")
             return
+
+        if self._reader_thread is not None:
+            print("Pipelined mode: updates are delivered to on_update")
+            return
         
         print("Listening for updates from server...")
         try:
             while True:
-                data = self.sock.recv(4096)
-                if not data:
+                frame = self._read_frame()
+                if frame is None:
                     print("Server closed connection")
                     break
+
+                if self.protocol == BINARY:
+                    print(f"Received update: {decode_response(frame)}")
+                    continue
                 
-                # Decode and parse JSON updates
-                message = data.decode('utf-8').strip()
+                # Decode and parse JSON updates (one per line)
+                message = str(frame, 'utf-8').strip()
                 if message:
                     try:
                         update = json.loads(message)
@@ -153,7 +577,17 @@ class TCPClient:
         """
         if self.sock:
             try:
+                if self._reader_thread is not None:
+                    # wakes the reader thread, which fails what is in flight
+                    try:
+                        self.sock.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+                    self._reader_thread.join()
+                    self._reader_thread = None
+                    self._connection_error = None
                 self.sock.close()
+                self._frames = None
                 print("Connection closed")
             except Exception as e:
                 print(f"Error closing connection: {e}")
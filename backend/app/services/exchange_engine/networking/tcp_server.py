@@ -1,8 +1,18 @@
 import socket
 import threading
 import json
+from collections import Counter
+from contextlib import ExitStack
 from typing import Optional
 from utils.logger import log_received_order
+from networking.protocol import (
+    BINARY, read_handshake,
+    decode_request, encode_response, encode_reject
+)
+from networking.framing import FrameBuffer, LENGTH_PREFIXED
+from networking.connection import SocketConnection
+from networking.market_data_feed import MarketDataFeed
+from engine.instrument import DEFAULT_SYMBOL, is_valid_symbol
 
 class TCPServer:    
     """
@@ -10,19 +20,29 @@ class TCPServer:
     to the ExchangeEngine. Each client runs in a separate thread 
     if implementation of the multithreaded is possible then do it 
     else stick to the singlethreaded request handling.
+
+    Engine access is serialized per symbol: orders for different
+    symbols run concurrently, orders for the same symbol never do.
+
+    Besides answering requests, the server pushes a MarketDataFeed:
+    execution reports to the connections of both counterparties of a
+    trade, and trades and book deltas to the subscribers of a symbol
+    ({"action": "SUBSCRIBE", "symbol": ...}).
     """
 
-    def __init__(self, host: str = "localhost", port: int = 9000, engine = None):
+    def __init__(self, host: str = "localhost", port: int = 9000, engine = None, feed: MarketDataFeed = None):
         """
         Initialize TCP server with host, port, and engine reference.
         """
         self.host = host
         self.port = port
         self.engine = engine
+        self.feed = feed if feed is not None else MarketDataFeed()
         self.server_socket = None
         self.client_threads = []
         self.running = False
-        self.lock = threading.Lock()  # For thread-safe engine access
+        self.lock = threading.Lock()  # Guards client_threads and symbol_locks
+        self.symbol_locks = {}  # symbol -> lock for thread-safe engine access
 
     def start_server(self):
         """
@@ -75,8 +95,11 @@ class TCPServer:
             )
             client_thread.start()
             
-            # Keep track of client threads
+            # Keep track of client threads (dropping finished ones)
             with self.lock:
+                self.client_threads = [
+                    thread for thread in self.client_threads if thread.is_alive()
+                ]
                 self.client_threads.append(client_thread)
                 
         except OSError:
@@ -88,66 +111,280 @@ class TCPServer:
         Receive orders from a client, forward to engine,
         and send back order confirmations/trade updates.
 
+        Messages are newline-delimited JSON, or binary frames if the
+        client opens with the binary handshake (see networking.protocol).
+
         Parameters:
             client_socket: Socket object for this client
             client_address: Client address tuple
         """
         print(f"Handling client {client_address}")
+        connection = SocketConnection(client_socket, client_address)
         
         try:
-            buffer = b''
+            frames = FrameBuffer()
+            protocol = None
             
             while True:
-                # Receive data from client
-                data = client_socket.recv(4096)
+                # Receive data from client (straight into the buffer)
+                received = frames.recv_into(client_socket)
                 
-                if not data:
+                if not received:
                     # Client disconnected
                     print(f"Client {client_address} disconnected")
                     break
-                
-                buffer += data
-                
-                # Process complete messages (separated by newlines)
-                while b'\n' in buffer:
-                    # Extract one complete message
-                    message, buffer = buffer.split(b'\n', 1)
-                    
-                    try:
-                        # Decode and parse JSON
-                        order = json.loads(message.decode('utf-8'))
-                        log_received_order(client_address, order)
-                        
-                        # Forward to exchange engine
-                        response = self.process_order(order)
-                        
-                        # Send response back to client
-                        self.send_to_client(client_socket, response)
-                        
-                    except json.JSONDecodeError as e:
-                        error_response = {"error": f"Invalid JSON: {e}"}
-                        self.send_to_client(client_socket, error_response)
-                    except Exception as e:
-                        error_response = {"error": f"Error processing order: {e}"}
-                        self.send_to_client(client_socket, error_response)
-                        
+
+                # The first byte selects JSON or the binary protocol
+                if protocol is None:
+                    protocol = connection.protocol = self.read_protocol(frames)
+
+                # Answer every complete message with one send
+                responses = self.handle_frames(client_address, protocol, frames, connection)
+                if responses:
+                    connection.send_now(responses)
+
         except Exception as e:
             print(f"Error handling client {client_address}: {e}")
         finally:
             # Clean up client connection
+            self.feed.remove(connection)
+            connection.close()
             try:
                 client_socket.close()
             except:
                 pass
             print(f"Connection with {client_address} closed")
 
-    def process_order(self, order: dict) -> dict:
+    def read_protocol(self, frames: FrameBuffer) -> str:
+        """
+        Consume the handshake byte (if any) of a new connection and
+        set the framing of its protocol.
+
+        Returns:
+            str: JSON or BINARY
+        """
+        protocol, handshake = read_handshake(frames.peek(1))
+        frames.skip(handshake)
+        if protocol == BINARY:
+            frames.set_framing(LENGTH_PREFIXED)
+        return protocol
+
+    def handle_frames(self, client_address, protocol: str, frames: FrameBuffer, connection=None) -> bytes:
+        """
+        Handle every complete message received so far.
+
+        Returns:
+            bytes: Encoded responses, in message order
+        """
+        if protocol == BINARY:
+            return b''.join(
+                self.handle_binary_message(client_address, frame, connection)
+                for frame in frames.frames()
+            )
+        return b''.join(
+            self.encode_message(self.handle_message(client_address, message, connection))
+            for message in frames.frames()
+        )
+
+    def handle_message(self, client_address, message, connection=None):
+        """
+        Decode one newline-delimited message and run it through the engine.
+
+        Parameters:
+            client_address: Client address tuple (for logging)
+            message (bytes | memoryview): One JSON message without its newline
+            connection (Connection | None): Connection the message came
+                from (receives the feed)
+
+        Returns:
+            dict | list: Response (a list for a batch of orders); the
+                client_order_id of a request is echoed in its response
+        """
+        try:
+            # Decode and parse JSON
+            order = json.loads(str(message, 'utf-8'))
+
+            # A JSON array is a batch of orders
+            if isinstance(order, list):
+                for item in order:
+                    log_received_order(client_address, item)
+                responses = self._process_batch(order, connection)
+                for item, response in zip(order, responses):
+                    self._echo_client_order_id(item, response)
+                return responses
+
+            log_received_order(client_address, order)
+
+            # Forward to exchange engine
+            return self._echo_client_order_id(order, self.handle_request(order, connection))
+
+        except json.JSONDecodeError as e:
+            return {"error": f"Invalid JSON: {e}"}
+        except Exception as e:
+            return {"error": f"Error processing order: {e}"}
+
+    def handle_binary_message(self, client_address, frame, connection=None) -> bytes:
+        """
+        Decode one binary protocol frame and run it through the engine.
+
+        Parameters:
+            client_address: Client address tuple (for logging)
+            frame (bytes | memoryview): Frame body (without its length prefix)
+            connection (Connection | None): Connection the frame came from
+
+        Returns:
+            bytes: Encoded response frame (ACK, REJECT or SUBSCRIPTION)
+        """
+        try:
+            client_order_id, order = decode_request(frame)
+        except ValueError as e:
+            return encode_reject(0, f"Invalid message: {e}")
+
+        log_received_order(client_address, order)
+
+        return encode_response(client_order_id, self.handle_request(order, connection))
+
+    def handle_request(self, order: dict, connection=None) -> dict:
+        """
+        Run one decoded request: subscriptions are answered by the
+        feed, everything else goes to the engine.
+
+        The connection is bound to the client_id of its first accepted
+        new order (and receives its execution reports); requests for
+        another client_id are rejected.
+        """
+        if order.get("action") in ("SUBSCRIBE", "UNSUBSCRIBE"):
+            return self.handle_subscription(order, connection)
+
+        error = self._client_error(connection, order)
+        if error is not None:
+            return error
+
+        return self.process_order(order, connection)
+
+    def handle_subscription(self, request: dict, connection=None) -> dict:
+        """
+        Subscribe a connection to (or unsubscribe it from) the trades
+        and book deltas of a symbol.
+
+        Returns:
+            dict: {"accepted", "symbol", "subscribed", "seq", "message"};
+                events sent afterwards are numbered from seq + 1
+        """
+        symbol = request.get("symbol", DEFAULT_SYMBOL)
+        if connection is None:
+            return {"error": "Subscriptions need a connection"}
+        if not is_valid_symbol(symbol):
+            return {"error": "Invalid symbol"}
+
+        if request["action"] == "SUBSCRIBE":
+            seq = self.feed.subscribe(connection, symbol)
+            return {
+                "accepted": True,
+                "symbol": symbol,
+                "subscribed": True,
+                "seq": seq,
+                "message": f"Subscribed to {symbol}"
+            }
+
+        seq = self.feed.unsubscribe(connection, symbol)
+        return {
+            "accepted": True,
+            "symbol": symbol,
+            "subscribed": False,
+            "seq": seq,
+            "message": f"Unsubscribed from {symbol}"
+        }
+
+    def _process_batch(self, orders: list, connection=None) -> list:
+        """
+        process_orders() for a batch received on a connection: orders
+        for another client_id than the connection's (or, on a connection
+        not bound yet, than the first one in the batch) are rejected.
+        """
+        client_id = connection.client_id if connection is not None else None
+        responses = [None] * len(orders)
+        batch = []
+        batch_indexes = []
+
+        for index, order in enumerate(orders):
+            if client_id is None and isinstance(order, dict):
+                client_id = order.get("client_id")
+            error = self._client_error(connection, order, client_id)
+            if error is not None:
+                responses[index] = error
+            else:
+                batch.append(order)
+                batch_indexes.append(index)
+
+        for index, response in zip(batch_indexes, self.process_orders(batch, connection)):
+            responses[index] = response
+        return responses
+
+    @staticmethod
+    def _client_error(connection, order, client_id=None):
+        """
+        Rejection of a request for another client_id than the one its
+        connection is bound to (client_id if given), or None.
+        """
+        if connection is None or not isinstance(order, dict):
+            return None
+        bound = client_id if client_id is not None else connection.client_id
+        requested = order.get("client_id")
+        if bound is None or requested is None or requested == bound:
+            return None
+        return {"error": f"Connection is bound to client_id {bound!r}"}
+
+    def _register_client(self, connection, order, response: dict) -> None:
+        """
+        Bind the connection to the client_id of an accepted new order.
+        Called before the order's outcome is published, so the
+        connection gets the execution reports of that order too.
+        """
+        if (
+            connection is not None
+            and isinstance(order, dict)
+            and order.get("action", "NEW") == "NEW"
+            and response.get("accepted")
+        ):
+            self.feed.register_client(connection, order.get("client_id"))
+
+    @staticmethod
+    def _echo_client_order_id(order, response: dict) -> dict:
+        """
+        Copy the client-assigned order ID of a request (if any) into
+        its response, so pipelining clients can match them up.
+        """
+        if isinstance(order, dict) and "client_order_id" in order:
+            response["client_order_id"] = order["client_order_id"]
+        return response
+
+    def lock_for(self, symbol: str) -> threading.Lock:
+        """
+        Return the lock serializing engine access for a symbol.
+        Locks are created on first use.
+        """
+        lock = self.symbol_locks.get(symbol)
+        if lock is None:
+            with self.lock:
+                lock = self.symbol_locks.setdefault(symbol, threading.Lock())
+        return lock
+
+    def process_order(self, order: dict, connection=None) -> dict:
         """
         Forward order to the exchange engine and get response.
-        Thread-safe execution using lock.
+        Thread-safe execution using the lock of the order's symbol.
+
+        The optional "action" field selects the engine call:
+            - "NEW" (default): place_order(order)
+            - "CANCEL": cancel_order(order["order_id"])
+            - "AMEND": amend_order(order["order_id"], quantity, price)
+            - "DEPTH": get_depth(symbol, order.get("levels", 5))
         
         Parameters:
             order (dict): Order details from client
+            connection (Connection | None): Connection the order came
+                from (bound to its client_id once accepted)
             
         Returns:
             dict: Engine response with:
@@ -162,14 +399,240 @@ class TCPServer:
             return {"error": "Engine not initialized"}
 
         try:
-            with self.lock:
-                response = self.engine.place_order(order)
-                return response
+            action = order.get("action", "NEW")
+            symbol = order.get("symbol", DEFAULT_SYMBOL)
+            # before lock_for()/instrument_for(): no per-symbol state for junk
+            if not is_valid_symbol(symbol):
+                return {"error": "Invalid symbol"}
+            order = self._to_engine_prices(order)
+
+            with self.lock_for(symbol):
+                if action == "CANCEL":
+                    touched = self._resting_levels(symbol, order["order_id"])
+                    response = self.engine.cancel_order(order["order_id"], symbol=symbol)
+                elif action == "DEPTH":
+                    return self._to_client_prices(
+                        symbol,
+                        self.engine.get_depth(symbol, order.get("levels", 5))
+                    )
+                elif action == "AMEND":
+                    touched = self._resting_levels(symbol, order["order_id"])
+                    side = touched[0][0] if touched else None
+                    response = self.engine.amend_order(
+                        order["order_id"],
+                        new_quantity=order.get("quantity"),
+                        new_price=order.get("price"),
+                        symbol=symbol
+                    )
+                    touched += self._resting_levels(symbol, order["order_id"])
+                    touched += self._traded_levels(side, response)
+                else:
+                    response = self.engine.place_order(order)
+                    touched = self._placed_levels(order, response)
+                    self._register_client(connection, order, response)
+
+                response = self._to_client_prices(symbol, response)
+                # published under the symbol lock: events leave in matching order
+                self._publish(symbol, response, touched)
+
+            return response
 
         except Exception as e:
             return {"error": f"Engine error: {e}"}
 
 
+    def process_orders(self, orders: list, connection=None) -> list:
+        """
+        Forward a batch of new orders to the engine in a single call.
+
+        The locks of every symbol in the batch are taken once, in sorted
+        order (so concurrent batches cannot deadlock), and the whole
+        batch goes through engine.place_orders().
+
+        Parameters:
+            orders (list[dict]): Order details from client
+            connection (Connection | None): Connection the orders came
+                from (bound to their client_id once accepted)
+
+        Returns:
+            list[dict]: One response per order, in the same order.
+        """
+        if not self.engine:
+            return [{"error": "Engine not initialized"} for _ in orders]
+
+        responses = [None] * len(orders)
+        batch = []
+        batch_indexes = []
+
+        for index, order in enumerate(orders):
+            try:
+                if not is_valid_symbol(order.get("symbol", DEFAULT_SYMBOL)):
+                    raise ValueError("Invalid symbol")
+                batch.append(self._to_engine_prices(order))
+                batch_indexes.append(index)
+            except Exception as e:
+                responses[index] = {"error": f"Error processing order: {e}"}
+
+        symbols = sorted({order.get("symbol", DEFAULT_SYMBOL) for order in batch})
+
+        try:
+            with ExitStack() as stack:
+                for symbol in symbols:
+                    stack.enter_context(self.lock_for(symbol))
+                batch_responses = self.engine.place_orders(batch)
+
+                # the batch is published after matching all of it: resting
+                # orders are in their final state, minus fills still to come
+                pending_fills = Counter()
+                if self.feed.active():
+                    for response in batch_responses:
+                        for trade in response.get("trades") or []:
+                            pending_fills[trade["buy_order_id"]] += trade["quantity"]
+                            pending_fills[trade["sell_order_id"]] += trade["quantity"]
+
+                for index, order, response in zip(batch_indexes, batch, batch_responses):
+                    symbol = order.get("symbol", DEFAULT_SYMBOL)
+                    touched = self._placed_levels(order, response)
+                    self._register_client(connection, order, response)
+                    responses[index] = self._to_client_prices(symbol, response)
+                    self._publish(symbol, responses[index], touched, pending_fills)
+
+        except Exception as e:
+            return [{"error": f"Engine error: {e}"} for _ in orders]
+
+        return responses
+
+    def _resting_levels(self, symbol: str, order_id) -> list:
+        """
+        (side, tick price) of the level a resting order sits on, as a
+        one-item list (empty if the order is not resting).
+        """
+        if not hasattr(self.engine, "find_order_book"):
+            return []
+        book = self.engine.find_order_book(symbol)
+        resting = book.get_order(order_id) if book is not None else None
+        if resting is None:
+            return []
+        return [(resting.side, resting.price)]
+
+    @staticmethod
+    def _traded_levels(side: str, response: dict) -> list:
+        """
+        (side, tick price) of the resting levels hit by the trades of
+        an order on the given side.
+        """
+        opposite = "SELL" if side == "BUY" else "BUY"
+        return [(opposite, trade["price"]) for trade in response.get("trades") or []]
+
+    def _placed_levels(self, order: dict, response: dict) -> list:
+        """
+        Levels changed by a new order: those its trades consumed and,
+        for a limit order left resting, its own.
+        """
+        if "error" in response or not response.get("accepted"):
+            return []
+
+        side = str(order.get("side", "")).upper()
+        levels = self._traded_levels(side, response)
+        if response.get("remaining_quantity") and order.get("price") is not None:
+            levels.append((side, order["price"]))
+        return levels
+
+    def _publish(self, symbol: str, response: dict, touched: list, pending_fills: Counter = None) -> None:
+        """
+        Push the outcome of one engine call to the feed: an execution
+        report per trade side, the trades, and the new aggregate of
+        every touched level. Called with the symbol lock held.
+
+        Execution reports carry the leaves of the order after each fill.
+        pending_fills (order_id -> quantity), given for a batch, holds
+        the fills of the batch not published yet; it is counted down.
+        """
+        if not self.feed.active() or "error" in response:
+            return
+
+        book = self.engine.order_books.get(symbol)
+        if book is None:
+            return
+        instrument = self.engine.instrument_for(symbol)
+
+        trades = response.get("trades") or []
+        aggressor_id = response.get("order_id")
+        # leaves of the aggressor before its first fill, counted down per trade
+        aggressor_remaining = response.get("remaining_quantity", 0) + sum(
+            trade["quantity"] for trade in trades
+            if aggressor_id in (trade["buy_order_id"], trade["sell_order_id"])
+        )
+
+        executions = []
+        for trade in trades:
+            for side, order_id, client_id in (
+                ("BUY", trade["buy_order_id"], trade["buy_client_id"]),
+                ("SELL", trade["sell_order_id"], trade["sell_client_id"])
+            ):
+                if pending_fills is not None:
+                    pending_fills[order_id] -= trade["quantity"]
+                if order_id == aggressor_id:
+                    aggressor_remaining -= trade["quantity"]
+                    remaining_quantity = aggressor_remaining
+                else:
+                    resting = book.get_order(order_id)
+                    remaining_quantity = resting.remaining_quantity if resting is not None else 0
+                    if pending_fills is not None:
+                        remaining_quantity += pending_fills[order_id]
+                executions.append((client_id, order_id, side, remaining_quantity, trade))
+
+        levels = []
+        for side, price in dict.fromkeys(touched):
+            level = book.level(side, price)
+            level["side"] = side
+            level["price"] = instrument.to_price(price)
+            levels.append(level)
+
+        self.feed.publish(symbol, executions, trades, levels)
+
+    def _to_engine_prices(self, order: dict) -> dict:
+        """
+        Convert the client price of an incoming message into integer ticks.
+
+        The engine works exclusively in ticks; this is the only place
+        where client prices are converted on the way in.
+        Market orders (and price 0) carry no price.
+        """
+        price = order.get("price")
+        if price is None or not hasattr(self.engine, "instrument_for"):
+            return order
+
+        instrument = self.engine.instrument_for(order.get("symbol", DEFAULT_SYMBOL))
+
+        order = dict(order)
+        if order.get("order_type") == "MARKET" or price == 0:
+            order["price"] = None
+        else:
+            order["price"] = instrument.to_ticks(price)
+        return order
+
+    def _to_client_prices(self, symbol: str, response: dict) -> dict:
+        """
+        Convert tick prices in an engine response back into client prices.
+        """
+        if not hasattr(self.engine, "instrument_for"):
+            return response
+
+        instrument = self.engine.instrument_for(symbol)
+
+        for trade in response.get("trades") or []:
+            trade["price"] = instrument.to_price(trade["price"])
+
+        for key in ("bids", "asks"):
+            for level in response.get(key) or []:
+                level["price"] = instrument.to_price(level["price"])
+
+        for key in ("best_bid", "best_ask", "spread"):
+            if response.get(key) is not None:
+                response[key] = instrument.to_price(response[key])
+        return response
+
     def send_to_client(self, client_socket, message: dict):
         """
         Send a dictionary message to the connected client.
@@ -181,13 +644,18 @@ class TCPServer:
         """
         try:
             # Serialize to JSON and send
-            json_message = json.dumps(message, default=str)
-            client_socket.sendall(json_message.encode('utf-8'))
-            client_socket.sendall(b'\n')  # Message delimiter
-            
+            client_socket.sendall(self.encode_message(message))
+
         except Exception as e:
             print(f"Error sending to client: {e}")
 
+    @staticmethod
+    def encode_message(message) -> bytes:
+        """
+        Serialize a message as one newline-delimited JSON line.
+        """
+        return json.dumps(message, default=str).encode('utf-8') + b'\n'
+
     def stop_server(self):
         """
         Stop the server and gracefully close all client sockets.
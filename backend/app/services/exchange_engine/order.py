@@ -1,11 +1,46 @@
+import sys
+
+from engine.instrument import DEFAULT_SYMBOL
+from utils.time_utils import to_timestamp_ns
+
+
+def _intern(value):
+    """
+    Intern repeated identifier strings (user, client_id, symbol, ...)
+    so that many orders from the same client share one string object.
+    """
+    return sys.intern(value) if type(value) is str else value
+
+
 class Order:
     """
     Represents a single limit or market order in the exchange.
 
     An Order is immutable in terms of price/side after creation.
     Only quantity-related fields and status may change during matching.
+
+    Prices are integer numbers of ticks (see Instrument); conversion
+    from and to client prices happens at the networking boundary.
+
+    Orders use __slots__ instead of a per-instance __dict__: a resting
+    order is then a fixed-size record, which cuts memory per order and
+    makes attribute access in the matching loop cheaper.
     """
 
+    __slots__ = (
+        "order_id",
+        "client_id",
+        "user",
+        "side",
+        "price",
+        "quantity",
+        "remaining_quantity",
+        "timestamp",
+        "order_type",
+        "symbol",
+        "status",
+    )
+
     def __init__(
         self,
         order_id,
@@ -13,9 +48,10 @@ class Order:
         user: str,
         side: str,
         quantity: int,
-        price: float | None,
-        timestamp: float,
-        order_type: str = "LIMIT"
+        price: int | None,
+        timestamp: int,
+        order_type: str = "LIMIT",
+        symbol: str = DEFAULT_SYMBOL
     ):
         """
         Initialize a new order.
@@ -25,21 +61,24 @@ class Order:
             user (str): User who placed the order
             side (str): "BUY" or "SELL"
             quantity (int): Total quantity requested
-            price (float | None): Limit price (None for market orders)
-            timestamp (float): Order creation time
+            price (int | None): Limit price in ticks (None for market orders)
+            timestamp (int): Order creation time in nanoseconds
             order_type (str): "LIMIT" or "MARKET"
+            symbol (str): Instrument the order trades
         """
         self.order_id = order_id
-        self.client_id = client_id
-        self.user = user
-        self.side = side
+        self.client_id = _intern(client_id)
+        self.user = _intern(user)
+        self.side = _intern(side)
         self.price = price
         self.quantity = quantity
         self.remaining_quantity = quantity
         self.timestamp = timestamp
-        self.order_type = order_type
+        self.order_type = _intern(order_type)
+        self.symbol = _intern(symbol)
 
         # Order status: NEW -> PARTIALLY_FILLED -> FILLED
+        # A resting order may also end as CANCELLED.
         self.status = "NEW"
 
     def apply_fill(self, filled_quantity: int):
@@ -77,15 +116,23 @@ class Order:
             return False 
         
     
+    def cancel(self):
+        """
+        Mark the order as cancelled.
+
+        remaining_quantity is left untouched so that the cancelled
+        quantity can still be reported back to the client.
+        """
+        self.status = "CANCELLED"
 
     def is_active(self) -> bool:
         """
         Check if the order can still be matched.
 
         Returns:
-            bool: True if order is not fully filled
+            bool: True if order is not fully filled or cancelled
         """
-        if self.remaining_quantity != 0:
+        if self.remaining_quantity != 0 and self.status != "CANCELLED":
             return True 
         else: 
             return False
@@ -103,9 +150,24 @@ class Order:
 
         This method exposes internal state
         without leaking behavior.
+
+        A new dictionary is returned on every call, so callers may
+        modify it freely without touching the live order.
         """
         
-        return self.__dict__
+        return {
+            "order_id": self.order_id,
+            "client_id": self.client_id,
+            "user": self.user,
+            "side": self.side,
+            "price": self.price,
+            "quantity": self.quantity,
+            "remaining_quantity": self.remaining_quantity,
+            "timestamp": self.timestamp,
+            "order_type": self.order_type,
+            "symbol": self.symbol,
+            "status": self.status,
+        }
         
 
     @classmethod
@@ -128,14 +190,51 @@ class Order:
             side=data["side"],
             quantity=data["quantity"],
             price=data["price"],
-            timestamp=data["timestamp"],
-            order_type=data["order_type"]
+            timestamp=to_timestamp_ns(data["timestamp"]),
+            order_type=data["order_type"],
+            symbol=data.get("symbol", DEFAULT_SYMBOL)
         )
 
         order.remaining_quantity = data["remaining_quantity"]
         order.status = data["status"]
         return order
 
+    @classmethod
+    def from_record(
+        cls,
+        order_id,
+        client_id,
+        user,
+        side,
+        price,
+        quantity,
+        remaining_quantity,
+        timestamp,
+        order_type,
+        symbol,
+        status
+    ):
+        """
+        Build an Order straight from decoded snapshot fields.
+
+        Skips __init__ and string interning: bulk loaders pass strings
+        from an already interned string table, and this is called once
+        per resting order on startup.
+        """
+        order = cls.__new__(cls)
+        order.order_id = order_id
+        order.client_id = client_id
+        order.user = user
+        order.side = side
+        order.price = price
+        order.quantity = quantity
+        order.remaining_quantity = remaining_quantity
+        order.timestamp = timestamp
+        order.order_type = order_type
+        order.symbol = symbol
+        order.status = status
+        return order
+
     def __repr__(self) -> str:
         """
         Developer-friendly string representation of the order.
@@ -151,12 +250,13 @@ class Order:
         f"price={self.price}, "
         f"status={self.status!r}, "
         f"timestamp={self.timestamp}, "
-        f"order_type={self.order_type!r})")
+        f"order_type={self.order_type!r}, "
+        f"symbol={self.symbol!r})")
 
 import time
 # testing 
 if __name__ == "__main__":
-    od = Order(order_id=12, user="Bhavesh", client_id="cl_1233fds", side="BUY", quantity=10, price=98.4, timestamp=time.time(), order_type="LIMIT")
+    od = Order(order_id=12, user="Bhavesh", client_id="cl_1233fds", side="BUY", quantity=10, price=984, timestamp=time.time_ns(), order_type="LIMIT")
     od.apply_fill(1)
 
     print(od.is_active())
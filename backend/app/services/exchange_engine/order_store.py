@@ -5,6 +5,10 @@ from utils.serialization import *
 from engine.order import Order
 
 
+# Order IDs must fit a signed 64-bit integer (binary snapshots, SQLite).
+MAX_ORDER_ID = (1 << 63) - 1
+
+
 class OrderStore:
     """
     Handles persistence of active orders to disk and recovery on engine startup.
@@ -20,6 +24,10 @@ class OrderStore:
     - Interact with sockets or clients
     """
 
+    # JSON snapshots are not guaranteed to be in price-time priority
+    # (older ones were not), so restore sorts them by timestamp
+    preserves_priority = False
+
     def __init__(self, filepath: str = "storage/orders_snapshot.json"):
         """
         Initialize the OrderStore.
@@ -29,8 +37,12 @@ class OrderStore:
                             persisting active orders.
         """
         self.filepath = filepath
+        # ID sequencer high-water marks found by the last load()
+        self.sequencer_state = None
+        # seq of the last journal event covered by the loaded snapshot
+        self.journal_seq = 0
 
-    def save(self, orders: List[Order]):
+    def save(self, orders: List[Order], sequencer_state: dict = None, journal_seq: int = None):
         """
         Persist active orders to disk.
 
@@ -39,18 +51,30 @@ class OrderStore:
 
         Behavior:
         - Serialize only active orders (NEW or PARTIALLY_FILLED)
-        - Write them as a snapshot to disk
-        - Overwrite existing snapshot atomically
+        - Write them with write_snapshot()
+
+        An empty book is saved too: skipping it would leave an older
+        snapshot behind and resurrect its orders on the next start.
         """
-        if not orders:
-            return
-        
         active_orders = [
             self.serialize_order(order)
             for order in orders
             if order.status in ("NEW", "PARTIALLY_FILLED")
         ]
-    
+        self.write_snapshot(active_orders, sequencer_state, journal_seq)
+
+    def write_snapshot(self, records: List[dict], sequencer_state: dict = None, journal_seq: int = None):
+        """
+        Write already serialized orders as the new snapshot.
+
+        Used directly by background snapshots, which serialize the
+        orders themselves off the matching thread.
+
+        Behavior:
+        - Record the ID sequencer high-water marks, if given
+        - Record the seq of the last journal event the snapshot covers
+        - Replace the existing snapshot atomically (temp file + rename)
+        """
         # ensure the directory should exist.
         directory = os.path.dirname(self.filepath)
         if directory:
@@ -58,10 +82,14 @@ class OrderStore:
         
         snapshot = {
             "version": 1,
-            "orders": active_orders
+            "orders": records
         }
+        if sequencer_state is not None:
+            snapshot["sequencer"] = sequencer_state
+        if journal_seq is not None:
+            snapshot["journal_seq"] = journal_seq
 
-        save_json(self.filepath, snapshot)
+        save_json_atomic(self.filepath, snapshot)
     
 
     def load(self) -> List[Order]:
@@ -75,22 +103,58 @@ class OrderStore:
         - Read snapshot file if it exists
         - Deserialize stored data
         - Reconstruct Order objects
+        - Remember the ID sequencer high-water marks in sequencer_state
+          and the covered journal position in journal_seq
         - Return empty list if no snapshot exists
         """
-        
+        self.sequencer_state = None
+        self.journal_seq = 0
+
         if not os.path.exists(self.filepath):
             return []
         
         data = load_json(self.filepath)
         # print(f"this is {data}") # this is only for debugging purpose.
         order_data = data.get("orders", [])
+        self.sequencer_state = data.get("sequencer")
+        self.journal_seq = data.get("journal_seq", 0)
 
         orders : List[Order] = []
 
         for order_dict in order_data:
             orders.append(self.deserialize_order(order_dict))
+        self._renumber_oversized_ids(orders)
         return orders
 
+    def _renumber_oversized_ids(self, orders: List[Order]) -> None:
+        """
+        Give a new ID to every order whose ID does not fit MAX_ORDER_ID.
+
+        Snapshots written before the IdSequencer hold 128-bit uuid4 IDs,
+        which no other store can persist. New IDs continue the snapshot's
+        order sequence, skipping IDs already in use, and the sequence in
+        sequencer_state moves past them so they are never issued again.
+        """
+        oversized = [
+            order for order in orders
+            if isinstance(order.order_id, int) and not 0 < order.order_id <= MAX_ORDER_ID
+        ]
+        if not oversized:
+            return
+
+        taken = {order.order_id for order in orders}
+        state = dict(self.sequencer_state or {})
+        sequence = state.get("last_order_seq", 0)
+        for order in oversized:
+            sequence += 1
+            while sequence in taken:
+                sequence += 1
+            order.order_id = sequence
+
+        state["last_order_seq"] = sequence
+        self.sequencer_state = state
+        print(f"[ORDER STORE] Renumbered {len(oversized)} orders with IDs wider than 64 bits in {self.filepath}")
+
 
     def serialize_order(self, order: Order) -> dict:
         """
@@ -1,16 +1,46 @@
-import heapq
 from engine.trade import Trade
 from engine.order import Order
-from utils.logger import *
-from utils.time_utils import generate_timestamp
+from engine.book_side import BookSide
+from engine.instrument import DEFAULT_SYMBOL
+from utils.clock import SystemClock
 from utils.id_generators import generate_trade_id
+from utils.memory import deep_sizeof
+import gc
 import time
 class OrderBook:
-    def __init__(self, order_store=None):
+    """
+    Price-level ladder order book.
+
+    Each side of the book is a BookSide: a mapping of price -> PriceLevel
+    (a FIFO queue of orders with a running total quantity) plus a sorted
+    index of prices whose last element is the best price.
+
+    Matching walks the opposite side level by level, so its cost depends
+    on the number of price levels and orders it actually touches, not on
+    the total number of resting orders.
+
+    Every resting order is also indexed by order_id, so cancels and
+    amends find their order in O(1) and unlink it lazily from its level.
+    """
+
+    def __init__(self, order_store=None, symbol: str = DEFAULT_SYMBOL, id_sequencer=None, clock=None):
+        # instrument traded in this book
+        self.symbol = symbol
+        # source of trade IDs, normally the engine's IdSequencer
+        self.id_sequencer = id_sequencer
+        # source of trade timestamps, normally the engine's Clock
+        self.clock = clock or SystemClock()
         # this will store the pending orders
-        self.buy_orders = []
+        self.buy_orders = BookSide("BUY")
         self.order_store = order_store
-        self.sell_orders = []
+        self.sell_orders = BookSide("SELL")
+        # order_id -> resting Order
+        self.order_index = {}
+        # seq of the last journal event reflected in the book
+        self.journal_seq = 0
+        # id(order) -> pre-image dict while a background snapshot is
+        # being written (see capture_snapshot), otherwise None
+        self._snapshot_preimages = None
     
     def add_buy_orders(self, order):
         """
@@ -18,11 +48,8 @@ class OrderBook:
         return true if order is successfully added else return false
         """
         if order.side == "BUY":
-
-            heapq.heappush(
-                self.buy_orders,
-                (-order.price, order.timestamp, order)
-            )
+            self.buy_orders.add(order)
+            self.order_index[order.order_id] = order
             return True
         else:
             return False
@@ -33,136 +60,120 @@ class OrderBook:
         return true if order is successfully added else return false
         """
         if order.side == "SELL":
-            heapq.heappush(
-                self.sell_orders,
-                (order.price, order.timestamp, order)
-            )
+            self.sell_orders.add(order)
+            self.order_index[order.order_id] = order
             return True
         else:
             return False
-    
-    def _match_limit_buy(self, incoming_order):
+
+    def _match_against(self, incoming_order, book_side, limit_price=None):
         """
-        Match an incoming BUY limit order against the sell order book
-        using price-time priority.
-        The function continuously matches the incoming BUY order with the
-        best available SELL orders (lowest price, earliest timestamp) as long as:
-          - The incoming order has remaining quantity, and
-          - The best sell price is less than or equal to the buy price.
+        Match an incoming order against one side of the book using
+        price-time priority.
+
+        Levels are consumed from the best price outwards and, within a
+        level, orders are filled in FIFO order. Matching stops when:
+          - The incoming order is fully filled, or
+          - The opposite side is empty, or
+          - The best opposite price no longer crosses limit_price
+            (limit_price is None for market orders).
+
         For each successful match:
-          - A trade is executed at the sell order price
-          - Order quantities are updated
-          - Fully filled sell orders are removed from the order book
-          - A Trade object is created and recorded
+          - A trade is executed at the resting order's price
+          - Order quantities and the level total are updated
+          - Fully filled resting orders are removed from the level
+          - Empty levels are removed from the ladder
+
         Parameters:
-            incoming_order (Order): The incoming BUY limit order to be matched.
+            incoming_order (Order): The incoming order to be matched.
+            book_side (BookSide): The opposite side of the book.
+            limit_price: Worst acceptable price, or None for market orders.
+
         Returns:
-            list[Trade]: A list of Trade objects generated from the matching
-            process. The list may be empty if no matches occur.
+            list[Trade]: Trades generated while matching (may be empty).
         """
         trades = []
-        # print(self.buy_orders, self.sell_orders)
-        while incoming_order.remaining_quantity > 0 and self.sell_orders: 
-            # get the best sell order
-            
-            best_sell_price, best_sell_timestamp, best_sell_order  = self.sell_orders[0]
-            if best_sell_price <= incoming_order.price:
-                
-                #get the trade quantity
-                trade_quantity = min(best_sell_order.remaining_quantity, incoming_order.remaining_quantity)
+        is_buy = incoming_order.side == "BUY"
+        next_trade_id = (
+            self.id_sequencer.next_trade_id if self.id_sequencer else generate_trade_id
+        )
+        # every trade of one incoming order executes at the same instant
+        match_timestamp = self.clock.now_ns()
+
+        while incoming_order.remaining_quantity > 0:
+            level = book_side.best_level()
+            if level is None:
+                break
+
+            if limit_price is not None:
+                if is_buy and level.price > limit_price:
+                    break
+                if not is_buy and level.price < limit_price:
+                    break
+
+            while incoming_order.remaining_quantity > 0 and not level.is_empty():
+                resting_order = level.head()
+
+                # get the trade quantity
+                trade_quantity = min(resting_order.remaining_quantity, incoming_order.remaining_quantity)
+
                 # apply fill to update the remaining_quantity.
+                if self._snapshot_preimages is not None:
+                    self._preserve(resting_order)
                 incoming_order.apply_fill(trade_quantity)
-                best_sell_order.apply_fill(trade_quantity)
-                
-                # get the current timestamp
-                curr_timestamp = generate_timestamp()
-                
-                #creation of Trade of object
-                trade = Trade(
-                              trade_id=generate_trade_id(),
-                            buy_order_id=best_sell_order.order_id,
-                              sell_order_id=best_sell_order.order_id,
-                              buy_client_id=incoming_order.client_id,
-                              sell_client_id=best_sell_order.client_id,
-                              price=best_sell_price,
-                              quantity=trade_quantity,
-                              timestamp=curr_timestamp)
-                
-                #appending that object in the trades array
-                trades.append(trade)
+                resting_order.apply_fill(trade_quantity)
+                level.reduce(trade_quantity)
+
+                if is_buy:
+                    buy_order, sell_order = incoming_order, resting_order
+                else:
+                    buy_order, sell_order = resting_order, incoming_order
+
+                trades.append(
+                    Trade(
+                        trade_id=next_trade_id(),
+                        buy_order_id=buy_order.order_id,
+                        sell_order_id=sell_order.order_id,
+                        buy_client_id=buy_order.client_id,
+                        sell_client_id=sell_order.client_id,
+                        price=level.price,
+                        quantity=trade_quantity,
+                        timestamp=match_timestamp,
+                        symbol=self.symbol
+                    )
+                )
+
                 # remove the order
-                if best_sell_order.remaining_quantity == 0:
-                    heapq.heappop(self.sell_orders)
-                
-            else:
-                break
+                if resting_order.remaining_quantity == 0:
+                    level.pop_head()
+                    del self.order_index[resting_order.order_id]
+
+            if level.is_empty():
+                book_side.pop_best_level()
+
         return trades
-            
 
-    
-    def _match_limit_sell(self, incoming_order):
+    def _match_limit_buy(self, incoming_order):
         """
-        Match an incoming SELL limit order against the buy order book
-        using price-time priority.
-
-        The function continuously matches the incoming SELL order with the
-        best available BUY orders (highest price, earliest timestamp) as long as:
-        - The incoming order has remaining quantity, and
-        - The best buy price is greater than or equal to the sell price.
+        Match an incoming BUY limit order against the SELL side
+        (lowest price, earliest timestamp first) while the best ask
+        is less than or equal to the buy price.
 
-        For each successful match:
-        - A trade is executed at the buy order price
-        - Order quantities are updated
-        - Fully filled buy orders are removed from the order book
-        - A Trade object is created and recorded
+        Returns:
+            list[Trade]: Trades generated from the matching process.
+        """
+        return self._match_against(incoming_order, self.sell_orders, incoming_order.price)
 
-        Parameters:
-            incoming_order (Order): The incoming SELL limit order to be matched.
+    def _match_limit_sell(self, incoming_order):
+        """
+        Match an incoming SELL limit order against the BUY side
+        (highest price, earliest timestamp first) while the best bid
+        is greater than or equal to the sell price.
 
         Returns:
-            list[Trade]: A list of Trade objects generated from the matching
-            process. The list may be empty if no matches occur.
-
+            list[Trade]: Trades generated from the matching process.
         """
-        trades = []
-        while incoming_order.remaining_quantity > 0 and self.buy_orders:
-            # print("Something is happening.")
-            best_buy_price, best_buy_timestamp, best_buy_order = self.buy_orders[0]
-            best_buy_price = -1 * best_buy_price
-            if best_buy_price >= incoming_order.price:
-                
-                # get the trade quantity
-                trade_quantity = min(best_buy_order.remaining_quantity, incoming_order.remaining_quantity)
-                
-                #this statements will be replaced with the methods(function) calls in the order.py
-                # incoming_order.remaining_quantity -= trade_quantity
-                # best_buy_order.remaining_quantity -= trade_quantity
-                incoming_order.apply_fill(trade_quantity)
-                best_buy_order.apply_fill(trade_quantity)
-                
-                # get the current timestamp
-                curr_timestamp = generate_timestamp()
-                
-                #creation of Trade of object
-                trade = Trade(buy_order_id=best_buy_order.order_id,
-                              trade_id=generate_trade_id(),
-                              buy_client_id=best_buy_order.client_id,
-                              sell_client_id=incoming_order.client_id,
-                              sell_order_id=incoming_order.order_id,
-                              price=best_buy_price,
-                              quantity=trade_quantity,
-                              timestamp=curr_timestamp)
-                
-                #appending that object in the trades array
-                trades.append(trade)
-                
-                # remove the order
-                if best_buy_order.remaining_quantity == 0:
-                    heapq.heappop(self.buy_orders)
-                
-            else:
-                break
-        return trades
+        return self._match_against(incoming_order, self.buy_orders, incoming_order.price)
     
     def process_limit_orders(self, incoming_order):
         """
@@ -173,21 +184,218 @@ class OrderBook:
         Returns:
             list[Trade]: Trades generated during matching
         """
-        # print("the call is gone to the process limit orders.")
+        trades = []
         if incoming_order.side == "BUY":
-            trades = self._match_limit_sell(incoming_order)
+            trades = self._match_limit_buy(incoming_order)
             if incoming_order.remaining_quantity > 0:
                 self.add_buy_orders(incoming_order)
         
         elif incoming_order.side == "SELL":
-            trades = self._match_limit_buy(incoming_order)
+            trades = self._match_limit_sell(incoming_order)
             if incoming_order.remaining_quantity > 0:
                 self.add_sell_orders(incoming_order)
         
         
         return trades
     
-    @staticmethod
+    def best_bid(self):
+        """
+        Highest resting BUY price in ticks, or None if there are no bids.
+        """
+        return self.buy_orders.best_price()
+
+    def best_ask(self):
+        """
+        Lowest resting SELL price in ticks, or None if there are no asks.
+        """
+        return self.sell_orders.best_price()
+
+    def spread(self):
+        """
+        Difference between best ask and best bid in ticks.
+        None unless both sides have resting orders.
+        """
+        best_bid = self.best_bid()
+        best_ask = self.best_ask()
+        if best_bid is None or best_ask is None:
+            return None
+        return best_ask - best_bid
+
+    def depth(self, levels: int = 5) -> dict:
+        """
+        Level 2 view of the book: the best `levels` price levels per side
+        with their aggregated quantity and order count.
+
+        Level aggregates are maintained on every add, fill, cancel and
+        amend, so this costs O(levels), never a scan of the whole book.
+
+        Returns:
+            dict:
+                {
+                    "symbol": str,
+                    "bids": [{"price", "quantity", "orders"}, ...],
+                    "asks": [{"price", "quantity", "orders"}, ...]
+                }
+        """
+        return {
+            "symbol": self.symbol,
+            "bids": self.buy_orders.depth(levels),
+            "asks": self.sell_orders.depth(levels)
+        }
+
+    def level(self, side: str, price) -> dict:
+        """
+        Aggregate of one price level, O(1).
+
+        Parameters:
+            side (str): "BUY" or "SELL"
+            price (int): Price in ticks
+
+        Returns:
+            dict: {"price", "quantity", "orders"} (zeros once the level
+            is gone)
+        """
+        book_side = self.buy_orders if side == "BUY" else self.sell_orders
+        level = book_side.levels.get(price)
+        if level is None:
+            return {"price": price, "quantity": 0, "orders": 0}
+        return {"price": price, "quantity": level.total_quantity, "orders": len(level)}
+
+    def memory_usage(self) -> dict:
+        """
+        Approximate memory held by the resting orders of this book,
+        including the price ladders and the order index.
+
+        Walks every resting order, so it is meant for diagnostics and
+        benchmarks, never for the matching path.
+
+        Returns:
+            dict:
+                {
+                    "orders": int,
+                    "total_bytes": int,
+                    "bytes_per_order": float
+                }
+        """
+        orders = len(self.order_index)
+        total_bytes = deep_sizeof([self.buy_orders, self.sell_orders, self.order_index])
+
+        return {
+            "orders": orders,
+            "total_bytes": total_bytes,
+            "bytes_per_order": total_bytes / orders if orders else 0.0
+        }
+
+    def _side_of(self, order) -> BookSide:
+        """
+        Return the book side an order rests on.
+        """
+        return self.buy_orders if order.side == "BUY" else self.sell_orders
+
+    def get_order(self, order_id):
+        """
+        Return the resting order with this id, or None.
+        """
+        return self.order_index.get(order_id)
+
+    def cancel_order(self, order_id):
+        """
+        Cancel a resting order.
+
+        The order is found through the order index, marked CANCELLED and
+        left in its price level as a tombstone (see PriceLevel.remove),
+        so a cancel costs O(1) apart from dropping a level that became
+        empty.
+
+        Returns:
+            Order | None: The cancelled order, or None if no resting
+            order has this id.
+        """
+        order = self.order_index.pop(order_id, None)
+        if order is None:
+            return None
+
+        book_side = self._side_of(order)
+        level = book_side.levels[order.price]
+
+        if self._snapshot_preimages is not None:
+            self._preserve(order)
+        order.cancel()
+        level.remove(order)
+
+        if level.is_empty():
+            book_side.remove_level(order.price)
+
+        return order
+
+    def amend_order(self, order_id, new_quantity=None, new_price=None, timestamp=None):
+        """
+        Amend the quantity and/or price of a resting order.
+
+        new_quantity is the new total quantity of the order, including
+        anything already filled.
+
+        Rules:
+        - A pure quantity reduction is applied in place and keeps the
+          order's time priority.
+        - A price change or a quantity increase loses time priority:
+          the order is cancelled and a replacement with the same
+          order_id is processed as a new limit order at `timestamp`.
+          The replacement may trade immediately if it crosses the book.
+
+        Raises:
+            ValueError: if new_quantity does not exceed the filled quantity
+
+        Returns:
+            tuple:
+                (
+                    order: Order | None (None if no resting order has this id),
+                    trades: list[Trade]
+                )
+        """
+        order = self.order_index.get(order_id)
+        if order is None:
+            return None, []
+
+        filled_quantity = order.quantity - order.remaining_quantity
+
+        if new_quantity is None:
+            new_quantity = order.quantity
+        if new_price is None:
+            new_price = order.price
+
+        if new_quantity <= filled_quantity:
+            raise ValueError("New quantity must exceed the already filled quantity")
+
+        # Quantity reduction at the same price keeps time priority.
+        if new_price == order.price and new_quantity <= order.quantity:
+            reduction = order.quantity - new_quantity
+            if self._snapshot_preimages is not None:
+                self._preserve(order)
+            order.quantity = new_quantity
+            order.remaining_quantity -= reduction
+            self._side_of(order).levels[order.price].reduce(reduction)
+            return order, []
+
+        self.cancel_order(order_id)
+
+        replacement = Order(
+            order_id=order.order_id,
+            client_id=order.client_id,
+            user=order.user,
+            side=order.side,
+            quantity=new_quantity,
+            price=new_price,
+            timestamp=timestamp if timestamp is not None else order.timestamp,
+            order_type=order.order_type,
+            symbol=order.symbol
+        )
+        replacement.remaining_quantity = new_quantity - filled_quantity
+        replacement.status = "PARTIALLY_FILLED" if filled_quantity else "NEW"
+
+        trades = self.process_limit_orders(replacement)
+        return replacement, trades
+
     def to_dict(self) -> dict:
         """
         Convert the entire order book into a plain Python dictionary.
@@ -201,10 +409,10 @@ class OrderBook:
         """
         return {
             "buy_orders": [
-                order.to_dict() for (_, _, order) in self.buy_orders
+                order.to_dict() for order in self.buy_orders.iter_orders()
             ],
             "sell_orders": [
-                order.to_dict() for (_, _, order) in self.sell_orders
+                order.to_dict() for order in self.sell_orders.iter_orders()
             ]
         }
 
@@ -229,126 +437,46 @@ class OrderBook:
 
     def _match_market_buy(self, incoming_order):
         """
-        Match an incoming buy limit order against the sell order book
-        using price-time priority.
-
-        The function continuously excutes the incoming buy order with the
-        current available BUY orders (highest price, earliest timestamp) as long as:
-        - The incoming order has remaining quantity
+        Match an incoming BUY market order against the SELL side,
+        sweeping price levels from the best ask outwards until the
+        order is filled or the side is empty.
         
         Returns: 
             list[Trade]: Trades generated during running of this function
         """
-
-        trades = []
-
-        while incoming_order.remaining_quantity > 0 and self.sell_orders:
-            best_sell_price, best_sell_timestamp, best_sell_order = self.sell_orders[0]
-            trade_quantity = min(best_sell_order.remaining_quantity, incoming_order.remaining_quantity)
-
-            # this statements will be replaced with the methods(function) calls in the order.py class
-            # incoming_order.remaining_quantity -= trade_quantity
-            # best_sell_order.remaining_quantity -= trade_quantity
-            
-            incoming_order.apply_fill(trade_quantity)
-            best_sell_order.apply_fill(trade_quantity)
-            
-            # get the current timestamp
-            curr_timestamp = generate_timestamp()
-            
-            #creation of Trade of object
-            trade = Trade(
-                              trade_id=generate_trade_id(),
-                            buy_order_id=best_sell_order.order_id,
-                              sell_order_id=best_sell_order.order_id,
-                              buy_client_id=incoming_order.client_id,
-                              sell_client_id=best_sell_order.client_id,
-                              price=best_sell_price,
-                              quantity=trade_quantity,
-                              timestamp=curr_timestamp)
-            
-            #appending that object in the trades array
-            trades.append(trade)
-            # remove the order
-            if best_sell_order.remaining_quantity == 0:
-                heapq.heappop(self.sell_orders)
-        
-        return trades
+        return self._match_against(incoming_order, self.sell_orders)
     
     def _match_market_sell(self, incoming_order):
         """
-        Match an incoming SELL market order against the buy order book
-        using price-time priority.
-
-        The function continuously excutes the incoming SELL order with the
-        current available BUY orders (highest price, earliest timestamp) as long as:
-        - The incoming order has remaining quantity
+        Match an incoming SELL market order against the BUY side,
+        sweeping price levels from the best bid outwards until the
+        order is filled or the side is empty.
         
         Returns: 
             list[Trade]: Trades generated during running of this function
-        
         """
-        trades = []
-
-        while incoming_order.remaining_quantity > 0 and self.buy_orders:
-            
-            best_buy_price, best_buy_timestamp, best_buy_order = self.buy_orders[0]
-            best_buy_price = -1 * best_buy_price
-            
-            # get the trade quantity
-            trade_quantity = min(best_buy_order.remaining_quantity, incoming_order.remaining_quantity)
-            
-            #this statements will be replaced with the methods(function) calls in the order.py
-            # incoming_order.remaining_quantity -= trade_quantity
-            # best_buy_order.remaining_quantity -= trade_quantity
-            
-            incoming_order.apply_fill(trade_quantity)
-            best_buy_order.apply_fill(trade_quantity)
-            # get the current timestamp
-            curr_timestamp = generate_timestamp()
-            #creation of Trade of object
-            trade = Trade(
-                              trade_id=generate_trade_id(),
-                            buy_order_id=best_buy_order.order_id,
-                              sell_order_id=incoming_order.order_id,
-                              buy_client_id= best_buy_order.client_id,
-                              sell_client_id=incoming_order.client_id,
-                              price=best_buy_price,
-                              quantity=trade_quantity,
-                              timestamp=curr_timestamp)
-            
-            #appending that object in the trades array
-            trades.append(trade)
-            
-            # remove the order
-            if best_buy_order.remaining_quantity == 0:
-                heapq.heappop(self.buy_orders)
-        return trades
+        return self._match_against(incoming_order, self.buy_orders)
             
     
     def process_market_orders(self, incoming_order):
         """
         Process an incoming market order:
         - Attempt to match it against the opposite order book
-        - Insert it into the order book if partially filled or unfilled
+
+        A market order carries no price, so any quantity left after
+        the opposite side is exhausted is NOT rested in the book;
+        it is reported back through remaining_quantity instead.
 
         Returns:
             list[Trade]: Trades generated during matching
         """
         trades = []
         if incoming_order.side == "BUY":
-            trades = self._match_market_sell(incoming_order)
-            if incoming_order.remaining_quantity > 0:
-                self.add_buy_orders(incoming_order)
-        
-        elif incoming_order.side == "SELL":
             trades = self._match_market_buy(incoming_order)
-            if incoming_order.remaining_quantity > 0:
-                self.add_sell_orders(incoming_order)
-        
-        for trade in trades:
-            log_trade_server(trade)
         
+        elif incoming_order.side == "SELL":
+            trades = self._match_market_sell(incoming_order)
+
         return trades
     
 
@@ -356,33 +484,148 @@ class OrderBook:
         """
         Restore order book state from a snapshot.
 
-        Parameters:
-            snapshot (dict): Output from snapshot()
-
         Notes:
         - Clears existing order book
-        - Rebuilds BUY and SELL heaps
-        - Preserves price-time priority
+        - Rebuilds BUY and SELL price ladders in one bulk load each
+        - Preserves price-time priority: orders are loaded in the
+          store's order (sorted by timestamp first unless the store
+          already returns them in priority order)
+        - Moves the ID sequencer past the persisted high-water marks
+        - Pauses the garbage collector while the orders are created:
+          millions of new objects would otherwise trigger repeated
+          full collections of a growing heap
+        - Remembers in journal_seq the last journal event the
+          snapshot covers; replay starts after it
         """
         self.buy_orders.clear()
         self.sell_orders.clear()
-        orders = self.order_store.load()
-        # Restore BUY and Sell orders
-        for order in orders:
-            if order.side == "BUY":
-                self.add_buy_orders(order=order)
-            else:
-                self.add_sell_orders(order=order)
+        self.order_index.clear()
+
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            orders = self.order_store.load()
+            self.journal_seq = self.order_store.journal_seq
+            if self.id_sequencer:
+                self.id_sequencer.restore(self.order_store.sequencer_state)
+            if not self.order_store.preserves_priority:
+                orders.sort(key=lambda order: order.timestamp)
+            # Restore BUY and Sell orders
+            self.buy_orders.bulk_load(order for order in orders if order.side == "BUY")
+            self.sell_orders.bulk_load(order for order in orders if order.side == "SELL")
+            self.order_index = {order.order_id: order for order in orders}
+        finally:
+            if gc_was_enabled:
+                gc.enable()
         
                 
 
-    def save(self):
+    def capture_snapshot(self, journal_seq=None):
         """
-        Store the current data in the file.
+        Capture the book for a background snapshot.
+
+        Must be called while holding the lock that serializes access to
+        this book. Nothing is copied there: the capture only lists the
+        price levels and arms copy-on-write, so the cost is O(levels)
+        and matching stalls for well under a millisecond even with a
+        million resting orders.
+
+        Copy-on-write, until write_snapshot() finishes:
+        - the first change to a level's queue stores a copy of the queue
+          (PriceLevel.snapshot_copies)
+        - the first change to a resting order stores its pre-image
+        so the snapshot is exactly the book at the moment of capture.
+
+        Parameters:
+            journal_seq (int | None): Last journal event reflected in the book.
+
+        Returns:
+            dict | None: the capture, or None if a previous capture of
+            this book is still being written
         """
-        buy_orders_only = [order for _, _, order in self.buy_orders]
-        sell_orders_only = [order for _, _, order in self.sell_orders]
+        if self._snapshot_preimages is not None:
+            return None
 
-        merged_orders = buy_orders_only + sell_orders_only
-        self.order_store.save(merged_orders)
+        level_copies = {}
+        levels = []
+        for book_side in (self.buy_orders, self.sell_orders):
+            for level in book_side.levels.values():
+                level.snapshot_copies = level_copies
+                levels.append(level)
+
+        self._snapshot_preimages = {}
+        return {
+            "levels": levels,
+            "level_copies": level_copies,
+            "preimages": self._snapshot_preimages,
+            "sequencer_state": self.id_sequencer.state() if self.id_sequencer else None,
+            "journal_seq": journal_seq
+        }
+
+    def write_snapshot(self, capture: dict) -> int:
+        """
+        Serialize a capture and write it through the OrderStore.
 
+        Runs off the matching thread, without the book lock. Each queue
+        and each order is read before its copy / pre-image is looked up:
+        the matching thread always stores the copy before changing
+        anything, so a read that raced with a change is replaced by the
+        state at capture time.
+
+        Returns:
+            int: number of orders written
+        """
+        level_copies = capture["level_copies"]
+        preimages = capture["preimages"]
+        try:
+            records = []
+            for level in capture["levels"]:
+                orders = tuple(level.orders)
+                orders = level_copies.get(id(level), orders)
+
+                for order in orders:
+                    record = order.to_dict()
+                    preimage = preimages.get(id(order))
+                    if preimage is not None:
+                        record = preimage
+                    if record["status"] in ("NEW", "PARTIALLY_FILLED"):
+                        records.append(record)
+
+            self.order_store.write_snapshot(
+                records,
+                sequencer_state=capture["sequencer_state"],
+                journal_seq=capture["journal_seq"]
+            )
+            return len(records)
+        finally:
+            self._snapshot_preimages = None
+            for level in capture["levels"]:
+                level.snapshot_copies = None
+
+    def _preserve(self, order) -> None:
+        """
+        Keep the state of a resting order before its first change
+        since the running capture.
+        """
+        preimages = self._snapshot_preimages
+        if preimages is not None and id(order) not in preimages:
+            preimages[id(order)] = order.to_dict()
+
+    def save(self, journal_seq=None):
+        """
+        Store the current data in the file, together with the
+        ID sequencer high-water marks and the seq of the last
+        journal event applied to the book.
+        """
+        buy_orders_only = list(self.buy_orders.iter_orders())
+        sell_orders_only = list(self.sell_orders.iter_orders())
+
+        merged_orders = buy_orders_only + sell_orders_only
+        sequencer_state = self.id_sequencer.state() if self.id_sequencer else None
+        self.order_store.save(
+            merged_orders,
+            sequencer_state=sequencer_state,
+            journal_seq=journal_seq
+        )
+        if journal_seq is not None:
+            self.journal_seq = journal_seq
@@ -0,0 +1,140 @@
+from collections import deque
+from operator import attrgetter
+
+# Tombstones are compacted once they make up more than half of a level
+# and there are at least this many of them.
+COMPACT_THRESHOLD = 32
+
+
+class PriceLevel:
+    """
+    All resting orders at a single price on one side of the book.
+
+    Orders are kept in a FIFO queue so that time priority inside the
+    level is simply the queue order. The level also tracks the total
+    remaining quantity resting at this price so that aggregated depth
+    can be answered without walking the orders.
+
+    Cancelled orders are removed lazily: the order is marked CANCELLED
+    and left in the queue as a tombstone, which costs O(1). Tombstones
+    are skipped when they reach the head of the queue and the queue is
+    compacted once they make up more than half of it.
+
+    While a background snapshot of the book is being written,
+    snapshot_copies is set (see OrderBook.capture_snapshot): the first
+    change to the queue then stores a copy of it, so the snapshot sees
+    the queue as it was at capture time.
+    """
+
+    def __init__(self, price):
+        """
+        Initialize an empty price level.
+
+        Parameters:
+            price: Price shared by every order in this level
+        """
+        self.price = price
+        self.orders = deque()
+        self.total_quantity = 0
+        self.cancelled = 0
+        # id(level) -> queue copy, shared by the levels of a running capture
+        self.snapshot_copies = None
+
+    def append(self, order):
+        """
+        Add an order to the back of the queue (lowest time priority).
+        """
+        if self.snapshot_copies is not None:
+            self._keep_snapshot_copy()
+        self.orders.append(order)
+        self.total_quantity += order.remaining_quantity
+
+    def extend(self, orders):
+        """
+        Add many orders to the back of the queue, in order.
+        """
+        orders = list(orders)
+        if self.snapshot_copies is not None:
+            self._keep_snapshot_copy()
+        self.orders.extend(orders)
+        self.total_quantity += sum(map(attrgetter("remaining_quantity"), orders))
+
+    def head(self):
+        """
+        Return the live order with the highest time priority.
+        Tombstones found in front of it are discarded.
+        """
+        orders = self.orders
+        while orders[0].status == "CANCELLED":
+            if self.snapshot_copies is not None:
+                self._keep_snapshot_copy()
+            orders.popleft()
+            self.cancelled -= 1
+        return orders[0]
+
+    def pop_head(self):
+        """
+        Remove and return the order at the front of the queue.
+        """
+        if self.snapshot_copies is not None:
+            self._keep_snapshot_copy()
+        return self.orders.popleft()
+
+    def reduce(self, quantity: int):
+        """
+        Account for quantity that left this level (fill or removal).
+        """
+        self.total_quantity -= quantity
+
+    def remove(self, order) -> None:
+        """
+        Lazily remove a resting order that has been marked CANCELLED.
+
+        The order stays in the queue as a tombstone; only the level
+        aggregates are updated here.
+        """
+        self.total_quantity -= order.remaining_quantity
+        self.cancelled += 1
+
+        if self.cancelled >= COMPACT_THRESHOLD and self.cancelled * 2 > len(self.orders):
+            self.compact()
+
+    def compact(self) -> None:
+        """
+        Drop every tombstone from the queue, keeping FIFO order.
+        """
+        if self.snapshot_copies is not None:
+            self._keep_snapshot_copy()
+        self.orders = deque(order for order in self.orders if order.status != "CANCELLED")
+        self.cancelled = 0
+
+    def _keep_snapshot_copy(self) -> None:
+        """
+        Store the queue as it was at capture time, once per capture.
+        """
+        copies = self.snapshot_copies
+        self.snapshot_copies = None
+        if copies is not None and id(self) not in copies:
+            copies[id(self)] = tuple(self.orders)
+
+    def is_empty(self) -> bool:
+        """
+        Check whether any live order is still resting at this price.
+        """
+        return len(self.orders) == self.cancelled
+
+    def __len__(self) -> int:
+        """
+        Number of live orders resting at this price.
+        """
+        return len(self.orders) - self.cancelled
+
+    def __iter__(self):
+        return (order for order in self.orders if order.status != "CANCELLED")
+
+    def __repr__(self) -> str:
+        return (
+            f"PriceLevel(price={self.price}, "
+            f"orders={len(self)}, "
+            f"total_quantity={self.total_quantity})"
+        )
@@ -0,0 +1,473 @@
+import gzip
+import json
+import os
+import threading
+from array import array
+from datetime import datetime, timezone
+
+from utils.file_io import *
+from utils.serialization import *
+from utils.time_utils import to_timestamp_ns
+
+# Sealed segments are compressed in independent gzip members of this
+# many uncompressed bytes, so a reader decompresses only what it reads.
+COMPRESS_BLOCK_BYTES = 64 * 1024
+
+
+def normalize_trade(record: dict) -> dict:
+    """
+    Bring a trade of a legacy JSON-array ledger to the current record
+    shape: its timestamp (ISO-8601 string or float seconds) becomes
+    integer nanoseconds, like every trade the TradeWriter writes.
+    """
+    timestamp = record.get("timestamp")
+    if timestamp is not None and not isinstance(timestamp, int):
+        record = dict(record, timestamp=to_timestamp_ns(timestamp))
+    return record
+
+
+class SegmentedLedger:
+    """
+    One ledger partition stored as a chain of segments.
+
+    Files, for a partition at storage/trades/trades.jsonl:
+        trades.jsonl                 active segment (appended to)
+        trades.000001.jsonl.gz       sealed segments, oldest first;
+        trades.000002.jsonl          gzip-compressed in the background
+        trades.000001.jsonl.gz.idx   block index of a compressed segment
+        trades.manifest.json         list of sealed segments
+
+    The active segment is sealed and a new one started when it grows
+    past max_segment_bytes or, with rotate_daily, when the first write
+    of a new (UTC) trading day arrives. Sealing renames the file and
+    then records the segment in the manifest (next_segment, first/last
+    trade_id and timestamp), so every listed segment exists;
+    compress_segment() later replaces it with a .gz copy.
+
+    A .gz segment is a chain of gzip members, one per COMPRESS_BLOCK_BYTES
+    of the original, so it still reads as one ordinary gzip stream; its
+    .idx file lists the file offset of every member, and read_block()
+    decompresses a single block of it.
+
+    Segment n is always the active segment until next_segment moves
+    past n, and its bytes never change when it is sealed or compressed
+    (compression only wraps them), so (segment, offset) positions stay
+    valid for readers across rotation and compression.
+
+    iter_records() presents all segments as one continuous stream.
+
+    The writer side (open/write/seal) is used by the TradeWriter thread
+    only; manifest updates are guarded by a lock because compression
+    runs on another thread.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_segment_bytes: int = 64 * 1024 * 1024,
+        rotate_daily: bool = True
+    ):
+        """
+        Initialize the ledger (nothing is opened yet).
+
+        Parameters:
+            path (str): Path of the active segment (the partition path).
+            max_segment_bytes (int): Size at which the active segment is sealed.
+            rotate_daily (bool): Also seal the active segment at UTC midnight.
+        """
+        self.path = path
+        self.max_segment_bytes = max_segment_bytes
+        self.rotate_daily = rotate_daily
+
+        self._root, self._ext = os.path.splitext(path)
+        self.manifest_path = self._root + ".manifest.json"
+        self.manifest = self.read_manifest()
+
+        self._file = None
+        self._size = 0
+        self._day = None
+        # first / last trade of the active segment
+        self._first = None
+        self._last = None
+
+        # compressed segment -> file offsets of its blocks (readers)
+        self._block_offsets = {}
+
+        self._lock = threading.Lock()
+
+    def segment_path(self, segment: int, compressed: bool = False) -> str:
+        """
+        Path of a sealed segment.
+        """
+        path = f"{self._root}.{segment:06d}{self._ext}"
+        return path + ".gz" if compressed else path
+
+    def block_index_path(self, segment: int) -> str:
+        """
+        Path of the block index of a compressed segment.
+        """
+        return self.segment_path(segment, compressed=True) + ".idx"
+
+    def segment_exists(self, segment: int) -> bool:
+        """
+        Whether a sealed segment has been renamed into place
+        (plain or compressed).
+        """
+        return (
+            os.path.exists(self.segment_path(segment))
+            or os.path.exists(self.segment_path(segment, compressed=True))
+        )
+
+    def read_manifest(self) -> dict:
+        """
+        Read the manifest from disk (an empty one if there is none).
+        Readers call this to pick up rotations and compressions.
+        """
+        manifest = load_json(self.manifest_path)
+        if not isinstance(manifest, dict):
+            manifest = {"version": 1, "next_segment": 1, "segments": []}
+        return manifest
+
+    def _save_manifest(self) -> None:
+        save_json_atomic(self.manifest_path, self.manifest)
+
+    def open(self) -> list:
+        """
+        Open the active segment for appending.
+
+        Finishes a seal interrupted by a crash (file renamed, manifest
+        not yet written; or, as older versions sealed, the other way
+        round) and migrates a legacy JSON-array ledger.
+
+        Returns:
+            list[int]: sealed segments still waiting for compression
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            ensure_dir(directory)
+
+        with self._lock:
+            segments = self.manifest["segments"]
+            if segments and os.path.exists(self.path):
+                last = segments[-1]
+                sealed_path = self.segment_path(last["segment"])
+                if not last["compressed"] and not os.path.exists(sealed_path):
+                    os.replace(self.path, sealed_path)
+
+            segment = self.manifest["next_segment"]
+            sealed_path = self.segment_path(segment)
+            if os.path.exists(sealed_path):
+                size = os.path.getsize(sealed_path)
+                self._list_segment(segment, size, *self._read_bounds(sealed_path, size))
+
+        if self._ext == ".jsonl":
+            migrate_json_to_jsonl(self._root + ".json", self.path, normalize=normalize_trade)
+
+        self._open_active()
+        return [entry["segment"] for entry in self.manifest["segments"] if not entry["compressed"]]
+
+    def _open_active(self) -> None:
+        self._file = open(self.path, "a")
+        self._size = self._file.tell()
+        self._first, self._last = self._read_bounds(self.path, self._size)
+        if self._first is not None:
+            self._day = self._utc_day(self._first["timestamp"])
+        else:
+            self._day = None
+
+    @staticmethod
+    def _read_bounds(path: str, size: int):
+        """
+        First and last record of a (plain) segment file of this size.
+        """
+        if size == 0:
+            return None, None
+
+        with open(path, "rb") as f:
+            first_line = f.readline()
+            f.seek(max(0, size - 64 * 1024))
+            tail = f.read().rstrip(b"\n").rsplit(b"\n", 1)[-1]
+        try:
+            return json.loads(first_line), json.loads(tail)
+        except json.JSONDecodeError:
+            return None, None
+
+    @staticmethod
+    def _utc_day(timestamp) -> str:
+        if not isinstance(timestamp, int):
+            return None
+        return datetime.fromtimestamp(timestamp / 1e9, tz=timezone.utc).strftime("%Y-%m-%d")
+
+    def write(self, data: str, first_record: dict, last_record: dict):
+        """
+        Append encoded records to the active segment, sealing it first
+        if it is full or the trading day changed.
+
+        Parameters:
+            data (str): Newline-delimited JSON records.
+            first_record (dict): First record in data.
+            last_record (dict): Last record in data.
+
+        Returns:
+            int | None: number of the segment sealed by this write
+        """
+        if self._file is None:
+            self.open()
+
+        sealed = None
+        day = self._utc_day(first_record.get("timestamp")) if self.rotate_daily else None
+        if self._size and (
+            self._size >= self.max_segment_bytes
+            or (day is not None and self._day is not None and day != self._day)
+        ):
+            sealed = self.seal()
+
+        self._file.write(data)
+        self._size += len(data)
+        if self._first is None:
+            self._first = first_record
+            self._day = day
+        self._last = last_record
+        return sealed
+
+    def seal(self):
+        """
+        Seal the active segment and start a new one.
+
+        The file is renamed before the manifest is written, so every
+        segment the manifest lists exists; open() lists a segment
+        renamed just before a crash, and iter_records() reads it.
+
+        Returns:
+            int | None: sealed segment number (None if it was empty)
+        """
+        if self._size == 0:
+            return None
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+
+        with self._lock:
+            segment = self.manifest["next_segment"]
+            os.replace(self.path, self.segment_path(segment))
+            self._list_segment(segment, self._size, self._first, self._last)
+
+        self._open_active()
+        return segment
+
+    def _list_segment(self, segment: int, size: int, first: dict, last: dict) -> None:
+        """
+        Record a sealed (renamed) segment in the manifest. Needs self._lock.
+        """
+        self.manifest["segments"].append({
+            "segment": segment,
+            "compressed": False,
+            "bytes": size,
+            "first_trade_id": first.get("trade_id") if first else None,
+            "last_trade_id": last.get("trade_id") if last else None,
+            "first_timestamp": first.get("timestamp") if first else None,
+            "last_timestamp": last.get("timestamp") if last else None
+        })
+        self.manifest["next_segment"] = segment + 1
+        self._save_manifest()
+
+    def compress_segment(self, segment: int) -> None:
+        """
+        Replace a sealed segment by its gzip copy (background thread),
+        compressed block by block with a block index.
+
+        The index is in place before the .gz file, and the plain file
+        is removed last, so readers always find one of them complete.
+        """
+        plain_path = self.segment_path(segment)
+        gz_path = self.segment_path(segment, compressed=True)
+        index_path = self.block_index_path(segment)
+        if not os.path.exists(plain_path):
+            return
+
+        offsets = array("q")
+        tmp_path = gz_path + ".tmp"
+        with open(plain_path, "rb") as source, open(tmp_path, "wb") as target:
+            while True:
+                block = source.read(COMPRESS_BLOCK_BYTES)
+                if not block:
+                    break
+                offsets.append(target.tell())
+                target.write(gzip.compress(block, mtime=0))
+            target.flush()
+            os.fsync(target.fileno())
+
+        index_tmp_path = index_path + ".tmp"
+        with open(index_tmp_path, "wb") as f:
+            offsets.tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(index_tmp_path, index_path)
+        os.replace(tmp_path, gz_path)
+
+        with self._lock:
+            for entry in self.manifest["segments"]:
+                if entry["segment"] == segment:
+                    entry["compressed"] = True
+            self._save_manifest()
+
+        os.remove(plain_path)
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def fsync(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def open_segment(self, entry: dict):
+        """
+        Open a sealed segment for binary reading, following a
+        compression that happened after the manifest was read
+        (the .gz file is in place before the plain one is removed).
+
+        Raises:
+            FileNotFoundError: if the segment is missing
+        """
+        plain_path = self.segment_path(entry["segment"])
+        try:
+            return open(plain_path, "rb")
+        except FileNotFoundError:
+            pass
+        try:
+            return gzip.open(self.segment_path(entry["segment"], compressed=True), "rb")
+        except FileNotFoundError:
+            pass
+
+        # listed but never renamed: an older version stopped inside
+        # seal(), and open() has not completed the rename yet
+        segments = self.read_manifest()["segments"]
+        if segments and segments[-1]["segment"] == entry["segment"]:
+            return open(self.path, "rb")
+        raise FileNotFoundError(plain_path)
+
+    def read_block(self, entry: dict, block: int) -> bytes:
+        """
+        Bytes [block * COMPRESS_BLOCK_BYTES, (block + 1) * COMPRESS_BLOCK_BYTES)
+        of a sealed segment, decompressing at most one block.
+
+        Returns:
+            bytes: the block (shorter for the last one, empty past the end)
+        """
+        segment = entry["segment"]
+        start = block * COMPRESS_BLOCK_BYTES
+        try:
+            with open(self.segment_path(segment), "rb") as f:
+                f.seek(start)
+                return f.read(COMPRESS_BLOCK_BYTES)
+        except FileNotFoundError:
+            pass
+
+        offsets = self._read_block_index(segment)
+        if offsets is None:
+            # compressed as a single stream by an older version
+            with self.open_segment(entry) as f:
+                f.seek(start)
+                return f.read(COMPRESS_BLOCK_BYTES)
+
+        if block >= len(offsets):
+            return b""
+        with open(self.segment_path(segment, compressed=True), "rb") as f:
+            f.seek(offsets[block])
+            if block + 1 < len(offsets):
+                data = f.read(offsets[block + 1] - offsets[block])
+            else:
+                data = f.read()
+        return gzip.decompress(data)
+
+    def _read_block_index(self, segment: int):
+        """
+        Block offsets of a compressed segment (cached), None without an index.
+        """
+        offsets = self._block_offsets.get(segment)
+        if offsets is None:
+            offsets = array("q")
+            try:
+                with open(self.block_index_path(segment), "rb") as f:
+                    offsets.frombytes(f.read())
+            except FileNotFoundError:
+                return None
+            self._block_offsets[segment] = offsets
+        return offsets
+
+    def iter_records(self):
+        """
+        Stream every record of the partition, oldest first:
+        sealed segments in manifest order, then the active segment.
+
+        A segment renamed but not listed yet (a seal in progress, or a
+        crash inside one) is read from its sealed path. Each pass either
+        reads at least one more segment or ends, so it never spins.
+        """
+        next_segment = 1
+        while True:
+            manifest = self.read_manifest()
+            # segments sealed while streaming are picked up on the next pass
+            for entry in manifest["segments"]:
+                if entry["segment"] >= next_segment:
+                    with self.open_segment(entry) as f:
+                        yield from self._iter_lines(f)
+                    next_segment = entry["segment"] + 1
+
+            segments = manifest["segments"]
+            if segments and not self.segment_exists(segments[-1]["segment"]):
+                # listed but never renamed (older versions): its content,
+                # read from the active path above, is all there is
+                return
+
+            unlisted_path = self.segment_path(next_segment)
+            try:
+                unlisted = open(unlisted_path, "rb")
+            except FileNotFoundError:
+                unlisted = None
+            if unlisted is not None:
+                with unlisted:
+                    yield from self._iter_lines(unlisted)
+                next_segment += 1
+                continue
+
+            try:
+                active = open(self.path, "rb")
+            except FileNotFoundError:
+                # renamed (or listed) since the checks above: read it
+                if (
+                    os.path.exists(unlisted_path)
+                    or self.read_manifest()["next_segment"] > next_segment
+                ):
+                    continue
+                return
+            with active:
+                # nothing sealed since the manifest was read (the segment
+                # after it may be compressed already) and not renamed since
+                # it was opened: the handle is the active segment
+                if (
+                    self.read_manifest()["next_segment"] == next_segment
+                    and not os.path.exists(unlisted_path)
+                ):
+                    yield from self._iter_lines(active)
+                    return
+
+    @staticmethod
+    def _iter_lines(f):
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
@@ -0,0 +1,126 @@
+import threading
+import time
+from contextlib import nullcontext
+
+
+class Snapshotter:
+    """
+    Periodic background snapshots of every order book.
+
+    Each round, for every symbol:
+    - take the symbol's lock and capture the book (copy-on-write,
+      see OrderBook.capture_snapshot); matching is blocked only for
+      this step
+    - release the lock, serialize the capture and write it atomically
+      through the book's OrderStore
+
+    When every book of the round has been written, the journal is
+    checkpointed at the oldest journal position covered, so crash
+    recovery only replays what happened since the last round.
+
+    The snapshotter must be stopped before ExchangeEngine.stop(),
+    which takes the final snapshot itself.
+    """
+
+    def __init__(self, engine, lock_for=None, interval_s: float = 60.0):
+        """
+        Initialize the snapshotter.
+
+        Parameters:
+            engine (ExchangeEngine): Engine whose books are snapshotted.
+            lock_for (callable | None): symbol -> lock serializing engine
+                access for that symbol (TCPServer.lock_for). Without it
+                the caller must guarantee no concurrent matching.
+            interval_s (float): Seconds between snapshot rounds.
+        """
+        if interval_s <= 0:
+            raise ValueError("interval_s must be positive")
+
+        self.engine = engine
+        self.lock_for = lock_for
+        self.interval_s = interval_s
+        # figures of the last completed round
+        self.last_round = None
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Start taking snapshots in the background.
+        """
+        if self._thread:
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._snapshot_loop,
+            name="SnapshotterThread",
+            daemon=True
+        )
+        self._thread.start()
+
+    def _snapshot_loop(self):
+        while not self._stop_event.wait(self.interval_s):
+            try:
+                self.snapshot_now()
+            except Exception as e:
+                print(f"[SNAPSHOT] Snapshot failed: {e}")
+
+    def snapshot_now(self) -> dict:
+        """
+        Run one snapshot round synchronously.
+
+        Returns:
+            dict: {"books", "orders", "max_capture_ms", "total_ms", "journal_seq"}
+        """
+        started = time.perf_counter()
+        order_books = dict(self.engine.order_books)
+        journal_seqs = []
+        complete = True
+        max_capture_ms = 0.0
+        orders = 0
+
+        for symbol, order_book in order_books.items():
+            lock = self.lock_for(symbol) if self.lock_for else nullcontext()
+
+            capture_started = time.perf_counter()
+            with lock:
+                capture = self.engine.capture_snapshot(symbol)
+            max_capture_ms = max(max_capture_ms, (time.perf_counter() - capture_started) * 1000)
+
+            if capture is None:
+                complete = False
+                continue
+
+            orders += order_book.write_snapshot(capture)
+            journal_seqs.append(capture["journal_seq"])
+
+        # a book created during the round has no snapshot yet
+        if set(self.engine.order_books) != set(order_books):
+            complete = False
+
+        journal = self.engine.journal
+        journal_seq = min(journal_seqs) if journal_seqs else None
+        if journal and complete and journal_seq is not None:
+            journal.checkpoint(journal_seq)
+
+        self.last_round = {
+            "books": len(journal_seqs),
+            "orders": orders,
+            "max_capture_ms": max_capture_ms,
+            "total_ms": (time.perf_counter() - started) * 1000,
+            "journal_seq": journal_seq
+        }
+        return self.last_round
+
+    def stop(self):
+        """
+        Stop the background thread, letting a running round finish.
+        """
+        if not self._thread:
+            return
+
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
@@ -0,0 +1,111 @@
+from operator import attrgetter, itemgetter
+from typing import List
+
+from engine.order import Order
+from engine.order_store import OrderStore
+
+
+# columns of the orders table, in Order.from_record() argument order
+ORDER_COLUMNS = (
+    "order_id", "client_id", "user", "side", "price", "quantity",
+    "remaining_quantity", "timestamp", "order_type", "symbol", "status"
+)
+
+
+class SQLiteOrderStore(OrderStore):
+    """
+    OrderStore keeping the snapshot of one order book in a
+    SQLiteStorage database (orders and snapshots tables).
+
+    A save replaces the book's rows in a single transaction, so a
+    crash leaves either the old or the new snapshot. Rows carry their
+    position in the book and come back in price-time priority.
+
+    If the database holds no snapshot of the book yet, load() falls
+    back to legacy_store (a file-based OrderStore), so switching
+    storage keeps the resting orders. Imported order IDs that do not
+    fit an SQLite INTEGER (128-bit IDs of old snapshots) are renumbered
+    on import, not left to fail at the first save.
+    """
+
+    # rows are loaded in the order they were saved
+    preserves_priority = True
+
+    def __init__(self, storage, symbol: str, legacy_store: OrderStore = None):
+        """
+        Initialize the store.
+
+        Parameters:
+            storage (SQLiteStorage): Open database.
+            symbol (str): Symbol of the order book.
+            legacy_store (OrderStore | None): Snapshot read when the
+                database has none for this book.
+        """
+        super().__init__(filepath=storage.db_path)
+        self.storage = storage
+        self.symbol = symbol
+        self.legacy_store = legacy_store
+
+    def save(self, orders: List[Order], sequencer_state: dict = None, journal_seq: int = None):
+        """
+        Persist active orders, reading the columns straight from the
+        Order objects (no intermediate dicts).
+        """
+        active_orders = [
+            order for order in orders
+            if order.status in ("NEW", "PARTIALLY_FILLED")
+        ]
+        self.storage.save_orders(
+            self.symbol,
+            map(attrgetter(*ORDER_COLUMNS), active_orders),
+            sequencer_state,
+            journal_seq
+        )
+
+    def write_snapshot(self, records: List[dict], sequencer_state: dict = None, journal_seq: int = None):
+        """
+        Write serialized orders as the new snapshot of the book.
+        """
+        self.storage.save_orders(
+            self.symbol,
+            map(itemgetter(*ORDER_COLUMNS), records),
+            sequencer_state,
+            journal_seq
+        )
+
+    def load(self) -> List[Order]:
+        """
+        Load persisted orders, in price-time priority.
+
+        Sets sequencer_state and journal_seq like OrderStore.load().
+        """
+        self.sequencer_state = None
+        self.journal_seq = 0
+
+        snapshot = self.storage.load_orders(self.symbol)
+        if snapshot is None:
+            return self._load_legacy()
+
+        rows, self.sequencer_state, journal_seq = snapshot
+        self.journal_seq = journal_seq or 0
+
+        from_record = Order.from_record
+        return [from_record(*row) for row in rows]
+
+    def _load_legacy(self) -> List[Order]:
+        if self.legacy_store is None:
+            return []
+
+        orders = self.legacy_store.load()
+        self.sequencer_state = self.legacy_store.sequencer_state
+        self.journal_seq = self.legacy_store.journal_seq
+        if not self.legacy_store.preserves_priority:
+            orders.sort(key=lambda order: order.timestamp)
+        self._renumber_oversized_ids(orders)
+        return orders
+
+    def clear(self):
+        """
+        Delete the snapshot of the book.
+        """
+        self.storage.delete_orders(self.symbol)
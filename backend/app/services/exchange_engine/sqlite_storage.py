@@ -0,0 +1,352 @@
+import json
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from operator import itemgetter
+
+from utils.file_io import *
+from engine.storage_backend import StorageBackend
+from engine.sqlite_order_store import SQLiteOrderStore, ORDER_COLUMNS
+from engine.sqlite_trade_reader import SQLiteTradeReader, TRADE_COLUMNS, SELECT_TRADES
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    symbol              TEXT    NOT NULL,
+    priority            INTEGER NOT NULL,
+    order_id            INTEGER NOT NULL,
+    client_id           TEXT,
+    user                TEXT,
+    side                TEXT    NOT NULL,
+    price               INTEGER NOT NULL,
+    quantity            INTEGER NOT NULL,
+    remaining_quantity  INTEGER NOT NULL,
+    timestamp           INTEGER NOT NULL,
+    order_type          TEXT    NOT NULL,
+    status              TEXT    NOT NULL,
+    PRIMARY KEY (symbol, priority)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS orders_order_id ON orders (order_id);
+CREATE INDEX IF NOT EXISTS orders_client_id ON orders (client_id);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    symbol       TEXT PRIMARY KEY,
+    journal_seq  INTEGER,
+    sequencer    TEXT
+);
+
+CREATE TABLE IF NOT EXISTS trades (
+    trade_id        INTEGER PRIMARY KEY,
+    buy_order_id    INTEGER,
+    sell_order_id   INTEGER,
+    buy_client_id   TEXT,
+    sell_client_id  TEXT,
+    price           INTEGER NOT NULL,
+    quantity        INTEGER NOT NULL,
+    timestamp       INTEGER NOT NULL,
+    symbol          TEXT    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trades_symbol_time ON trades (symbol, timestamp, trade_id);
+CREATE INDEX IF NOT EXISTS trades_buy_client ON trades (buy_client_id, symbol, trade_id);
+CREATE INDEX IF NOT EXISTS trades_sell_client ON trades (sell_client_id, symbol, trade_id);
+
+CREATE TABLE IF NOT EXISTS session_orders (
+    user      TEXT    NOT NULL,
+    position  INTEGER NOT NULL,
+    record    TEXT    NOT NULL,
+    PRIMARY KEY (user, position)
+) WITHOUT ROWID;
+"""
+
+INSERT_ORDER = (
+    f"INSERT INTO orders (symbol, priority, {', '.join(ORDER_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * (len(ORDER_COLUMNS) + 2))})"
+)
+SELECT_ORDERS = f"SELECT {', '.join(ORDER_COLUMNS)} FROM orders WHERE symbol = ? ORDER BY priority"
+# replayed trades are already stored: ignore them
+INSERT_TRADE = (
+    f"INSERT OR IGNORE INTO trades ({', '.join(TRADE_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(TRADE_COLUMNS))})"
+)
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    StorageBackend on a single SQLite database file.
+
+    - WAL mode: readers never block the writer and see the last
+      committed state.
+    - One writer connection, serialized by a lock; every write
+      (a TradeWriter batch, an order book snapshot, a session save)
+      is one transaction of prepared bulk inserts (executemany).
+    - Readers borrow connections from a small pool (pool_size),
+      opened on demand, so history queries run in parallel with
+      each other and with the writer.
+
+    Tables: orders + snapshots (resting orders of every book, in
+    priority order, with the ID sequencer and journal positions),
+    trades (indexed by symbol/time and by client of each side) and
+    session_orders.
+
+    synchronous is the SQLite durability setting: "FULL" syncs every
+    commit, "NORMAL" (default, safe in WAL mode against application
+    crashes) syncs at checkpoints, "OFF" leaves it to the OS.
+    """
+
+    SYNCHRONOUS = ("OFF", "NORMAL", "FULL")
+
+    def __init__(
+        self,
+        db_path: str = "storage/exchange.db",
+        synchronous: str = "NORMAL",
+        pool_size: int = 4,
+        busy_timeout_ms: int = 5000
+    ):
+        """
+        Initialize the storage (nothing is opened yet).
+
+        Parameters:
+            db_path (str): Database file.
+            synchronous (str): "OFF", "NORMAL" or "FULL".
+            pool_size (int): Most reader connections kept open.
+            busy_timeout_ms (int): Wait for a lock before failing.
+        """
+        if synchronous not in self.SYNCHRONOUS:
+            raise ValueError(f"synchronous must be one of {self.SYNCHRONOUS}")
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+
+        self.db_path = db_path
+        self.synchronous = synchronous
+        self.pool_size = pool_size
+        self.busy_timeout_ms = busy_timeout_ms
+
+        self._writer = None
+        self._write_lock = threading.Lock()
+
+        # idle reader connections
+        self._pool = queue.Queue()
+        # every reader connection opened
+        self._readers = []
+        self._pool_lock = threading.Lock()
+
+        # symbol -> SQLiteTradeReader
+        self._trade_readers = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        # autocommit mode: transactions are opened explicitly;
+        # pooled connections move between threads
+        conn = sqlite3.connect(
+            self.db_path,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        return conn
+
+    def open(self) -> None:
+        """
+        Open the writer connection, switch the database to WAL mode
+        and create the schema.
+        """
+        if self._writer is not None:
+            return
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            ensure_dir(directory)
+
+        writer = self._connect()
+        writer.execute("PRAGMA journal_mode = WAL")
+        writer.execute(f"PRAGMA synchronous = {self.synchronous}")
+        writer.executescript(SCHEMA)
+        self._writer = writer
+
+    def close(self) -> None:
+        """
+        Close the writer and every reader connection.
+        """
+        with self._pool_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+            self._pool = queue.Queue()
+
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Run the block as one write transaction on the writer connection.
+        """
+        if self._writer is None:
+            raise RuntimeError("SQLiteStorage is not open")
+
+        with self._write_lock:
+            conn = self._writer
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @contextmanager
+    def reading(self):
+        """
+        Borrow a reader connection from the pool.
+
+        A new connection is opened while fewer than pool_size exist;
+        after that the caller waits for one to be returned.
+        """
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._pool_lock:
+                if len(self._readers) < self.pool_size:
+                    conn = self._connect()
+                    conn.execute("PRAGMA query_only = ON")
+                    self._readers.append(conn)
+            if conn is None:
+                conn = self._pool.get()
+
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def order_store(self, symbol: str, legacy_store=None) -> SQLiteOrderStore:
+        """
+        Return the OrderStore of a symbol's order book.
+
+        Parameters:
+            symbol (str): Symbol of the book.
+            legacy_store (OrderStore | None): File snapshot loaded while
+                the database has none for this book.
+        """
+        return SQLiteOrderStore(self, symbol, legacy_store=legacy_store)
+
+    def save_orders(self, symbol: str, rows, sequencer_state: dict = None, journal_seq: int = None) -> int:
+        """
+        Replace the snapshot of a book.
+
+        Parameters:
+            symbol (str): Symbol of the book.
+            rows (iterable[tuple]): ORDER_COLUMNS values of each order,
+                in price-time priority.
+            sequencer_state (dict | None): ID sequencer high-water marks.
+            journal_seq (int | None): Last journal event covered.
+
+        Returns:
+            int: number of orders saved
+        """
+        records = [(symbol, priority, *row) for priority, row in enumerate(rows)]
+        sequencer = json.dumps(sequencer_state) if sequencer_state is not None else None
+
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM orders WHERE symbol = ?", (symbol,))
+            conn.executemany(INSERT_ORDER, records)
+            conn.execute(
+                "INSERT OR REPLACE INTO snapshots (symbol, journal_seq, sequencer) VALUES (?, ?, ?)",
+                (symbol, journal_seq, sequencer)
+            )
+        return len(records)
+
+    def load_orders(self, symbol: str):
+        """
+        Load the snapshot of a book.
+
+        Returns:
+            tuple | None: (rows in priority order, sequencer_state,
+                journal_seq), or None if the book has no snapshot
+        """
+        with self.reading() as conn:
+            snapshot = conn.execute(
+                "SELECT journal_seq, sequencer FROM snapshots WHERE symbol = ?", (symbol,)
+            ).fetchone()
+            if snapshot is None:
+                return None
+            rows = conn.execute(SELECT_ORDERS, (symbol,)).fetchall()
+
+        journal_seq, sequencer = snapshot
+        sequencer_state = json.loads(sequencer) if sequencer is not None else None
+        return rows, sequencer_state, journal_seq
+
+    def delete_orders(self, symbol: str) -> None:
+        """
+        Delete the snapshot of a book.
+        """
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM orders WHERE symbol = ?", (symbol,))
+            conn.execute("DELETE FROM snapshots WHERE symbol = ?", (symbol,))
+
+    def write_trades(self, records: list) -> None:
+        """
+        Insert serialized trades in one transaction.
+        Trades already stored (same trade_id) are skipped.
+        """
+        if not records:
+            return
+        with self._transaction() as conn:
+            conn.executemany(INSERT_TRADE, map(itemgetter(*TRADE_COLUMNS), records))
+
+    def iter_trades(self, symbol: str):
+        """
+        Stream the trade records of a symbol, oldest first.
+        """
+        with self.reading() as conn:
+            cursor = conn.execute(
+                f"{SELECT_TRADES} WHERE symbol = ? ORDER BY timestamp, trade_id", (symbol,)
+            )
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(zip(TRADE_COLUMNS, row))
+
+    def trade_reader(self, symbol: str) -> SQLiteTradeReader:
+        """
+        Return the shared reader of a symbol's trades.
+        """
+        reader = self._trade_readers.get(symbol)
+        if reader is None:
+            reader = self._trade_readers.setdefault(symbol, SQLiteTradeReader(self, symbol))
+        return reader
+
+    def load_session_orders(self, user: str) -> list:
+        """
+        Return the session order records of a user, in submission order.
+        """
+        with self.reading() as conn:
+            rows = conn.execute(
+                "SELECT record FROM session_orders WHERE user = ? ORDER BY position", (user,)
+            ).fetchall()
+        return [json.loads(record) for (record,) in rows]
+
+    def save_session_orders(self, user: str, orders: list) -> None:
+        """
+        Replace the session order records of a user.
+        """
+        rows = [(user, position, json.dumps(order)) for position, order in enumerate(orders)]
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM session_orders WHERE user = ?", (user,))
+            conn.executemany(
+                "INSERT INTO session_orders (user, position, record) VALUES (?, ?, ?)", rows
+            )
+
+    def save_session_order(self, user: str, position: int, order: dict) -> None:
+        """
+        Insert or replace one session order record of a user.
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO session_orders (user, position, record) VALUES (?, ?, ?)",
+                (user, position, json.dumps(order))
+            )
@@ -0,0 +1,163 @@
+# columns of the trades table, in Trade.to_dict() order
+TRADE_COLUMNS = (
+    "trade_id", "buy_order_id", "sell_order_id", "buy_client_id",
+    "sell_client_id", "price", "quantity", "timestamp", "symbol"
+)
+
+SELECT_TRADES = f"SELECT {', '.join(TRADE_COLUMNS)} FROM trades"
+
+
+class SQLiteTradeReader:
+    """
+    Read-only view of one symbol's trades in a SQLiteStorage database,
+    with the query methods of LedgerReader.
+
+    Every query borrows a connection from the storage's reader pool;
+    WAL mode lets it run while the TradeWriter commits. Lookups and
+    range scans are served by the trades indexes, so their cost
+    depends on the size of the answer, not of the table.
+
+    Cursors are trade IDs: scan() pages forward from the last trade
+    returned, client_trades() pages backward from it.
+
+    Thread-safe.
+    """
+
+    def __init__(self, storage, symbol: str):
+        """
+        Initialize the reader.
+
+        Parameters:
+            storage (SQLiteStorage): Open database.
+            symbol (str): Symbol whose trades are read.
+        """
+        self.storage = storage
+        self.symbol = symbol
+
+    @staticmethod
+    def _to_dict(row) -> dict:
+        return dict(zip(TRADE_COLUMNS, row))
+
+    def refresh(self) -> int:
+        """
+        Nothing to index: new trades are visible once committed.
+        """
+        return 0
+
+    def __len__(self) -> int:
+        with self.storage.reading() as conn:
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM trades WHERE symbol = ?", (self.symbol,)
+            ).fetchone()
+        return count
+
+    def get_trade(self, trade_id):
+        """
+        Return the trade with this id, or None.
+        """
+        with self.storage.reading() as conn:
+            row = conn.execute(
+                f"{SELECT_TRADES} WHERE trade_id = ? AND symbol = ?",
+                (trade_id, self.symbol)
+            ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def scan(self, start_ns=None, end_ns=None, after_trade_id=None, limit: int = 100) -> dict:
+        """
+        Range scan in ledger (time) order with cursor pagination.
+
+        Parameters:
+            start_ns (int | None): Earliest trade timestamp (inclusive).
+            end_ns (int | None): Latest trade timestamp (exclusive).
+            after_trade_id (int | None): Cursor: only trades after this id.
+            limit (int): Page size.
+
+        Returns:
+            dict:
+                {
+                    "trades": list[dict],
+                    "next_cursor": int | None  (pass as after_trade_id)
+                }
+        """
+        if limit <= 0:
+            return {"trades": [], "next_cursor": None}
+
+        conditions = ["symbol = ?"]
+        params = [self.symbol]
+
+        with self.storage.reading() as conn:
+            if after_trade_id is not None:
+                row = conn.execute(
+                    "SELECT timestamp FROM trades WHERE trade_id = ?", (after_trade_id,)
+                ).fetchone()
+                if row is not None:
+                    # resume right after the cursor on the (timestamp, id) index
+                    conditions.append("(timestamp, trade_id) > (?, ?)")
+                    params.extend((row[0], after_trade_id))
+                else:
+                    conditions.append("trade_id > ?")
+                    params.append(after_trade_id)
+            if start_ns is not None:
+                conditions.append("timestamp >= ?")
+                params.append(start_ns)
+            if end_ns is not None:
+                conditions.append("timestamp < ?")
+                params.append(end_ns)
+
+            params.append(limit + 1)
+            rows = conn.execute(
+                f"{SELECT_TRADES} WHERE {' AND '.join(conditions)} "
+                "ORDER BY timestamp, trade_id LIMIT ?",
+                params
+            ).fetchall()
+
+        trades = [self._to_dict(row) for row in rows[:limit]]
+        next_cursor = trades[-1]["trade_id"] if len(rows) > limit else None
+        return {"trades": trades, "next_cursor": next_cursor}
+
+    def client_trades(self, client_id, limit: int = 50, cursor: int = None) -> dict:
+        """
+        Most recent trades of a client (as buyer or seller), newest first.
+
+        Parameters:
+            client_id: Client to look up.
+            limit (int): Page size ("last N trades").
+            cursor (int | None): next_cursor of the previous page.
+
+        Returns:
+            dict:
+                {
+                    "trades": list[dict],
+                    "next_cursor": int | None
+                }
+        """
+        if limit <= 0:
+            return {"trades": [], "next_cursor": None}
+
+        before = "AND trade_id < ?" if cursor is not None else ""
+        side_params = [client_id, self.symbol] + ([cursor] if cursor is not None else [])
+
+        # one index range per side, each already cut to the page size
+        query = (
+            f"SELECT * FROM ("
+            f"{SELECT_TRADES} WHERE buy_client_id = ? AND symbol = ? {before} "
+            f"ORDER BY trade_id DESC LIMIT ?) "
+            f"UNION "
+            f"SELECT * FROM ("
+            f"{SELECT_TRADES} WHERE sell_client_id = ? AND symbol = ? {before} "
+            f"ORDER BY trade_id DESC LIMIT ?) "
+            f"ORDER BY trade_id DESC LIMIT ?"
+        )
+        params = side_params + [limit + 1] + side_params + [limit + 1, limit + 1]
+
+        with self.storage.reading() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        trades = [self._to_dict(row) for row in rows[:limit]]
+        next_cursor = trades[-1]["trade_id"] if len(rows) > limit else None
+        return {"trades": trades, "next_cursor": next_cursor}
+
+    def close(self) -> None:
+        """
+        Nothing to release: connections belong to the storage pool.
+        """
@@ -0,0 +1,73 @@
+class StorageBackend:
+    """
+    Persistence behind the order books, the trade ledger and the
+    client sessions, as one pluggable component.
+
+    Without a backend the engine keeps its file storage (OrderStore
+    snapshots, JSONL ledger partitions, session JSON files). A backend
+    replaces all three:
+    - order_store(symbol) hands each order book an OrderStore that
+      saves and loads its snapshot through the backend
+    - the TradeWriter commits every drained batch with write_trades()
+      and serves history queries from trade_reader()
+    - the SessionManager loads and saves session orders through it
+
+    A database server can later take the place of SQLiteStorage by
+    implementing the same methods.
+    """
+
+    def open(self) -> None:
+        """
+        Connect and create the schema if needed.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """
+        Release every connection.
+        """
+        raise NotImplementedError
+
+    def order_store(self, symbol: str):
+        """
+        Return the OrderStore of a symbol's order book.
+        """
+        raise NotImplementedError
+
+    def write_trades(self, records: list) -> None:
+        """
+        Persist serialized trades (Trade.to_dict()) in one transaction.
+        """
+        raise NotImplementedError
+
+    def iter_trades(self, symbol: str):
+        """
+        Stream the trade records of a symbol, oldest first.
+        """
+        raise NotImplementedError
+
+    def trade_reader(self, symbol: str):
+        """
+        Return a reader of a symbol's trades with the query methods of
+        LedgerReader (get_trade, scan, client_trades).
+        """
+        raise NotImplementedError
+
+    def load_session_orders(self, user: str) -> list:
+        """
+        Return the session order records of a user.
+        """
+        raise NotImplementedError
+
+    def save_session_orders(self, user: str, orders: list) -> None:
+        """
+        Replace the session order records of a user.
+        """
+        raise NotImplementedError
+
+    def save_session_order(self, user: str, position: int, order: dict) -> None:
+        """
+        Insert or replace one session order record of a user, at its
+        position in the user's history.
+        """
+        raise NotImplementedError
@@ -1,5 +1,32 @@
+from engine.instrument import DEFAULT_SYMBOL
+from utils.time_utils import to_timestamp_ns
+
+
 class Trade:
-    def __init__(self, trade_id, buy_order_id, sell_order_id, buy_client_id, sell_client_id, price, quantity, timestamp):
+    """
+    An executed match between a BUY and a SELL order.
+
+    price is the execution price as an integer number of ticks and
+    timestamp the execution time in integer nanoseconds.
+
+    Trades use __slots__: they are created in the matching loop and
+    queued for persistence, so a compact fixed layout keeps both
+    allocation and memory low.
+    """
+
+    __slots__ = (
+        "trade_id",
+        "buy_order_id",
+        "sell_order_id",
+        "buy_client_id",
+        "sell_client_id",
+        "price",
+        "quantity",
+        "timestamp",
+        "symbol",
+    )
+
+    def __init__(self, trade_id, buy_order_id, sell_order_id, buy_client_id, sell_client_id, price, quantity, timestamp, symbol=DEFAULT_SYMBOL):
         self.trade_id = trade_id
         self.buy_order_id = buy_order_id
         self.sell_order_id = sell_order_id
@@ -8,6 +35,7 @@ class Trade:
         self.price = price
         self.quantity = quantity
         self.timestamp = timestamp
+        self.symbol = symbol
    
     
     def to_dict(self) -> dict:
@@ -28,6 +56,7 @@ class Trade:
             "price": self.price,
             "quantity": self.quantity,
             "timestamp": self.timestamp,
+            "symbol": self.symbol,
         }
 
 
@@ -46,7 +75,8 @@ class Trade:
             sell_client_id=data["sell_client_id"],
             price=data["price"],
             quantity=data["quantity"],
-            timestamp=data["timestamp"],
+            timestamp=to_timestamp_ns(data["timestamp"]),
+            symbol=data.get("symbol", DEFAULT_SYMBOL),
         )
 
     def __repr__(self) -> str:
@@ -58,5 +88,6 @@ class Trade:
             f"sell_client_id={self.sell_client_id}, "
             f"price={self.price}, "
             f"quantity={self.quantity}, "
-            f"timestamp={self.timestamp})"
+            f"timestamp={self.timestamp}, "
+            f"symbol={self.symbol!r})"
         )
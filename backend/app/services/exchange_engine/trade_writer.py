@@ -1,3 +1,4 @@
+import os
 import threading
 import queue
 import time
@@ -5,6 +6,10 @@ import time
 from utils.file_io import *
 from utils.serialization import *
 from engine.trade import Trade
+from engine.instrument import DEFAULT_SYMBOL
+from engine.ledger_reader import LedgerReader
+from engine.segmented_ledger import SegmentedLedger
+from utils.clock import SystemClock
 
 
 class TradeWriter:
@@ -19,13 +24,125 @@ class TradeWriter:
     This class follows a producer-consumer model:
     - Engine = producer
     - TradeWriter = consumer
+
+    The ledger is partitioned by symbol: trades of DEFAULT_SYMBOL go to
+    ledger_path, trades of any other symbol go to a sibling file named
+    after the symbol (trades.jsonl -> trades_<SYMBOL>.jsonl), created on
+    the first trade of that symbol.
+
+    Ledger format:
+    - Append-only newline-delimited JSON, one trade per line.
+    - Each partition file is opened once and kept open by the writer
+      thread, so appending a trade is O(1) whatever the ledger size.
+    - A legacy JSON-array ledger (trades.json) found next to a .jsonl
+      partition is migrated once, the first time the partition is opened.
+
+    Segments:
+    - Every partition is a SegmentedLedger: the partition path is the
+      active segment, sealed once it reaches max_segment_bytes or a
+      new trading day starts (rotate_daily), and listed in a manifest.
+    - Sealed segments are gzip-compressed by a background thread
+      (compress_segments), so the active write target stays small.
+    - read_trades() and reader() see all segments as one stream.
+
+    Storage backend:
+    - With a StorageBackend (e.g. SQLiteStorage) the ledger files are
+      not used: every drained batch is one write_trades() transaction,
+      and read_trades() / reader() query the backend instead.
+
+    Group commit:
+    - The writer drains everything already queued (waiting at most
+      max_batch_delay_ms for more) up to max_batch_size trades, and
+      writes each partition's share of the batch in one call.
+    - fsync_policy decides when written data is forced to disk:
+        "never"    : data reaches the OS after every batch and survives
+                     a process crash, but not a power loss
+        "batch"    : every batch is fsynced before the next one starts;
+                     a trade is durable once its batch is committed
+        "interval" : fsync at most every fsync_interval_ms; a power loss
+                     can lose at most that much trading
+    - stats() exposes queue depth, batch sizes and commit latency.
+
+    Failures:
+    - If a commit (write, flush or fsync) raises, the writer stops
+      persisting: later trades are dropped rather than written after a
+      hole, but still taken off the queue so nothing waits forever.
+      The error is re-raised by flush() and stop().
     """
 
-    def __init__(self, ledger_path: str):
+    FSYNC_POLICIES = ("never", "batch", "interval")
+
+    def __init__(
+        self,
+        ledger_path: str,
+        clock=None,
+        max_batch_size: int = 1000,
+        max_batch_delay_ms: float = 1.0,
+        fsync_policy: str = "batch",
+        fsync_interval_ms: float = 50.0,
+        max_segment_bytes: int = 64 * 1024 * 1024,
+        rotate_daily: bool = True,
+        compress_segments: bool = True,
+        storage=None
+    ):
         """
         Initialize the trade writer.
+
+        Parameters:
+            ledger_path (str): Ledger file of the default symbol.
+            clock: Clock shared with the engine, used to stamp writes.
+            max_batch_size (int): Most trades written per commit.
+            max_batch_delay_ms (float): Longest wait for more trades once
+                a batch has started.
+            fsync_policy (str): "never", "batch" or "interval".
+            fsync_interval_ms (float): fsync period for the "interval" policy.
+            max_segment_bytes (int): Size at which a ledger segment is sealed.
+            rotate_daily (bool): Also seal segments at UTC midnight.
+            compress_segments (bool): gzip sealed segments in the background.
+            storage (StorageBackend | None): Write trades to this backend
+                instead of the ledger files (fsync_policy then does not
+                apply; durability is the backend's).
         """
+        if fsync_policy not in self.FSYNC_POLICIES:
+            raise ValueError(f"fsync_policy must be one of {self.FSYNC_POLICIES}")
+        if max_batch_size <= 0:
+            raise ValueError("max_batch_size must be positive")
+
         self.ledger_path = ledger_path
+        self.clock = clock or SystemClock()
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay_ms / 1000
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval_ms / 1000
+        self.max_segment_bytes = max_segment_bytes
+        self.rotate_daily = rotate_daily
+        self.compress_segments = compress_segments
+        self.storage = storage
+        # time (ns) of the last trade written to the ledger
+        self.last_write_ns = None
+        # ledger path -> open SegmentedLedger, owned by the writer thread
+        self._ledgers = {}
+        # ledger path -> shared LedgerReader
+        self._readers = {}
+        # ledgers written since their last fsync
+        self._unsynced_ledgers = set()
+        # (ledger, segment) waiting for compression
+        self._compress_queue = queue.Queue()
+        self._compress_thread = None
+        self._last_fsync = time.monotonic()
+        self._stats = {
+            "batches_committed": 0,
+            "trades_committed": 0,
+            "last_batch_size": 0,
+            "max_batch_size": 0,
+            "fsyncs": 0,
+            "last_commit_latency_us": 0.0,
+            "max_commit_latency_us": 0.0,
+            "total_commit_latency_us": 0.0,
+            "trades_dropped": 0,
+        }
+        # first commit error; re-raised by flush() and stop()
+        self._error = None
         self._queue = queue.Queue()
         self._thread = None
         self._running = False
@@ -46,6 +163,14 @@ class TradeWriter:
         )
         self._thread.start()
 
+        if self.compress_segments and self.storage is None:
+            self._compress_thread = threading.Thread(
+                target=self._compress_loop,
+                name="LedgerCompressThread",
+                daemon=True
+            )
+            self._compress_thread.start()
+
     def enqueue_trade(self, trade: Trade):
         """
         Submit a trade for asynchronous persistence.
@@ -57,61 +182,363 @@ class TradeWriter:
 
         self._queue.put(trade)
 
+    def enqueue_trades(self, trades: list):
+        """
+        Submit a batch of trades for asynchronous persistence.
+
+        The whole batch is a single queue item, so a batch of N trades
+        costs one queue operation instead of N.
+        This method MUST be non-blocking.
+        """
+        if not self._running:
+            raise RuntimeError("TradeWriter Thread is not running")
+
+        self._queue.put(list(trades))
+
 
     def _writer_loop(self):
         """
         Background worker loop.
 
-        Consumes trades in FIFO order and appends them to the ledger.
+        Consumes trades in FIFO order and appends them to the ledger,
+        one group commit per drained batch.
+        A queue item is either a single Trade or a list of Trades
+        submitted through enqueue_trades().
         """
         while self._running or not self._queue.empty(): 
 
             try: 
-                trade = self._queue.get(timeout=0.5)
+                item = self._queue.get(timeout=0.5)
             except queue.Empty:
+                # idle: honour the fsync interval for trailing writes
+                if self._error is None:
+                    try:
+                        self._maybe_fsync()
+                    except Exception as e:
+                        self._fail(e, 0)
                 continue
 
+            started = time.perf_counter_ns()
+            items = self._drain_batch(item)
+
             try: 
+                if self._error is None:
+                    trade_count = self._commit_batch(items)
+                    self._record_commit(trade_count, time.perf_counter_ns() - started)
+                else:
+                    self._stats["trades_dropped"] += sum(map(self._item_size, items))
+            except Exception as e:
+                self._fail(e, sum(map(self._item_size, items)))
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+        if self._error is None:
+            try:
+                self._fsync_ledger_files()
+            except Exception as e:
+                self._fail(e, 0)
+
+    def _fail(self, error: Exception, trade_count: int) -> None:
+        """
+        Record the first commit error; trade_count trades were not written.
+        """
+        self._stats["trades_dropped"] += trade_count
+        if self._error is None:
+            self._error = error
+            print(f"[LEDGER] Trade commit failed, trades are no longer persisted: {error!r}")
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def _drain_batch(self, first_item) -> list:
+        """
+        Collect queue items for one commit, starting with first_item.
+
+        Takes whatever is already queued and waits at most
+        max_batch_delay for more, stopping at max_batch_size trades.
+        """
+        items = [first_item]
+        trade_count = self._item_size(first_item)
+        deadline = time.monotonic() + self.max_batch_delay
+
+        while trade_count < self.max_batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            items.append(item)
+            trade_count += self._item_size(item)
+
+        return items
+
+    def _commit_batch(self, items: list) -> int:
+        """
+        Write a drained batch: one buffered write per ledger partition,
+        then flush and fsync according to the policy.
+
+        Returns:
+            int: number of trades written
+        """
+        if self.storage is not None:
+            return self._commit_to_storage(items)
+
+        lines_by_path = {}
+        records_by_path = {}
+        trade_count = 0
+
+        for item in items:
+            trades = item if isinstance(item, list) else [item]
+            for trade in trades:
                 # serialize the data 
                 record = trade.to_dict()
-                #append this to the trade.json
-                self.append_trade(record)
-            finally:
-                self._queue.task_done()
+                path = self.ledger_path_for(record.get("symbol", DEFAULT_SYMBOL))
+                lines_by_path.setdefault(path, []).append(encode_jsonl(record))
+                # first and last record of the partition's share
+                records = records_by_path.setdefault(path, [record, record])
+                records[1] = record
+                trade_count += 1
+
+        for path, lines in lines_by_path.items():
+            ledger = self._ledger_file(path)
+            first_record, last_record = records_by_path[path]
+            sealed = ledger.write("".join(lines), first_record, last_record)
+            if sealed is not None:
+                self._schedule_compression(ledger, [sealed])
+            self._unsynced_ledgers.add(ledger)
+
+        self._flush_ledger_files()
+
+        if self.fsync_policy == "batch":
+            self._fsync_ledger_files()
+        else:
+            self._maybe_fsync()
+
+        self.last_write_ns = self.clock.now_ns()
+        return trade_count
+
+    def _commit_to_storage(self, items: list) -> int:
+        """
+        Write a drained batch to the storage backend in one transaction.
+
+        Returns:
+            int: number of trades written
+        """
+        records = []
+        for item in items:
+            trades = item if isinstance(item, list) else [item]
+            records.extend(trade.to_dict() for trade in trades)
+
+        self.storage.write_trades(records)
+        self.last_write_ns = self.clock.now_ns()
+        return len(records)
+
+    def _record_commit(self, trade_count: int, latency_ns: int) -> None:
+        latency_us = latency_ns / 1000
+        stats = self._stats
+        stats["batches_committed"] += 1
+        stats["trades_committed"] += trade_count
+        stats["last_batch_size"] = trade_count
+        stats["max_batch_size"] = max(stats["max_batch_size"], trade_count)
+        stats["last_commit_latency_us"] = latency_us
+        stats["max_commit_latency_us"] = max(stats["max_commit_latency_us"], latency_us)
+        stats["total_commit_latency_us"] += latency_us
+
+    @staticmethod
+    def _item_size(item) -> int:
+        return len(item) if isinstance(item, list) else 1
+
+    def stats(self) -> dict:
+        """
+        Writer health: queue depth, batching and commit latency.
+
+        Commit latency runs from the moment a batch is taken off the
+        queue until it is written (and fsynced, per policy).
+        """
+        stats = dict(self._stats)
+        batches = stats["batches_committed"]
+        stats["avg_commit_latency_us"] = (
+            stats.pop("total_commit_latency_us") / batches if batches else 0.0
+        )
+        stats["queue_depth"] = self._queue.qsize()
+        stats["fsync_policy"] = self.fsync_policy
+        return stats
 
-                
-                
 
     def flush(self):
         """
         Flush all pending trades to disk.
+
+        Raises:
+            Exception: the error that stopped the writer, if a commit failed
         """
         self._queue.join()
+        self._raise_error()
 
     def stop(self):
         """
         Stop the background writer gracefully.
+
+        Raises:
+            Exception: the error that stopped the writer, if a commit
+                failed (after the writer has been shut down)
         """
         if not self._running:
             return
         
         self._running = False
-        self.flush()
+        self._queue.join()
 
         if self._thread:
             self._thread.join()
             self._thread = None
 
+        for ledger in self._ledgers.values():
+            ledger.close()
+        self._ledgers.clear()
+
+        for reader in self._readers.values():
+            reader.close()
+        self._readers.clear()
+
+        if self._compress_thread:
+            self._compress_queue.put(None)
+            self._compress_thread.join()
+            self._compress_thread = None
+
+        self._raise_error()
+
     def is_running(self) -> bool:
         """
         Check whether the trade writer is currently active.
         """
         return self._running
 
+    def ledger_path_for(self, symbol: str) -> str:
+        """
+        Return the ledger partition that stores trades of a symbol.
+        """
+        if symbol == DEFAULT_SYMBOL:
+            return self.ledger_path
+
+        root, ext = os.path.splitext(self.ledger_path)
+        return f"{root}_{symbol}{ext}"
+
     def append_trade(self, trade: dict):
         """
-        Append a trade record to storage/trades/trades.json
+        Append a trade record to the ledger partition of its symbol.
+        """
+        if self.storage is not None:
+            self.storage.write_trades([trade])
+            return
+
+        path = self.ledger_path_for(trade.get("symbol", DEFAULT_SYMBOL))
+        ledger = self._ledger_file(path)
+        sealed = ledger.write(encode_jsonl(trade), trade, trade)
+        if sealed is not None:
+            self._schedule_compression(ledger, [sealed])
+
+    def read_trades(self, symbol: str = DEFAULT_SYMBOL):
+        """
+        Stream the trade records of a symbol from its ledger partition,
+        all segments in order.
         """
-        from utils.file_io import ensure_dir
-        ensure_dir("storage/trades")
-        append_json(self.ledger_path, trade)
+        if self.storage is not None:
+            return self.storage.iter_trades(symbol)
+        return SegmentedLedger(self.ledger_path_for(symbol)).iter_records()
+
+    def reader(self, symbol: str = DEFAULT_SYMBOL) -> LedgerReader:
+        """
+        Indexed reader of a symbol's ledger partition, for history
+        queries (trade lookup, time range scans, client history).
+
+        One reader per partition is kept and shared; it picks up new
+        trades on every query. With a storage backend, the backend's
+        reader (same query methods) is returned.
+        """
+        if self.storage is not None:
+            return self.storage.trade_reader(symbol)
+
+        path = self.ledger_path_for(symbol)
+        reader = self._readers.get(path)
+        if reader is None:
+            reader = self._readers.setdefault(path, LedgerReader(path))
+        return reader
+
+    def _ledger_file(self, path: str) -> SegmentedLedger:
+        """
+        Return the open SegmentedLedger of a ledger partition.
+        Opening it migrates a legacy JSON-array ledger and queues
+        sealed segments left uncompressed by an earlier run.
+        """
+        ledger = self._ledgers.get(path)
+        if ledger is None:
+            ledger = SegmentedLedger(
+                path,
+                max_segment_bytes=self.max_segment_bytes,
+                rotate_daily=self.rotate_daily
+            )
+            pending = ledger.open()
+            self._ledgers[path] = ledger
+            self._schedule_compression(ledger, pending)
+        return ledger
+
+    def _schedule_compression(self, ledger: SegmentedLedger, segments: list) -> None:
+        if not self.compress_segments:
+            return
+        for segment in segments:
+            self._compress_queue.put((ledger, segment))
+
+    def _compress_loop(self):
+        """
+        Background worker gzipping sealed segments, one at a time.
+        """
+        while True:
+            job = self._compress_queue.get()
+            if job is None:
+                break
+
+            ledger, segment = job
+            try:
+                ledger.compress_segment(segment)
+            except OSError as e:
+                print(f"[LEDGER] Could not compress segment {segment} of {ledger.path}: {e}")
+
+    def _flush_ledger_files(self):
+        """
+        Push buffered ledger writes to the operating system.
+        """
+        for ledger in self._unsynced_ledgers:
+            ledger.flush()
+
+    def _maybe_fsync(self):
+        """
+        fsync under the "interval" policy once the interval has elapsed.
+        """
+        if self.fsync_policy != "interval" or not self._unsynced_ledgers:
+            return
+        if time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self._fsync_ledger_files()
+
+    def _fsync_ledger_files(self):
+        """
+        Force written ledger data to disk (skipped under "never").
+        """
+        if self.fsync_policy == "never" or not self._unsynced_ledgers:
+            self._unsynced_ledgers.clear()
+            return
+
+        for ledger in self._unsynced_ledgers:
+            ledger.fsync()
+
+        self._unsynced_ledgers.clear()
+        self._last_fsync = time.monotonic()
+        self._stats["fsyncs"] += 1
@@ -0,0 +1,83 @@
+import time
+
+
+class Clock:
+    """
+    Source of timestamps shared by the engine, the order books and
+    the trade writer.
+
+    Timestamps are integer nanoseconds since the Unix epoch. Integers
+    are cheap to create, compare and serialize, and unlike datetime
+    objects they need no conversion when written as JSON.
+    """
+
+    def now_ns(self) -> int:
+        """
+        Return the current time in integer nanoseconds.
+        """
+        raise NotImplementedError
+
+
+class SystemClock(Clock):
+    """
+    Wall-clock time based on time.time_ns().
+    """
+
+    def now_ns(self) -> int:
+        return time.time_ns()
+
+    def __repr__(self) -> str:
+        return "SystemClock()"
+
+
+class SimulatedClock(Clock):
+    """
+    Clock driven by the caller instead of the wall clock.
+
+    Used by replays and backtests so that historical data can run
+    faster than real time with reproducible timestamps.
+
+    - set() / advance() move time explicitly (e.g. to each recorded
+      event time during a replay).
+    - step_ns > 0 turns it into a logical clock: every now_ns() call
+      returns the current time and then moves it forward by step_ns,
+      so consecutive events always get distinct, increasing stamps.
+    """
+
+    def __init__(self, start_ns: int = 0, step_ns: int = 0):
+        """
+        Initialize the simulated clock.
+
+        Parameters:
+            start_ns (int): Initial time in nanoseconds.
+            step_ns (int): Automatic advance applied after every now_ns().
+        """
+        if step_ns < 0:
+            raise ValueError("step_ns must not be negative")
+
+        self._now_ns = start_ns
+        self.step_ns = step_ns
+
+    def now_ns(self) -> int:
+        now = self._now_ns
+        self._now_ns += self.step_ns
+        return now
+
+    def set(self, timestamp_ns: int) -> None:
+        """
+        Jump to an absolute time. Time never moves backwards.
+        """
+        if timestamp_ns < self._now_ns:
+            raise ValueError("Simulated time cannot move backwards")
+        self._now_ns = timestamp_ns
+
+    def advance(self, delta_ns: int) -> None:
+        """
+        Move time forward by delta_ns.
+        """
+        if delta_ns < 0:
+            raise ValueError("Simulated time cannot move backwards")
+        self._now_ns += delta_ns
+
+    def __repr__(self) -> str:
+        return f"SimulatedClock(now_ns={self._now_ns}, step_ns={self.step_ns})"
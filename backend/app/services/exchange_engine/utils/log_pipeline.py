@@ -0,0 +1,207 @@
+import atexit
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+from utils.file_io import ensure_dir
+
+
+# verbosity levels, lowest first
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVELS = {
+    "debug": DEBUG,
+    "info": INFO,
+    "warning": WARNING,
+    "error": ERROR,
+    "off": OFF
+}
+
+# destinations of a record
+CONSOLE = 0
+FILE = 1
+
+
+class LogPipeline:
+    """
+    Buffered, asynchronous log output.
+
+    Callers on the hot path only build a compact record and append it
+    to an in-memory buffer (a deque: append and popleft are atomic, no
+    lock is taken). A background sink thread wakes up every
+    flush_interval_ms, formats everything buffered and writes it with
+    one write (and flush) per destination.
+
+    Records:
+    - (destination, created, formatter, payload): the formatter is
+      called by the sink as formatter(created, payload) -> str, so
+      string formatting and I/O both happen off the caller's thread.
+    - Payloads must not change after being logged (trades, tuples,
+      strings).
+
+    Verbosity:
+    - console_level and file_level filter records by level before they
+      are buffered; OFF switches a destination off entirely, so a
+      filtered call costs one comparison.
+
+    At most max_pending records are buffered; beyond that records are
+    dropped and counted (reported by the sink) rather than letting a
+    slow console grow memory without bound.
+    """
+
+    def __init__(
+        self,
+        log_file: str,
+        console_level: int = DEBUG,
+        file_level: int = INFO,
+        flush_interval_ms: float = 10.0,
+        max_pending: int = 100_000,
+        stream=None
+    ):
+        """
+        Initialize the pipeline (the sink starts on first use).
+
+        Parameters:
+            log_file (str): File receiving FILE records.
+            console_level (int): Lowest level printed to the console.
+            file_level (int): Lowest level written to log_file.
+            flush_interval_ms (float): Sink wake-up period.
+            max_pending (int): Most records buffered.
+            stream: Console stream (sys.stdout by default).
+        """
+        self.log_file = log_file
+        self.console_level = console_level
+        self.file_level = file_level
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_pending = max_pending
+        self.stream = stream
+
+        self.dropped = 0
+
+        self._buffer = deque()
+        self._file = None
+        # serializes draining between the sink thread and flush()
+        self._drain_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._running = False
+
+        atexit.register(self.stop)
+
+    def configure(self, console_level: int = None, file_level: int = None) -> None:
+        """
+        Change the verbosity of either destination.
+        """
+        if console_level is not None:
+            self.console_level = console_level
+        if file_level is not None:
+            self.file_level = file_level
+
+    def enabled(self, destination: int, level: int) -> bool:
+        threshold = self.console_level if destination == CONSOLE else self.file_level
+        return level >= threshold
+
+    def emit(self, destination: int, level: int, formatter, payload) -> None:
+        """
+        Buffer one record for the sink.
+
+        This method MUST be non-blocking.
+        """
+        threshold = self.console_level if destination == CONSOLE else self.file_level
+        if level < threshold:
+            return
+
+        if not self._running:
+            self._start()
+
+        if len(self._buffer) >= self.max_pending:
+            self.dropped += 1
+            return
+
+        self._buffer.append((destination, time.time(), formatter, payload))
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(
+                target=self._sink_loop,
+                name="LogSinkThread",
+                daemon=True
+            )
+            self._thread.start()
+
+    def _sink_loop(self) -> None:
+        while self._running:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Format and write everything buffered so far.
+        """
+        with self._drain_lock:
+            self._drain()
+
+    def _drain(self) -> None:
+        buffer = self._buffer
+        console_lines = []
+        file_lines = []
+
+        # only what is buffered now: producers keep appending
+        for _ in range(len(buffer)):
+            destination, created, formatter, payload = buffer.popleft()
+            try:
+                text = formatter(created, payload)
+            except Exception as e:
+                text = f"[LOG] Could not format {payload!r}: {e}\n"
+            if destination == CONSOLE:
+                console_lines.append(text)
+            else:
+                file_lines.append(text)
+
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            console_lines.append(f"[LOG] {dropped} log records dropped (buffer full)\n")
+
+        if console_lines:
+            stream = self.stream or sys.stdout
+            stream.write("".join(console_lines))
+            stream.flush()
+
+        if file_lines:
+            log_file = self._log_file()
+            log_file.write("".join(file_lines))
+            log_file.flush()
+
+    def _log_file(self):
+        """
+        The log file, opened once and kept open.
+        """
+        if self._file is None:
+            directory = os.path.dirname(self.log_file)
+            if directory:
+                ensure_dir(directory)
+            self._file = open(self.log_file, "a")
+        return self._file
+
+    def stop(self) -> None:
+        """
+        Stop the sink after writing what is buffered.
+        """
+        if self._running:
+            self._running = False
+            self._thread.join()
+            self._thread = None
+
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -1,28 +1,49 @@
 from utils.time_utils import *
-from utils.file_io import ensure_dir, ensure_file
+from utils.log_pipeline import *
 LOG_FILE = "storage/logs/system.log"
 
-def _prepare_log_file():
-    ensure_dir("storage/logs")
-    ensure_file(LOG_FILE)
+# Server and system logs go through one buffered pipeline: callers only
+# queue a record, the LogSinkThread formats and writes them in batches.
+_pipeline = LogPipeline(LOG_FILE)
+
+def configure_logging(console_level=None, file_level=None):
+    """
+    Set the verbosity of console and file output.
+
+    Levels are DEBUG, INFO, WARNING, ERROR or OFF, or their names
+    ("debug", ..., "off"). Received orders are DEBUG, trades and
+    system messages INFO.
+    """
+    if isinstance(console_level, str):
+        console_level = LEVELS[console_level.lower()]
+    if isinstance(file_level, str):
+        file_level = LEVELS[file_level.lower()]
+    _pipeline.configure(console_level=console_level, file_level=file_level)
+
+def flush_logs():
+    """Write every buffered log record now."""
+    _pipeline.flush()
+
+def _format_file_line(tag):
+    def format_line(created, message):
+        return f"[{tag}] {get_formated_timestamp(created)} - {message}\n"
+    return format_line
+
+_format_info = _format_file_line("INFO")
+_format_trade_system = _format_file_line("TRADE")
+_format_error = _format_file_line("ERROR")
 
 def log_info(message):
-    _prepare_log_file()
-    with open(LOG_FILE, "a") as f:
-        f.write(f"[INFO] {current_timestamp()} - {message}\n")
+    _pipeline.emit(FILE, INFO, _format_info, message)
 
 def log_trade_system(trade):
-    _prepare_log_file()
-    with open(LOG_FILE, "a") as f:
-        f.write(f"[TRADE] {current_timestamp()} - {trade}\n")
+    _pipeline.emit(FILE, INFO, _format_trade_system, trade)
 
 def log_error(message):
-    _prepare_log_file()
-    with open(LOG_FILE, "a") as f:
-        f.write(f"[ERROR] {current_timestamp()} - {message}\n")
-    
+    _pipeline.emit(FILE, ERROR, _format_error, message)
+
 def log_trade_client(trade):
-    """Log the trade at client side."""
+    """Log the trade at client side (printed right away, in UI order)."""
     print(f"DATE AND TIME: {get_formated_timestamp(trade["timestamp"])}")
     print(f"TRADE ID: {trade["trade_id"]}")
     print(f"PRICE: {trade["price"]}")
@@ -30,31 +51,61 @@ def log_trade_client(trade):
     print()
     # print(f"REMAINING QUANTITIES: {trade["remaining_quantity"]}")
 
+def _format_trade_server(trade):
+    return (
+        "\n[SERVER] Trade Executed\n"
+        f"Trade ID: {trade.trade_id}\n"
+        f"Time: {get_formated_timestamp(trade.timestamp)}\n"
+        f"Buy Order ID: {trade.buy_order_id}\n"
+        f"Sell Order ID: {trade.sell_order_id}\n"
+        f"Price: {trade.price}\n"
+        f"Quantity: {trade.quantity}\n"
+        "\n"
+    )
+
+def _format_trades_server(created, trades):
+    return "".join(_format_trade_server(trade) for trade in trades)
+
 def log_trade_server(trade):
     """Log the trade at server side."""
-    print("\n[SERVER] Trade Executed")
-    print(f"Trade ID: {trade.trade_id}")
-    print(f"Time: {get_formated_timestamp(trade.timestamp)}")
-    print(f"Buy Order ID: {trade.buy_order_id}")
-    print(f"Sell Order ID: {trade.sell_order_id}")
-    print(f"Price: {trade.price}")
-    print(f"Quantity: {trade.quantity}")
-    print()
+    _pipeline.emit(CONSOLE, INFO, _format_trades_server, (trade,))
 
-def log_received_order(client_address, order):
-    ip, port = client_address
+def log_trades_server(trades):
+    """Log the trades of one order at server side (a single record)."""
+    if trades:
+        _pipeline.emit(CONSOLE, INFO, _format_trades_server, tuple(trades))
 
-    order_type = order.get("order_type", "UNKNOWN")
-    price = order.get("price", 0)
+def _format_received_order(created, record):
+    ip, port, client_id, user, side, order_type, quantity, price, status = record
 
     price_display = "MARKET" if order_type == "MARKET" or price == 0 else price
 
-    print("\n[SERVER] Order Received")
-    print(f"Client      : {order.get('client_id')} ({order.get('user')})")
-    print(f"Address     : {ip}:{port}")
-    print(f"Side        : {order.get('side')}")
-    print(f"Type        : {order_type}")
-    print(f"Quantity    : {order.get('quantity')}")
-    print(f"Price       : {price_display}")
-    print(f"Status      : {order.get('status')}")
-    print()
+    return (
+        "\n[SERVER] Order Received\n"
+        f"Client      : {client_id} ({user})\n"
+        f"Address     : {ip}:{port}\n"
+        f"Side        : {side}\n"
+        f"Type        : {order_type}\n"
+        f"Quantity    : {quantity}\n"
+        f"Price       : {price_display}\n"
+        f"Status      : {status}\n"
+        "\n"
+    )
+
+def log_received_order(client_address, order):
+    if not _pipeline.enabled(CONSOLE, DEBUG):
+        return
+
+    ip, port = client_address[:2]
+    # copy the fields now: the order dict is not ours
+    _pipeline.emit(CONSOLE, DEBUG, _format_received_order, (
+        ip,
+        port,
+        order.get("client_id"),
+        order.get("user"),
+        order.get("side"),
+        order.get("order_type", "UNKNOWN"),
+        order.get("quantity"),
+        order.get("price", 0),
+        order.get("status")
+    ))
@@ -0,0 +1,54 @@
+import sys
+import types
+from collections import deque
+
+# Objects that are shared program-wide and never owned by a data structure.
+_SKIP_TYPES = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+)
+
+
+def deep_sizeof(root) -> int:
+    """
+    Approximate number of bytes held by `root` and everything it references.
+
+    Each object is counted once even if it is referenced many times
+    (e.g. interned client ids shared by many orders), so the result is
+    the memory that would be released if `root` were the only owner.
+
+    Follows dicts, lists, tuples, sets, deques and instance attributes
+    (__dict__ and __slots__). Classes, modules and functions are skipped.
+    """
+    seen = set()
+    total = 0
+    stack = [root]
+
+    while stack:
+        obj = stack.pop()
+
+        if id(obj) in seen or isinstance(obj, _SKIP_TYPES):
+            continue
+        seen.add(id(obj))
+
+        total += sys.getsizeof(obj)
+
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(obj)
+        elif isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+            continue
+        else:
+            if hasattr(obj, "__dict__"):
+                stack.append(obj.__dict__)
+            for cls in type(obj).__mro__:
+                for slot in getattr(cls, "__slots__", ()):
+                    if hasattr(obj, slot):
+                        stack.append(getattr(obj, slot))
+
+    return total
@@ -20,19 +20,37 @@ def load_json(path):
     except json.JSONDecodeError:
         return []
 
+def default_serializer(obj):
+    """
+    JSON fallback: converts datetime objects to ISO strings.
+    """
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Type {type(obj)} not serializable")
+
 def save_json(path, data):
     """
     Saves data to JSON file.
     Automatically converts datetime objects to ISO strings.
     """
-    def default_serializer(obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        raise TypeError(f"Type {type(obj)} not serializable")
-
     with open(path, "w") as f:
         json.dump(data, f, indent=4, default=default_serializer)
 
+def save_json_atomic(path, data):
+    """
+    Saves data to a JSON file atomically.
+
+    The data is written compactly to a temp file in the same directory,
+    fsynced and renamed over `path`, so readers and crash recovery see
+    either the old file or the new one, never a partial write.
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, separators=(",", ":"), default=default_serializer)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
 def append_json(path, record):
     """
     Appends a record to JSON list file.
@@ -41,3 +59,64 @@ def append_json(path, record):
     data.append(record)
     save_json(path, data)
 
+def encode_jsonl(record):
+    """
+    Encodes one record as a single compact JSON line (with newline).
+    """
+    return json.dumps(record, separators=(",", ":"), default=default_serializer) + "\n"
+
+def append_jsonl(file, record):
+    """
+    Appends one record to an open newline-delimited JSON file.
+
+    Costs O(1) regardless of the file size: nothing is read back.
+    """
+    file.write(encode_jsonl(record))
+
+def iter_jsonl(path):
+    """
+    Streams records from a newline-delimited JSON file, one at a time.
+
+    Blank lines and a truncated last line (e.g. after a crash in the
+    middle of a write) are skipped.
+    """
+    if not os.path.exists(path):
+        return
+
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+def migrate_json_to_jsonl(json_path, jsonl_path, normalize=None):
+    """
+    One-time migration of a JSON-array file into newline-delimited JSON.
+
+    The new file is written next to the target and renamed into place,
+    then the old file is renamed to <json_path>.migrated so the
+    migration never runs twice.
+
+    normalize, if given, is called on every record before it is written
+    and returns the record to write.
+
+    Returns:
+        int: number of migrated records (0 if there was nothing to migrate)
+    """
+    if not os.path.exists(json_path) or os.path.exists(jsonl_path):
+        return 0
+
+    records = load_json(json_path)
+    tmp_path = jsonl_path + ".tmp"
+
+    with open(tmp_path, "w") as f:
+        for record in records:
+            append_jsonl(f, normalize(record) if normalize else record)
+
+    os.replace(tmp_path, jsonl_path)
+    os.replace(json_path, json_path + ".migrated")
+    return len(records)
@@ -13,4 +13,27 @@ def get_formated_timestamp(timestamp):
     """Returns an formated timestamp"""
     if isinstance(timestamp, str):
         timestamp = datetime.fromisoformat(timestamp)
+    elif isinstance(timestamp, int):
+        # integer nanoseconds from the engine clock
+        timestamp = datetime.fromtimestamp(timestamp / 1_000_000_000)
+    elif isinstance(timestamp, float):
+        timestamp = datetime.fromtimestamp(timestamp)
     return timestamp.strftime("%Y-%m-%d %H:%M:%S")
+
+def to_timestamp_ns(timestamp):
+    """
+    Normalize a persisted timestamp into integer nanoseconds.
+
+    Accepts:
+    - int       : already nanoseconds
+    - float     : seconds since epoch (older snapshots)
+    - str       : ISO-8601 datetime (older trade ledgers)
+    - datetime
+    """
+    if isinstance(timestamp, int):
+        return timestamp
+    if isinstance(timestamp, float):
+        return int(timestamp * 1_000_000_000)
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return int(timestamp.timestamp() * 1_000_000) * 1000
@@ -0,0 +1,374 @@
+"""
+bench_engine.py
+
+Microbenchmarks for the matching engine.
+
+Drives OrderBook and ExchangeEngine.place_order directly (no sockets)
+with seeded workloads and reports, per workload:
+- throughput (operations per second)
+- per-operation latency percentiles (p50 / p99 / p99.9)
+
+Results are written as JSON and can be compared against a saved
+baseline, so every change to the order book or engine can be judged
+on numbers.
+
+Usage:
+    python3 benchmarks/bench_engine.py
+    python3 benchmarks/bench_engine.py --target book --orders 50000
+    python3 benchmarks/bench_engine.py --save-baseline benchmarks/baseline.json
+    python3 benchmarks/bench_engine.py --baseline benchmarks/baseline.json
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+from engine.engine import ExchangeEngine
+from engine.order import Order
+from engine.order_store import OrderStore
+from engine.orderbook import OrderBook
+from utils.logger import configure_logging, flush_logs
+
+MID_PRICE = 10_000
+
+
+# ---------------------------------------------------------------------------
+# Workloads
+#
+# A workload is a seeded list of operations:
+#   ("LIMIT", side, quantity, price)
+#   ("MARKET", side, quantity, None)
+#   ("CANCEL", index_of_an_earlier_operation)
+# plus a list of "prefill" LIMIT operations that build the book before
+# timing starts.
+# ---------------------------------------------------------------------------
+
+def _passive_order(rng, levels):
+    """A limit order that rests on its own side without crossing."""
+    side = rng.choice(("BUY", "SELL"))
+    offset = rng.randint(1, levels)
+    price = MID_PRICE - offset if side == "BUY" else MID_PRICE + offset
+    return ("LIMIT", side, rng.randint(1, 100), price)
+
+
+def _prefill(rng, resting_orders, levels):
+    return [_passive_order(rng, levels) for _ in range(resting_orders)]
+
+
+def deep_passive(rng, count):
+    """Deep book (tens of thousands of orders), passive flow that only rests."""
+    prefill = _prefill(rng, 50_000, 300)
+    ops = [_passive_order(rng, 300) for _ in range(count)]
+    return prefill, ops
+
+
+def shallow_aggressive(rng, count):
+    """Shallow book, every order crosses the spread by a few ticks."""
+    prefill = _prefill(rng, 500, 10)
+    ops = []
+    for _ in range(count):
+        side = rng.choice(("BUY", "SELL"))
+        offset = rng.randint(0, 5)
+        price = MID_PRICE + offset if side == "BUY" else MID_PRICE - offset
+        ops.append(("LIMIT", side, rng.randint(1, 100), price))
+    return prefill, ops
+
+
+def cancel_heavy(rng, count):
+    """Market-making flow: most resting orders are cancelled, few trade."""
+    prefill = _prefill(rng, 10_000, 100)
+    ops = []
+    live = []
+    for _ in range(count):
+        if live and rng.random() < 0.8:
+            ops.append(("CANCEL", live.pop(rng.randrange(len(live)))))
+        else:
+            live.append(len(ops))
+            ops.append(_passive_order(rng, 100))
+    return prefill, ops
+
+
+def market_sweep(rng, count):
+    """Large market orders sweeping many price levels of a deep book."""
+    prefill = _prefill(rng, 50_000, 300)
+    ops = []
+    for _ in range(count):
+        if rng.random() < 0.9:
+            # replenish the book so sweeps keep finding liquidity
+            ops.append(_passive_order(rng, 300))
+        else:
+            ops.append(("MARKET", rng.choice(("BUY", "SELL")), rng.randint(500, 5_000), None))
+    return prefill, ops
+
+
+WORKLOADS = {
+    "deep_passive": deep_passive,
+    "shallow_aggressive": shallow_aggressive,
+    "cancel_heavy": cancel_heavy,
+    "market_sweep": market_sweep,
+}
+
+
+# ---------------------------------------------------------------------------
+# Targets
+# ---------------------------------------------------------------------------
+
+class BookTarget:
+    """Calls OrderBook directly with pre-built Order objects."""
+
+    name = "book"
+
+    def __init__(self):
+        self.book = OrderBook()
+        self._next_id = 0
+        self.order_ids = {}
+
+    def build(self, index, op):
+        """Create the Order for an operation outside the timed section."""
+        kind, side, quantity, price = op
+        self._next_id += 1
+        order = Order(
+            order_id=self._next_id,
+            client_id="bench",
+            user="bench",
+            side=side,
+            quantity=quantity,
+            price=price,
+            timestamp=self._next_id,
+            order_type=kind
+        )
+        self.order_ids[index] = order.order_id
+        return order
+
+    def submit(self, order):
+        if order.order_type == "LIMIT":
+            self.book.process_limit_orders(order)
+        else:
+            self.book.process_market_orders(order)
+
+    def cancel(self, index):
+        self.book.cancel_order(self.order_ids.get(index))
+
+
+class EngineTarget:
+    """Calls ExchangeEngine.place_order with client-style dicts."""
+
+    name = "engine"
+
+    def __init__(self, storage_dir):
+        order_store = OrderStore(filepath=os.path.join(storage_dir, "orders_snapshot.json"))
+        self.engine = ExchangeEngine(
+            order_book=OrderBook(order_store=order_store),
+            snapshot_dir=storage_dir
+        )
+        self.engine.start()
+        self.order_ids = {}
+
+    def build(self, index, op):
+        kind, side, quantity, price = op
+        return index, {
+            "user": "bench",
+            "client_id": "bench",
+            "side": side,
+            "order_type": kind,
+            "quantity": quantity,
+            "price": price if price is not None else 0,
+            "status": "NEW",
+        }
+
+    def submit(self, item):
+        index, order = item
+        response = self.engine.place_order(order)
+        self.order_ids[index] = response["order_id"]
+
+    def cancel(self, index):
+        try:
+            self.engine.cancel_order(self.order_ids.get(index))
+        except ValueError:
+            # the order traded before it could be cancelled
+            pass
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0
+    rank = max(1, int(round(fraction * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run_workload(target, prefill, ops):
+    """Prefill the book, then time every operation individually."""
+    for index, op in enumerate(prefill):
+        target.submit(target.build(-1 - index, op))
+
+    prepared = [
+        op if op[0] == "CANCEL" else target.build(index, op)
+        for index, op in enumerate(ops)
+    ]
+
+    # start every workload from the same allocator state
+    gc.collect()
+
+    latencies = []
+    clock = time.perf_counter_ns
+    started = clock()
+
+    for item in prepared:
+        t0 = clock()
+        if type(item) is tuple and item[0] == "CANCEL":
+            target.cancel(item[1])
+        else:
+            target.submit(item)
+        latencies.append(clock() - t0)
+
+    elapsed_ns = clock() - started
+    latencies.sort()
+
+    return {
+        "operations": len(ops),
+        "elapsed_s": elapsed_ns / 1e9,
+        "throughput_ops_s": len(ops) / (elapsed_ns / 1e9) if elapsed_ns else 0.0,
+        "latency_ns": {
+            "p50": percentile(latencies, 0.50),
+            "p99": percentile(latencies, 0.99),
+            "p99.9": percentile(latencies, 0.999),
+            "max": latencies[-1] if latencies else 0,
+        },
+    }
+
+
+def run_benchmarks(targets, workloads, count, seed):
+    results = {}
+
+    # LogSinkThread would otherwise print every order and trade while
+    # the workloads are being timed
+    flush_logs()
+    configure_logging(console_level="off")
+
+    for target_name in targets:
+        for workload_name in workloads:
+            rng = random.Random(seed)
+            prefill, ops = WORKLOADS[workload_name](rng, count)
+
+            with tempfile.TemporaryDirectory() as storage_dir:
+                target = BookTarget() if target_name == "book" else EngineTarget(storage_dir)
+
+                # direct print() calls of the engine (errors) stay off the terminal
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    result = run_workload(target, prefill, ops)
+
+            key = f"{target_name}/{workload_name}"
+            results[key] = result
+            print(_format_result(key, result))
+
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def _format_result(key, result):
+    latency = result["latency_ns"]
+    return (
+        f"{key:<28} "
+        f"{result['throughput_ops_s']:>12,.0f} ops/s   "
+        f"p50 {latency['p50'] / 1000:>8.1f} us   "
+        f"p99 {latency['p99'] / 1000:>8.1f} us   "
+        f"p99.9 {latency['p99.9'] / 1000:>8.1f} us"
+    )
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with a baseline.
+
+    Returns:
+        list[str]: Workloads whose throughput dropped or p99 latency rose
+        by more than `threshold` (a fraction, e.g. 0.10).
+    """
+    regressions = []
+    print("\nComparison with baseline (positive = better):")
+
+    for key, result in results.items():
+        base = baseline.get("results", {}).get(key)
+        if base is None:
+            print(f"{key:<28} (not in baseline)")
+            continue
+
+        throughput_change = result["throughput_ops_s"] / base["throughput_ops_s"] - 1
+        p99_change = 1 - result["latency_ns"]["p99"] / max(base["latency_ns"]["p99"], 1)
+
+        flag = ""
+        if throughput_change < -threshold or p99_change < -threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+
+        print(
+            f"{key:<28} throughput {throughput_change:+7.1%}   "
+            f"p99 {p99_change:+7.1%}{flag}"
+        )
+
+    return regressions
+
+
+def write_json(path, data):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Matching engine microbenchmarks")
+    parser.add_argument("--target", choices=("book", "engine", "all"), default="all")
+    parser.add_argument("--workloads", nargs="+", choices=sorted(WORKLOADS), default=sorted(WORKLOADS))
+    parser.add_argument("--orders", type=int, default=20_000, help="Timed operations per workload")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="storage/benchmarks/latest.json")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", help="Also write the results to this path")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Allowed regression before failing (fraction)")
+
+    args = parser.parse_args()
+
+    targets = ("book", "engine") if args.target == "all" else (args.target,)
+    results = run_benchmarks(targets, args.workloads, args.orders, args.seed)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "orders": args.orders,
+        "seed": args.seed,
+        "results": results,
+    }
+    write_json(args.output, report)
+    print(f"\nResults written to {args.output}")
+
+    if args.save_baseline:
+        write_json(args.save_baseline, report)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
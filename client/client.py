@@ -44,10 +44,13 @@ class ClientUI:
     All engine responses are handled *after* order submission completes.
     """
 
-    def __init__(self, user: str, host: str = "localhost", port: int = 9000):
+    def __init__(self, user: str, host: str = "localhost", port: int = 9000, storage=None):
         """
         Initialize the client UI for a specific user.
 
+        storage is an optional open StorageBackend for the session
+        history (see SessionManager).
+
         Responsibilities:
         - Store user identity
         - Initialize networking client
@@ -59,7 +62,7 @@ class ClientUI:
         """
         self.client_id = generate_client_id()
         self.user = user
-        self.session = SessionManager(self.user)
+        self.session = SessionManager(self.user, storage=storage)
         self.tcp_client = TCPClient(host, port)
 
 
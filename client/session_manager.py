@@ -13,27 +13,61 @@ This module represents *client-side state only*.
 import os
 import json
 import atexit
+from collections import OrderedDict
 
 class SessionManager:
     """
     Manages local session order history for a single user.
 
     Design Notes:
-    - Each user has their own session file:
-        storage/session_orders/orders_userX.json
+    - Each user has their own session files:
+        storage/session_orders/orders_userX.json       (compacted history)
+        storage/session_orders/orders_userX.log.jsonl  (events since)
     - Orders are written optimistically as NEW
     - Status updates are applied after engine responses
     - The engine NEVER writes to these files
+    - With a storage backend (e.g. SQLiteStorage) the orders live in
+      its session_orders table instead of the JSON files
+
+    Persistence:
+    - add_order / update_order append one event (ADD / UPDATE) to the
+      event log instead of rewriting the whole history, so a
+      submission costs the same however long the history is.
+    - Once the log holds compact_every events, and at least as many
+      events as there are orders, the history is written to the JSON
+      file (save()) and the log is emptied. Tying compaction to the
+      history size keeps its cost per event constant.
+    - Loading reads the JSON file and replays the log on top of it.
+      Events are idempotent (ADD replaces the record of its client
+      order ID, UPDATE sets fields and trades from a given index), so
+      a crash between writing the JSON file and emptying the log loses
+      nothing and duplicates nothing.
+
+    Index:
+    - Every order has a client_order_id (1, 2, 3, ... in submission
+      order unless the caller sets one) and, once the engine has
+      answered, an order_id. Both map to the order's position in
+      self.orders.
+    - Orders still waiting for their order_id are kept in submission
+      order; a response without a known order_id is applied to the
+      most recent one, as before.
 
     This class acts as:
     - A local cache
     - A historical record
     """
 
-    def __init__(self, user: str):
+    def __init__(self, user: str, storage=None, compact_every: int = 1000):
         """
         Initialize session manager for a user.
 
+        Parameters:
+            user (str): Username.
+            storage (StorageBackend | None): Open backend holding the
+                session orders instead of the session files.
+            compact_every (int): Fewest events appended to the log
+                before the history is rewritten and the log emptied.
+
         Responsibilities:
         - Resolve user-specific session file path
         - Create session file if missing
@@ -45,13 +79,18 @@ class SessionManager:
         """
         if not isinstance(user, str) or not user.strip():
             raise ValueError("Invalid username")
+        if compact_every <= 0:
+            raise ValueError("compact_every must be positive")
 
         self.user = user.strip().replace(" ", "_")
+        self.storage = storage
+        self.compact_every = compact_every
 
         self.dir_path = os.path.join("storage", "session_orders")
         os.makedirs(self.dir_path, exist_ok=True)
 
         self.file_path = os.path.join(self.dir_path, f"orders_{self.user}.json")
+        self.log_path = os.path.join(self.dir_path, f"orders_{self.user}.log.jsonl")
 
         # Making sure only one user per username is active
         self.lock_path = os.path.join(self.dir_path, f"{self.user}.lock")
@@ -66,11 +105,20 @@ class SessionManager:
 
         atexit.register(self.release_lock)
 
-        if not os.path.exists(self.file_path):
+        if self.storage is None and not os.path.exists(self.file_path):
             with open(self.file_path, "w") as f:
                 json.dump([], f)
 
         self.orders = []
+        # order_id / client_order_id -> position in self.orders
+        self._by_order_id = {}
+        self._by_client_order_id = {}
+        # client_order_id -> position, orders without an order_id yet
+        self._pending = OrderedDict()
+
+        self._log_file = None
+        self._log_events = 0
+
         self.load_orders()
 
 
@@ -80,6 +128,10 @@ class SessionManager:
 
         Prevents permanent lock if program exits cleanly.
         """
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+
         if os.path.exists(self.lock_path):
             os.remove(self.lock_path)
 
@@ -90,11 +142,15 @@ class SessionManager:
 
         Responsibilities:
         - Store order with initial status = NEW
-        - Persist order immediately to disk
+        - Assign a client_order_id if the order has none
+        - Persist the order immediately (one log event)
 
         Notes:
         ------
         This method is called BEFORE the engine responds.
+
+        Returns:
+            client_order_id of the stored order
         """
 
         if not isinstance(order, dict):
@@ -110,10 +166,12 @@ class SessionManager:
         record["status"] = "NEW"
         record["remaining_quantity"] = record.get("quantity", 0)
         record["trades"] = []
+        record.setdefault("client_order_id", len(self.orders) + 1)
 
-        self.orders.append(record)
+        position = self._apply_add(record)
 
-        self.save()
+        self._persist({"type": "ADD", "order": record}, position)
+        return record["client_order_id"]
 
     def update_order(self, response: dict):
         """
@@ -136,40 +194,111 @@ class SessionManager:
         if order_id is None:
             return
 
-        target = None
-
-        for o in self.orders:
-            if o.get("order_id") == order_id:
-                target = o
-                break
+        position = self._by_order_id.get(order_id)
 
-        if target is None:
-            for o in reversed(self.orders):
-                if "order_id" not in o:
-                    o["order_id"] = order_id
-                    target = o
-                    break
+        if position is None:
+            client_order_id = response.get("client_order_id")
+            if client_order_id in self._pending:
+                position = self._pending[client_order_id]
+            elif self._pending:
+                # most recent order still waiting for its ID
+                position = next(reversed(self._pending.values()))
 
-        if target is None:
+        if position is None:
             return
 
+        target = self.orders[position]
+
         if "remaining_quantity" in response:
-            target["remaining_quantity"] = response["remaining_quantity"]
+            remaining_quantity = response["remaining_quantity"]
+        else:
+            remaining_quantity = target["remaining_quantity"]
 
-        rq= target["remaining_quantity"]
         q = target.get("quantity", 0)
 
-        if rq == 0:
-            target["status"] = "FILLED"
+        status = target["status"]
+        if remaining_quantity == 0:
+            status = "FILLED"
+
+        elif 0 < remaining_quantity < q:
+            status = "PARTIALLY_FILLED"
+
+        event = {
+            "type": "UPDATE",
+            "client_order_id": target["client_order_id"],
+            "order_id": order_id,
+            "remaining_quantity": remaining_quantity,
+            "status": status,
+            "trades_from": len(target.get("trades", [])),
+            "trades": response.get("trades") or []
+        }
+        self._apply_update(event)
+
+        self._persist(event, position)
+
+    def _apply_add(self, record: dict) -> int:
+        """
+        Store a record in memory and index it; an ADD for a known
+        client_order_id replaces that record.
+
+        Returns:
+            position of the record in self.orders
+        """
+        client_order_id = record["client_order_id"]
+        position = self._by_client_order_id.get(client_order_id)
+
+        if position is None:
+            position = len(self.orders)
+            self.orders.append(record)
+            self._by_client_order_id[client_order_id] = position
+        else:
+            self.orders[position] = record
+
+        if record.get("order_id") is not None:
+            self._by_order_id[record["order_id"]] = position
+            self._pending.pop(client_order_id, None)
+        else:
+            self._pending[client_order_id] = position
+
+        return position
+
+    def _apply_update(self, event: dict) -> None:
+        position = self._by_client_order_id.get(event["client_order_id"])
+        if position is None:
+            return
 
-        elif 0 < rq < q:
-            target["status"] = "PARTIALLY_FILLED"
+        target = self.orders[position]
 
-        if response.get("trades"):
-            target.setdefault("trades", [])
-            target["trades"].extend(response["trades"])
+        if target.get("order_id") is None:
+            target["order_id"] = event["order_id"]
+            self._by_order_id[event["order_id"]] = position
+            self._pending.pop(event["client_order_id"], None)
 
-        self.save()
+        target["remaining_quantity"] = event["remaining_quantity"]
+        target["status"] = event["status"]
+
+        if event["trades"] or "trades" not in target:
+            trades = target.setdefault("trades", [])
+            del trades[event["trades_from"]:]
+            trades.extend(event["trades"])
+
+    def _persist(self, event: dict, position: int) -> None:
+        """
+        Persist one change: upsert the record into the storage backend,
+        or append the event to the log (compacting when it is due).
+        """
+        if self.storage is not None:
+            self.storage.save_session_order(self.user, position, self.orders[position])
+            return
+
+        if self._log_file is None:
+            self._log_file = open(self.log_path, "a")
+
+        self._log_file.write(json.dumps(event) + "\n")
+        self._log_file.flush()
+        self._log_events += 1
+
+        self._maybe_compact()
 
 
     def load_orders(self):
@@ -178,35 +307,90 @@ class SessionManager:
 
         Responsibilities:
         - Read session JSON file
-        - Reconstruct in-memory order list
+        - Replay the event log written since
+        - Rebuild the in-memory order list and indexes
 
         Used when:
         - Client restarts
         - Session resumes
         """
-        try:
-            with open(self.file_path, "r") as f:
-                data = json.load(f)
-                self.orders = data if isinstance(data, list) else []
-        except (json.JSONDecodeError, FileNotFoundError):
-            self.orders = []
+        self.orders = []
+        self._by_order_id = {}
+        self._by_client_order_id = {}
+        self._pending = OrderedDict()
+
+        if self.storage is not None:
+            records = self.storage.load_session_orders(self.user)
+        else:
+            try:
+                with open(self.file_path, "r") as f:
+                    data = json.load(f)
+                    records = data if isinstance(data, list) else []
+            except (json.JSONDecodeError, FileNotFoundError):
+                records = []
+
+        for record in records:
+            # histories written before client order IDs existed
+            record.setdefault("client_order_id", len(self.orders) + 1)
+            self._apply_add(record)
+
+        if self.storage is None:
+            self._replay_log()
+            self._maybe_compact()
+
+    def _maybe_compact(self) -> None:
+        if self._log_events >= max(self.compact_every, len(self.orders)):
+            self.save()
+
+    def _replay_log(self) -> None:
+        self._log_events = 0
+        if not os.path.exists(self.log_path):
+            return
+
+        with open(self.log_path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    # torn last line after a crash
+                    continue
+
+                if event.get("type") == "ADD":
+                    self._apply_add(event["order"])
+                elif event.get("type") == "UPDATE":
+                    self._apply_update(event)
+                self._log_events += 1
 
 
     def save(self):
         """
-        Persist current session state to disk.
+        Persist current session state to disk (compaction).
 
         Responsibilities:
         - Write full order list to session JSON file
         - Ensure file integrity
+        - Empty the event log, now covered by the JSON file
 
         Must NOT:
         - Block user interaction unnecessarily
         """
+        if self.storage is not None:
+            self.storage.save_session_orders(self.user, self.orders)
+            return
 
         tmp_path = self.file_path + ".tmp"
 
         with open(tmp_path, "w") as f:
-            json.dump(self.orders, f, indent=2)
+            json.dump(self.orders, f)
 
         os.replace(tmp_path, self.file_path)
+
+        # replaying the log again would be harmless, so a crash
+        # before this point is fine
+        if self._log_file is not None:
+            self._log_file.close()
+        self._log_file = open(self.log_path, "w")
+        self._log_events = 0
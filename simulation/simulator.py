@@ -3,18 +3,23 @@ from utils.logger import log_info
 from utils.time_utils import current_timestamp
 
 def generate_random_order():
-    order_type = random.choice(["BUY", "SELL"])
-    order_kind = random.choice(["LIMIT", "MARKET"])
+    side = random.choice(["BUY", "SELL"])
+    order_type = random.choice(["LIMIT", "MARKET"])
     quantity = random.randint(1, 20)
 
+    # same fields the client sends to ExchangeEngine.place_order
     order = {
-        "type": order_type,
-        "kind": order_kind,
+        "user": "simulator",
+        "client_id": "cli_simulator",
+        "side": side,
+        "order_type": order_type,
+        "status": "NEW",
         "quantity": quantity,
+        "price": 0,
         "timestamp": current_timestamp()
     }
 
-    if order_kind == "LIMIT":
+    if order_type == "LIMIT":
         order["price"] = random.randint(90, 110)
 
     return order
@@ -2,6 +2,7 @@
 
 import argparse
 from client.client import ClientUI
+from engine.sqlite_storage import SQLiteStorage
 
 
 def main():
@@ -9,13 +10,26 @@ def main():
     parser.add_argument("--user", required=True, help="Username")
     parser.add_argument("--host", default="localhost")
     parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument(
+        "--storage",
+        choices=("files", "sqlite"),
+        default="files",
+        help="Session history storage"
+    )
+    parser.add_argument("--db-path", default="storage/exchange.db")
 
     args = parser.parse_args()
 
+    storage = None
+    if args.storage == "sqlite":
+        storage = SQLiteStorage(db_path=args.db_path)
+        storage.open()
+
     client = ClientUI(
         user=args.user,
         host=args.host,
-        port=args.port
+        port=args.port,
+        storage=storage
     )
 
     try:
@@ -24,6 +38,8 @@ def main():
         print("\n[CLIENT] Interrupted by user")
     finally:
         client.shutdown()
+        if storage is not None:
+            storage.close()
 
 
 if __name__ == "__main__":
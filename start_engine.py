@@ -1,37 +1,93 @@
+import argparse
 
 from engine.engine import ExchangeEngine
 from engine.orderbook import OrderBook
-from engine.order_store import OrderStore
+from engine.binary_order_store import BinaryOrderStore
 from engine.trade_writer import TradeWriter
+from engine.journal import OrderJournal
+from engine.snapshotter import Snapshotter
+from engine.sqlite_storage import SQLiteStorage
+from engine.instrument import DEFAULT_SYMBOL
 from networking.tcp_server import TCPServer
+from networking.async_tcp_server import AsyncTCPServer
+from utils.clock import SystemClock
+from utils.logger import configure_logging, LEVELS
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Exchange Simulator Engine")
+    parser.add_argument(
+        "--storage",
+        choices=("files", "sqlite"),
+        default="files",
+        help="Persistence of order snapshots and trades"
+    )
+    parser.add_argument("--db-path", default="storage/exchange.db")
+    parser.add_argument(
+        "--log-level",
+        choices=tuple(LEVELS),
+        default="debug",
+        help="Console verbosity (received orders are debug, trades info)"
+    )
+    parser.add_argument(
+        "--server",
+        choices=("threaded", "async"),
+        default="threaded",
+        help="One thread per connection, or one asyncio event loop for all"
+    )
+    args = parser.parse_args()
+    configure_logging(console_level=args.log_level)
+
     print("[SERVER] Starting Exchange Engine...")
 
     # core components
-    order_store = OrderStore()
-    order_book = OrderBook(order_store=order_store)
+    clock = SystemClock()
+    storage = None
+    if args.storage == "sqlite":
+        storage = SQLiteStorage(db_path=args.db_path)
+        storage.open()
+
+    # binary snapshots; an existing JSON snapshot is picked up once
+    order_store = BinaryOrderStore(
+        filepath="storage/orders_snapshot.snap",
+        legacy_json_path="storage/orders_snapshot.json"
+    )
+    if storage is not None:
+        # the file snapshot is read once, until the database has one
+        order_store = storage.order_store(DEFAULT_SYMBOL, legacy_store=order_store)
+    order_book = OrderBook(order_store=order_store, clock=clock)
     trade_writer = TradeWriter(
-        ledger_path="storage/trades/trades.json"
+        ledger_path="storage/trades/trades.jsonl",
+        clock=clock,
+        storage=storage
     )
     trade_writer.start()
+    journal = OrderJournal(journal_dir="storage/journal")
+    journal.start()
 
     engine = ExchangeEngine(
         order_book=order_book,
         trade_writer=trade_writer,
-        logger=None
+        logger=None,
+        clock=clock,
+        journal=journal,
+        snapshot_format="binary",
+        storage=storage
     )
 
 
     engine.start()
 
     #TCP Server 
-    server = TCPServer(
+    server_class = AsyncTCPServer if args.server == "async" else TCPServer
+    server = server_class(
         host="0.0.0.0",
         port=9000,
         engine=engine
     )
+    # background snapshots keep the journal tail (and recovery) short
+    snapshotter = Snapshotter(engine, lock_for=server.lock_for, interval_s=60.0)
+    snapshotter.start()
 
     try:
         server.start_server()
@@ -40,9 +96,22 @@ def main():
     finally:
         print("[SERVER] Shutting down...")
 
-        server.stop_server()
-        engine.stop()
-        trade_writer.stop()
+        # every step runs even if an earlier one fails (e.g. a snapshot
+        # that cannot be saved must not leave the writers unflushed)
+        steps = [
+            server.stop_server,
+            snapshotter.stop,
+            engine.stop,
+            journal.stop,
+            trade_writer.stop
+        ]
+        if storage is not None:
+            steps.append(storage.close)
+        for step in steps:
+            try:
+                step()
+            except Exception as e:
+                print(f"[SERVER] {step.__qualname__} failed: {e}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,30 @@
+"""
+Tests of the exchange engine.
+
+The engine code imports itself as `engine.*` (the exchange_engine
+package), `utils.*` and `networking.*`; the same names are set up here
+so the tests run from a plain checkout:
+
+    python3 -m unittest discover tests
+"""
+import importlib.util
+import os
+import sys
+
+ENGINE_DIR = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), "..", "backend", "app", "services", "exchange_engine"
+))
+
+if "engine" not in sys.modules:
+    spec = importlib.util.spec_from_file_location(
+        "engine",
+        os.path.join(ENGINE_DIR, "__init__.py"),
+        submodule_search_locations=[ENGINE_DIR]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["engine"] = module
+    spec.loader.exec_module(module)
+
+if ENGINE_DIR not in sys.path:
+    # utils and networking live inside the engine directory
+    sys.path.append(ENGINE_DIR)
@@ -0,0 +1,147 @@
+import shutil
+import tempfile
+import unittest
+
+import tests  # noqa: F401 (sets up the engine imports)
+from engine.engine import ExchangeEngine
+from engine.journal import OrderJournal
+from engine.order_store import OrderStore
+from engine.orderbook import OrderBook
+from engine.trade_writer import TradeWriter
+from utils.logger import configure_logging
+
+
+def limit_order(side, quantity, price, **fields):
+    order = {
+        "user": "u",
+        "client_id": "c",
+        "side": side,
+        "quantity": quantity,
+        "price": price,
+        "order_type": "LIMIT",
+        "status": "NEW"
+    }
+    order.update(fields)
+    return order
+
+
+class EngineTestCase(unittest.TestCase):
+    """
+    A running engine with its files in a temporary directory.
+    """
+
+    def setUp(self):
+        configure_logging(console_level="off")
+        self.directory = tempfile.mkdtemp()
+        self.engine = self.make_engine()
+        self.engine.start()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def make_engine(self, **kwargs):
+        order_store = OrderStore(filepath=f"{self.directory}/orders_snapshot.json")
+        return ExchangeEngine(
+            order_book=OrderBook(order_store=order_store),
+            snapshot_dir=f"{self.directory}/snapshots",
+            **kwargs
+        )
+
+
+class ClientFieldsTest(EngineTestCase):
+
+    def test_spoofed_status_is_ignored(self):
+        resting = self.engine.place_order(limit_order(
+            "SELL", 5, 100,
+            status="CANCELLED",
+            remaining_quantity=1,
+            order_id=42
+        ))
+        self.assertTrue(resting["accepted"])
+        self.assertNotEqual(resting["order_id"], 42)
+        self.assertEqual(resting["remaining_quantity"], 5)
+
+        book = self.engine.order_book
+        self.assertEqual(book.get_order(resting["order_id"]).status, "NEW")
+        self.assertEqual(book.level("SELL", 100)["quantity"], 5)
+
+        # a crossing order trades with it instead of failing on the level
+        for _ in range(2):
+            response = self.engine.place_order(limit_order("BUY", 2, 100))
+            self.assertEqual(len(response["trades"]), 1)
+        self.assertEqual(book.level("SELL", 100)["quantity"], 1)
+
+    def test_quantity_must_be_an_integer(self):
+        for quantity in (1.5, True, "5", 0):
+            with self.assertRaises(ValueError):
+                self.engine.place_order(limit_order("SELL", quantity, 100))
+
+        responses = self.engine.place_orders([limit_order("SELL", 2.5, 100)])
+        self.assertFalse(responses[0]["accepted"])
+        self.assertEqual(self.engine.order_book.order_index, {})
+
+
+class JournalReplayTest(EngineTestCase):
+    """
+    The process stops after an order is journalled but before its
+    trades reach the ledger.
+    """
+
+    def setUp(self):
+        configure_logging(console_level="off")
+        self.directory = tempfile.mkdtemp()
+        self.engine, self.journal, self.trade_writer = self.start_engine()
+
+    def start_engine(self):
+        journal = OrderJournal(journal_dir=f"{self.directory}/journal")
+        journal.start()
+        trade_writer = TradeWriter(f"{self.directory}/trades/trades.jsonl")
+        trade_writer.start()
+        engine = self.make_engine(journal=journal, trade_writer=trade_writer)
+        engine.start()
+        return engine, journal, trade_writer
+
+    def ledger_trades(self):
+        return [
+            (trade["trade_id"], trade["buy_order_id"], trade["sell_order_id"], trade["quantity"])
+            for trade in self.trade_writer.read_trades()
+        ]
+
+    def test_uncommitted_trades_are_persisted_on_replay(self):
+        self.engine.place_order(limit_order("SELL", 10, 100))
+        committed = self.engine.place_order(limit_order("BUY", 3, 100))
+        self.trade_writer.flush()
+
+        # crash: the next trades are journalled but never committed
+        self.engine.trade_writer = None
+        lost = self.engine.place_orders([
+            limit_order("BUY", 2, 100),
+            limit_order("BUY", 4, 100)
+        ])
+        self.journal.stop()
+        self.trade_writer.stop()
+
+        expected = [
+            (trade["trade_id"], trade["buy_order_id"], trade["sell_order_id"], trade["quantity"])
+            for response in [committed] + lost
+            for trade in response["trades"]
+        ]
+        self.assertEqual(self.ledger_trades(), expected[:1])
+
+        self.engine, self.journal, self.trade_writer = self.start_engine()
+        self.trade_writer.flush()
+        # same trade IDs as the first time, nothing written twice
+        self.assertEqual(self.ledger_trades(), expected)
+        self.assertEqual(self.engine.order_book.level("SELL", 100)["quantity"], 1)
+
+        # new trades continue after the replayed ones
+        response = self.engine.place_order(limit_order("BUY", 1, 100))
+        self.assertGreater(response["trades"][0]["trade_id"], expected[-1][0])
+
+        self.engine.stop()
+        self.journal.stop()
+        self.trade_writer.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
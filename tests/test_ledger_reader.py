@@ -0,0 +1,161 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from tests import ENGINE_DIR
+from engine.ledger_reader import LedgerReader
+from engine.segmented_ledger import COMPRESS_BLOCK_BYTES, SegmentedLedger
+from utils.serialization import encode_jsonl
+
+LEGACY_LEDGER = os.path.join(ENGINE_DIR, "storage", "trades", "trades.json")
+
+
+class MigratedLedgerTest(unittest.TestCase):
+    """
+    The shipped JSON-array ledger has random trade IDs and ISO-8601
+    timestamps; SegmentedLedger.open() migrates it to JSON lines.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        shutil.copy(LEGACY_LEDGER, os.path.join(self.directory, "trades.json"))
+        with open(LEGACY_LEDGER) as f:
+            self.legacy = json.load(f)
+
+        self.ledger_path = os.path.join(self.directory, "trades.jsonl")
+        ledger = SegmentedLedger(self.ledger_path)
+        ledger.open()
+        ledger.close()
+
+        self.reader = LedgerReader(self.ledger_path)
+        # several index entries even for a small ledger
+        self.reader.INDEX_STRIDE = 4
+
+    def tearDown(self):
+        self.reader.close()
+        shutil.rmtree(self.directory)
+
+    def append(self, trades):
+        with open(self.ledger_path, "a") as f:
+            for trade in trades:
+                f.write(json.dumps(trade) + "\n")
+
+    def page_through(self, **kwargs):
+        trade_ids = []
+        cursor = None
+        while True:
+            page = self.reader.scan(after_trade_id=cursor, limit=5, **kwargs)
+            trade_ids.extend(trade["trade_id"] for trade in page["trades"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                return trade_ids
+
+    def test_timestamps_are_migrated_to_nanoseconds(self):
+        trades = self.reader.scan(start_ns=0, limit=100)["trades"]
+        self.assertEqual(len(trades), len(self.legacy))
+        self.assertTrue(all(isinstance(trade["timestamp"], int) for trade in trades))
+
+    def test_get_trade_finds_every_legacy_trade(self):
+        for trade in self.legacy:
+            found = self.reader.get_trade(trade["trade_id"])
+            self.assertIsNotNone(found)
+            self.assertEqual(found["buy_order_id"], trade["buy_order_id"])
+        self.assertIsNone(self.reader.get_trade(12345))
+
+    def test_scan_pages_in_ledger_order(self):
+        self.assertEqual(self.page_through(), [trade["trade_id"] for trade in self.legacy])
+
+    def test_new_trades_after_legacy_ones(self):
+        last = self.reader.scan(start_ns=0, limit=100)["trades"][-1]["timestamp"]
+        new = [
+            {
+                "trade_id": trade_id,
+                "buy_order_id": 1,
+                "sell_order_id": 2,
+                "buy_client_id": "a",
+                "sell_client_id": "b",
+                "price": 100,
+                "quantity": 1,
+                "timestamp": last + trade_id
+            }
+            for trade_id in range(1, 41)
+        ]
+        self.append(new)
+
+        for trade in new + self.legacy:
+            self.assertIsNotNone(self.reader.get_trade(trade["trade_id"]))
+
+        self.assertEqual(
+            self.page_through(),
+            [trade["trade_id"] for trade in self.legacy + new]
+        )
+
+        window = self.reader.scan(start_ns=last + 10, end_ns=last + 20, limit=100)["trades"]
+        self.assertEqual([trade["trade_id"] for trade in window], list(range(10, 20)))
+
+
+class CompressedSegmentsTest(unittest.TestCase):
+    """
+    Sealed segments of several compression blocks each; records cross
+    block boundaries.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.ledger_path = os.path.join(self.directory, "trades.jsonl")
+        ledger = SegmentedLedger(
+            self.ledger_path,
+            max_segment_bytes=3 * COMPRESS_BLOCK_BYTES,
+            rotate_daily=False
+        )
+        ledger.open()
+        self.count = 6000
+        sealed = []
+        for trade_id in range(1, self.count + 1):
+            trade = {
+                "trade_id": trade_id,
+                "buy_order_id": trade_id,
+                "sell_order_id": trade_id + 1,
+                "buy_client_id": f"client_{trade_id % 7}",
+                "sell_client_id": f"client_{trade_id % 11}",
+                "price": 100,
+                "quantity": 1,
+                "timestamp": trade_id * 1000
+            }
+            segment = ledger.write(encode_jsonl(trade), trade, trade)
+            if segment is not None:
+                sealed.append(segment)
+        ledger.close()
+        for segment in sealed:
+            ledger.compress_segment(segment)
+        self.sealed = sealed
+
+        self.reader = LedgerReader(self.ledger_path)
+
+    def tearDown(self):
+        self.reader.close()
+        shutil.rmtree(self.directory)
+
+    def test_lookups_in_compressed_segments(self):
+        self.assertGreater(len(self.sealed), 2)
+        for segment in self.sealed:
+            self.assertTrue(os.path.exists(self.reader._ledger.block_index_path(segment)))
+
+        self.assertEqual(len(self.reader), self.count)
+        for trade_id in range(1, self.count + 1):
+            self.assertEqual(self.reader.get_trade(trade_id)["trade_id"], trade_id)
+
+        trades = self.reader.scan(start_ns=2000 * 1000, limit=1500)["trades"]
+        self.assertEqual([trade["trade_id"] for trade in trades], list(range(2000, 3500)))
+
+        # still one ordinary gzip stream for sequential readers
+        self.assertEqual(
+            [trade["trade_id"] for trade in SegmentedLedger(self.ledger_path).iter_records()],
+            list(range(1, self.count + 1))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from tests import ENGINE_DIR
+from engine.binary_order_store import BinaryOrderStore
+from engine.order_store import MAX_ORDER_ID
+from engine.orderbook import OrderBook
+from engine.sqlite_storage import SQLiteStorage
+from utils.id_generators import IdSequencer
+
+LEGACY_SNAPSHOT = os.path.join(ENGINE_DIR, "storage", "orders_snapshot.json")
+
+
+class LegacySnapshotTest(unittest.TestCase):
+    """
+    The shipped JSON snapshot predates the IdSequencer: some of its
+    order IDs are 128-bit uuid4 integers.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.legacy_path = os.path.join(self.directory, "orders_snapshot.json")
+        shutil.copy(LEGACY_SNAPSHOT, self.legacy_path)
+        self.snap_path = os.path.join(self.directory, "orders_snapshot.snap")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def restore(self):
+        store = BinaryOrderStore(filepath=self.snap_path, legacy_json_path=self.legacy_path)
+        order_book = OrderBook(order_store=store, id_sequencer=IdSequencer())
+        order_book.restore()
+        return order_book
+
+    def test_load_and_save_again(self):
+        order_book = self.restore()
+        orders = {
+            order_id: (order.side, order.price, order.remaining_quantity)
+            for order_id, order in order_book.order_index.items()
+        }
+        self.assertEqual(len(orders), 4)
+        self.assertTrue(all(0 < order_id <= MAX_ORDER_ID for order_id in orders))
+
+        order_book.save()
+        self.assertTrue(os.path.exists(self.snap_path))
+
+        restored = self.restore()
+        self.assertEqual(
+            {
+                order_id: (order.side, order.price, order.remaining_quantity)
+                for order_id, order in restored.order_index.items()
+            },
+            orders
+        )
+
+    def test_import_into_sqlite_and_save(self):
+        storage = SQLiteStorage(db_path=os.path.join(self.directory, "exchange.db"))
+        storage.open()
+        try:
+            store = storage.order_store("DEFAULT", legacy_store=BinaryOrderStore(
+                filepath=self.snap_path,
+                legacy_json_path=self.legacy_path
+            ))
+            order_book = OrderBook(order_store=store, id_sequencer=IdSequencer())
+            order_book.restore()
+            order_book.save()
+
+            restored = OrderBook(order_store=storage.order_store("DEFAULT"), id_sequencer=IdSequencer())
+            restored.restore()
+            self.assertEqual(sorted(restored.order_index), sorted(order_book.order_index))
+        finally:
+            storage.close()
+
+    def test_new_ids_do_not_reuse_renumbered_ones(self):
+        order_book = self.restore()
+        next_id = order_book.id_sequencer.next_order_id()
+        self.assertNotIn(next_id, order_book.order_index)
+
+    def test_unpackable_order_leaves_snapshot_unchanged(self):
+        order_book = self.restore()
+        order_book.save()
+        with open(self.snap_path, "rb") as f:
+            saved = f.read()
+
+        order = next(iter(order_book.order_index.values()))
+        order.remaining_quantity = 1.5
+        with self.assertRaises(ValueError):
+            order_book.save()
+
+        with open(self.snap_path, "rb") as f:
+            self.assertEqual(f.read(), saved)
+        self.assertFalse(os.path.exists(self.snap_path + ".tmp"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from tests import ENGINE_DIR  # noqa: F401 (sets up the engine imports)
+from engine.ledger_reader import LedgerReader
+from engine.segmented_ledger import SegmentedLedger
+from utils.serialization import encode_jsonl
+
+
+def make_trade(trade_id):
+    return {
+        "trade_id": trade_id,
+        "buy_order_id": trade_id,
+        "sell_order_id": trade_id + 1,
+        "buy_client_id": "a",
+        "sell_client_id": "b",
+        "price": 100,
+        "quantity": 1,
+        "timestamp": trade_id * 1000
+    }
+
+
+class CrashDuringSealTest(unittest.TestCase):
+    """
+    The process stops inside seal(), after the active segment was
+    renamed but before the manifest lists it.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "trades.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def ledger(self):
+        return SegmentedLedger(self.path, max_segment_bytes=1000, rotate_daily=False)
+
+    def write(self, ledger, trade_ids):
+        for trade_id in trade_ids:
+            trade = make_trade(trade_id)
+            ledger.write(encode_jsonl(trade), trade, trade)
+        ledger.flush()
+
+    def crash_in_seal(self, trade_ids):
+        ledger = self.ledger()
+        ledger.open()
+        self.write(ledger, trade_ids)
+
+        def crash():
+            raise OSError("crashed before the manifest was written")
+
+        ledger._save_manifest = crash
+        segment = ledger.manifest["next_segment"]
+        with self.assertRaises(OSError):
+            ledger.seal()
+        ledger.close()
+        return segment
+
+    def read_all(self):
+        """trade_ids from iter_records(), failing instead of hanging."""
+        result = {}
+
+        def run():
+            result["trade_ids"] = [
+                trade["trade_id"] for trade in self.ledger().iter_records()
+            ]
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(timeout=10)
+        self.assertFalse(thread.is_alive(), "iter_records() hangs")
+        return result["trade_ids"]
+
+    def test_renamed_segment_is_read_and_listed_on_open(self):
+        # earlier segments are sealed normally, the last one only renamed
+        segment = self.crash_in_seal(range(1, 21))
+        self.assertGreater(segment, 1)
+        self.assertTrue(os.path.exists(self.ledger().segment_path(segment)))
+        self.assertEqual(len(self.ledger().read_manifest()["segments"]), segment - 1)
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(self.read_all(), list(range(1, 21)))
+
+        ledger = self.ledger()
+        try:
+            self.assertEqual(ledger.open(), list(range(1, segment + 1)))
+            self.assertEqual(ledger.manifest["next_segment"], segment + 1)
+            self.assertEqual(ledger.manifest["segments"][-1]["last_trade_id"], 20)
+            self.write(ledger, range(21, 26))
+        finally:
+            ledger.close()
+
+        self.assertEqual(self.read_all(), list(range(1, 26)))
+        reader = LedgerReader(self.path)
+        try:
+            self.assertEqual(len(reader), 25)
+            self.assertEqual(reader.get_trade(20)["trade_id"], 20)
+        finally:
+            reader.close()
+
+    def test_listed_but_not_renamed_segment(self):
+        # older versions wrote the manifest before the rename
+        ledger = self.ledger()
+        ledger.open()
+        self.write(ledger, range(1, 11))
+        ledger.seal()
+        ledger.close()
+        segment = ledger.manifest["next_segment"] - 1
+        os.replace(ledger.segment_path(segment), self.path)
+
+        self.assertEqual(self.read_all(), list(range(1, 11)))
+
+        ledger = self.ledger()
+        try:
+            ledger.open()
+            self.assertTrue(os.path.exists(ledger.segment_path(segment)))
+            self.write(ledger, range(11, 16))
+        finally:
+            ledger.close()
+        self.assertEqual(self.read_all(), list(range(1, 16)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import json
+import unittest
+
+from tests.test_engine import EngineTestCase, limit_order
+from networking.connection import Connection
+from networking.tcp_server import TCPServer
+
+
+class RecordingConnection(Connection):
+    """Connection keeping the events pushed to it."""
+
+    def __init__(self):
+        super().__init__(("test", 0))
+        self.events = []
+
+    def send(self, data: bytes) -> None:
+        self.events.append(json.loads(data))
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class ExecutionFeedTest(EngineTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.server = TCPServer(engine=self.engine)
+
+    def test_connection_is_bound_by_its_first_accepted_order(self):
+        connection = RecordingConnection()
+
+        # rejected orders do not bind the connection
+        response = self.server.handle_request(limit_order("BUY", 0, 100, client_id="a"), connection)
+        self.assertIn("error", response)
+        self.assertIsNone(connection.client_id)
+
+        response = self.server.handle_request(limit_order("BUY", 5, 100, client_id="b"), connection)
+        self.assertTrue(response["accepted"])
+        self.assertEqual(connection.client_id, "b")
+
+        response = self.server.handle_request(limit_order("BUY", 5, 100, client_id="a"), connection)
+        self.assertIn("error", response)
+        responses = self.server._process_batch([
+            limit_order("BUY", 5, 100, client_id="b"),
+            limit_order("BUY", 5, 100, client_id="a")
+        ], connection)
+        self.assertTrue(responses[0]["accepted"])
+        self.assertIn("error", responses[1])
+        book = self.engine.order_books["DEFAULT"]
+        price = self.engine.instrument_for("DEFAULT").to_ticks(100)
+        self.assertEqual(book.level("BUY", price)["orders"], 2)
+
+    def test_executions_carry_the_leaves_after_each_fill(self):
+        seller = RecordingConnection()
+        buyer = RecordingConnection()
+        for quantity in (2, 3):
+            self.server.handle_request(limit_order("SELL", quantity, 100, client_id="s"), seller)
+        self.server.handle_request(limit_order("BUY", 10, 100, client_id="b"), buyer)
+
+        self.assertEqual([event["remaining_quantity"] for event in buyer.events], [8, 5])
+        self.assertEqual([event["remaining_quantity"] for event in seller.events], [0, 0])
+
+    def test_batch_executions_of_a_resting_order(self):
+        seller = RecordingConnection()
+        buyer = RecordingConnection()
+        self.server.handle_request(limit_order("SELL", 10, 100, client_id="s"), seller)
+        self.server._process_batch(
+            [limit_order("BUY", quantity, 100, client_id="b") for quantity in (2, 3)],
+            buyer
+        )
+
+        self.assertEqual([event["remaining_quantity"] for event in seller.events], [8, 5])
+        self.assertEqual([event["remaining_quantity"] for event in buyer.events], [0, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
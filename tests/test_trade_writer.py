@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from tests import ENGINE_DIR  # noqa: F401 (sets up the engine imports)
+from engine.trade import Trade
+from engine.trade_writer import TradeWriter
+
+
+class FailingStorage:
+    """Storage backend whose commits fail like a full disk."""
+
+    def __init__(self):
+        self.batches = 0
+
+    def write_trades(self, records):
+        self.batches += 1
+        raise OSError(28, "No space left on device")
+
+
+def make_trade(trade_id):
+    return Trade(trade_id, 1, 2, "a", "b", 100, 1, trade_id)
+
+
+class CommitFailureTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.storage = FailingStorage()
+        self.writer = TradeWriter(
+            os.path.join(self.directory, "trades.jsonl"),
+            storage=self.storage
+        )
+        self.writer.start()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def call_with_timeout(self, method):
+        result = {}
+
+        def run():
+            try:
+                method()
+            except Exception as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(timeout=10)
+        self.assertFalse(thread.is_alive(), f"{method.__name__}() hangs")
+        return result.get("error")
+
+    def test_flush_and_stop_raise_instead_of_hanging(self):
+        self.writer.enqueue_trade(make_trade(1))
+        error = self.call_with_timeout(self.writer.flush)
+        self.assertIsInstance(error, OSError)
+
+        # later trades are dropped, not written after the hole
+        self.writer.enqueue_trades([make_trade(2), make_trade(3)])
+        error = self.call_with_timeout(self.writer.stop)
+        self.assertIsInstance(error, OSError)
+        self.assertEqual(self.storage.batches, 1)
+        self.assertEqual(self.writer.stats()["trades_dropped"], 3)
+        self.assertFalse(self.writer.is_running())
+
+
+if __name__ == "__main__":
+    unittest.main()